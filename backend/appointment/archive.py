@@ -0,0 +1,237 @@
+import gzip
+from collections import defaultdict
+from datetime import UTC, date, datetime, time
+from pathlib import Path
+
+from django.db import connection, transaction
+from django.db.backends.postgresql.psycopg_any import DateTimeTZRange
+from django.db.models import Max, Q
+
+from department import stats
+
+from .cache import invalidate_related, spanned_days
+from .models import Appointment, ArchivedAppointment, ArchivedMonth, Occurrence
+
+# Columns of the archive table, in the order exported files hold them
+ARCHIVE_COLUMNS = (
+    "id",
+    "start_datetime",
+    "end_datetime",
+    "recurrence",
+    "recurrence_exceptions",
+    "recurrence_end",
+    "series_id",
+    "recurrence_id",
+    "title",
+    "description",
+    "employee_id",
+    "participant_ids",
+    "created_at",
+    "updated_at",
+    "archived_at",
+)
+
+PARTITION_SQL = """
+CREATE TABLE IF NOT EXISTS {partition} PARTITION OF {archive}
+FOR VALUES FROM (%(lower)s) TO (%(upper)s)
+"""
+
+# The rows a transaction moves, kept on the server however many there are
+MOVING_SQL = "CREATE TEMP TABLE archive_moving ON COMMIT DROP AS {rows}"
+
+# Copies the rows with their participants and returns the count and longest span of each month
+ARCHIVE_SQL = """
+WITH archived AS (
+    INSERT INTO {archive} ({columns})
+    SELECT a.id, a.start_datetime, a.end_datetime, a.recurrence, a.recurrence_exceptions, a.recurrence_end,
+        a.series_id, a.recurrence_id, a.title, a.description, a.employee_id,
+        ARRAY(SELECT p.employee_id FROM {participants} p WHERE p.appointment_id = a.id ORDER BY p.employee_id),
+        a.created_at, a.updated_at, now()
+    FROM {appointment} a
+    WHERE a.id IN (SELECT id FROM archive_moving)
+    RETURNING start_datetime, upper(span) - lower(span) AS span
+)
+SELECT date_trunc('month', start_datetime AT TIME ZONE 'UTC')::date, count(*), max(span)
+FROM archived
+GROUP BY 1
+"""
+
+# Deleted directly rather than through the ORM: the rows are archived, not deleted, and nothing should react
+# to each of them. The statements still record tombstones for delta syncs.
+DELETE_SQL = """
+DELETE FROM {participants} WHERE appointment_id IN (SELECT id FROM archive_moving);
+DELETE FROM {occurrence} WHERE series_id IN (SELECT id FROM archive_moving);
+DELETE FROM {appointment} WHERE id IN (SELECT id FROM archive_moving);
+"""
+
+
+def month_of(value):
+    """
+    Return the first day of the month, in UTC, of the datetime `value`; archive partitions hold one each.
+    """
+    value = value.astimezone(UTC)
+    return date(value.year, value.month, 1)
+
+
+def add_months(month, months):
+    year, index = divmod(month.year * 12 + month.month - 1 + months, 12)
+    return date(year, index + 1, 1)
+
+
+def month_bounds(month):
+    return tuple(datetime.combine(add_months(month, n), time.min, UTC) for n in (0, 1))
+
+
+def partition_name(month):
+    return f"{ArchivedAppointment._meta.db_table}_y{month.year}m{month.month:02d}"
+
+
+def ensure_partition(cursor, month):
+    """
+    Create the archive partition of `month` unless it exists.
+    """
+    lower, upper = month_bounds(month)
+    sql = PARTITION_SQL.format(partition=_quote(partition_name(month)), archive=_table(ArchivedAppointment))
+    cursor.execute(sql, {"lower": lower, "upper": upper})
+
+
+def get_archivable(cutoff):
+    """
+    Return the appointments over before `cutoff`: single appointments, and series whose last occurrence and
+    every override ended by then. Overrides go with their series, those of series still running stay.
+    """
+    series = (
+        Appointment.objects.exclude(recurrence="")
+        .filter(recurrence_end__lte=cutoff)
+        .exclude(overrides__end_datetime__gt=cutoff)
+    )
+    return Appointment.objects.filter(
+        Q(recurrence="", end_datetime__lte=cutoff, series=None)
+        | Q(recurrence="", end_datetime__lte=cutoff, series__in=series)
+        | Q(pk__in=series)
+    )
+
+
+def archive(cutoff):
+    """
+    Move the appointments `get_archivable(cutoff)` returns into the archive table, a month of starts per
+    transaction, and return how many were moved by month.
+
+    Partitions are created as months first get rows and ArchivedMonth keeps their counts. Each series moves
+    with its overrides and materialized occurrences. Cached days are dropped and the department stats of
+    the days the moved appointments spanned recomputed.
+    """
+    archivable = get_archivable(cutoff)
+    moved = defaultdict(int)
+    while first := archivable.order_by("start_datetime").values_list("start_datetime", flat=True).first():
+        lower, upper = month_bounds(month_of(first))
+        with transaction.atomic():
+            rows = archivable.filter(start_datetime__gte=lower, start_datetime__lt=upper)
+            rows = rows | Appointment.objects.filter(series__in=rows.exclude(recurrence=""))
+            for month, count in _move(rows).items():
+                moved[month] += count
+    if moved:
+        invalidate_related()
+    return dict(moved)
+
+
+def _move(rows):
+    sql, params = rows.values("id", "start_datetime", "end_datetime", "recurrence").query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute("DROP TABLE IF EXISTS archive_moving")
+        cursor.execute(MOVING_SQL.format(rows=sql), params)
+        cursor.execute("ANALYZE archive_moving")
+        cursor.execute(
+            "SELECT DISTINCT date_trunc('month', start_datetime AT TIME ZONE 'UTC')::date FROM archive_moving"
+        )
+        for [month] in cursor.fetchall():
+            ensure_partition(cursor, month)
+        cursor.execute(ARCHIVE_SQL.format(columns=", ".join(ARCHIVE_COLUMNS), **_tables()))
+        months = cursor.fetchall()
+        cursor.execute("SELECT min(start_datetime), max(end_datetime) FROM archive_moving WHERE recurrence = ''")
+        first, last = cursor.fetchone()
+        cursor.execute(DELETE_SQL.format(**_tables()))
+
+    for month, count, longest in months:
+        archived, _ = ArchivedMonth.objects.select_for_update().get_or_create(month=month)
+        archived.appointments += count
+        archived.longest = max(archived.longest, longest)
+        archived.save()
+    if first is not None:
+        stats.refresh(days=spanned_days(first, last))
+    return {month: count for month, count, _ in months}
+
+
+def find_archived(lower, upper):
+    """
+    Return the archived appointments overlapping [lower, upper), series as their rows, not expanded.
+
+    Besides the overlap the query bounds `start_datetime`, by `upper` and by `lower` less the longest
+    archived span, so Postgres only reads the partitions of the months that can hold matches.
+    """
+    longest = ArchivedMonth.objects.filter(file="").aggregate(longest=Max("longest"))["longest"]
+    if longest is None:
+        return ArchivedAppointment.objects.none()
+    return ArchivedAppointment.objects.filter(
+        span__overlap=DateTimeTZRange(lower, upper),
+        start_datetime__gte=lower - longest,
+        start_datetime__lt=upper,
+    )
+
+
+def export(month, directory):
+    """
+    Write the archive partition of `month` to a gzipped COPY file in `directory`, drop it and return the path.
+
+    The month stays in ArchivedMonth with its `file`, `restore` brings it back.
+    """
+    path = Path(directory) / f"appointments-{month:%Y-%m}.tsv.gz"
+    partition = _quote(partition_name(month))
+    with transaction.atomic(), connection.cursor() as cursor:
+        archived = ArchivedMonth.objects.select_for_update().get(month=month, file="")
+        cursor.execute(f"ALTER TABLE {_table(ArchivedAppointment)} DETACH PARTITION {partition}")
+        with (
+            gzip.open(path, "wb") as file,
+            cursor.copy(f"COPY {partition} ({', '.join(ARCHIVE_COLUMNS)}) TO STDOUT") as copy,
+        ):
+            for data in copy:
+                file.write(data)
+        cursor.execute(f"DROP TABLE {partition}")
+        archived.file = str(path)
+        archived.save()
+    return path
+
+
+def restore(month):
+    """
+    Load the file `export` wrote for `month` back into its archive partition.
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        archived = ArchivedMonth.objects.select_for_update().exclude(file="").get(month=month)
+        ensure_partition(cursor, month)
+        partition = _quote(partition_name(month))
+        with (
+            gzip.open(archived.file, "rb") as file,
+            cursor.copy(f"COPY {partition} ({', '.join(ARCHIVE_COLUMNS)}) FROM STDIN") as copy,
+        ):
+            while data := file.read(1 << 20):
+                copy.write(data)
+        archived.file = ""
+        archived.save()
+
+
+def _quote(name):
+    return connection.ops.quote_name(name)
+
+
+def _table(model):
+    return _quote(model._meta.db_table)
+
+
+def _tables():
+    return {
+        "archive": _table(ArchivedAppointment),
+        "appointment": _table(Appointment),
+        "participants": _table(Appointment.participants.through),
+        "occurrence": _table(Occurrence),
+    }
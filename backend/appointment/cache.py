@@ -0,0 +1,166 @@
+import hashlib
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import models, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework.response import Response
+
+from .filters import day_bounds
+
+KEY_PREFIX = "appointment:day"
+RELATED_VERSION_KEY = f"{KEY_PREFIX}:related:version"
+HITS_KEY = f"{KEY_PREFIX}:hits"
+MISSES_KEY = f"{KEY_PREFIX}:misses"
+
+# How long a worker may rebuild a cold day before others stop waiting for it
+LOCK_TIMEOUT = 10
+LOCK_POLL_INTERVAL = 0.05
+
+
+def version_key(day):
+    return f"{KEY_PREFIX}:{day.isoformat()}:version"
+
+
+def spanned_days(start, end):
+    """
+    Return the days in the current timezone that the half-open range [start, end) overlaps.
+
+    Accepts whatever a DateTimeField does, naive values are read in the default timezone like on save.
+    """
+    start, end = _aware(start), _aware(end)
+    first, last = timezone.localdate(start), timezone.localdate(end)
+    if day_bounds(last)[0] >= end:
+        last -= timedelta(days=1)
+    return {first + timedelta(days=n) for n in range(max((last - first).days, 0) + 1)}
+
+
+def _aware(value):
+    value = models.DateTimeField().to_python(value)
+    return timezone.make_aware(value, timezone.get_default_timezone()) if timezone.is_naive(value) else value
+
+
+def invalidate_days(ranges):
+    """
+    Give every day the (start, end) `ranges` span a new version, so responses cached for them are never read again.
+
+    Versions are bumped right away and again on commit, a response rebuilt from the old rows in between is dropped.
+    """
+    keys = [version_key(day) for start, end in ranges for day in spanned_days(start, end)]
+    if keys:
+        _bump(keys)
+        transaction.on_commit(lambda: _bump(keys))
+
+
+def invalidate_related():
+    """
+    Drop every cached day, for edits to the employees and departments nested in them and to recurring series.
+    """
+    _bump([RELATED_VERSION_KEY])
+    transaction.on_commit(lambda: _bump([RELATED_VERSION_KEY]))
+
+
+def _bump(keys):
+    cache.set_many({key: uuid.uuid4().hex for key in keys}, timeout=None)
+
+
+def get_versions(keys):
+    """
+    Return the current version of each key, creating missing ones.
+
+    Versions are random rather than counters, an evicted version key never brings stale responses back.
+    """
+    versions = cache.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        for key in missing:
+            cache.add(key, uuid.uuid4().hex, timeout=None)
+        versions.update(cache.get_many(missing))
+    return [versions[key] for key in keys]
+
+
+def _count(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, timeout=None)
+
+
+def get_stats():
+    stats = cache.get_many([HITS_KEY, MISSES_KEY])
+    return {"hits": stats.get(HITS_KEY, 0), "misses": stats.get(MISSES_KEY, 0)}
+
+
+def get_or_build(day, variant, build):
+    """
+    Return the cached data for `variant` of `day`, or build, cache and return it.
+
+    Only one caller rebuilds a cold entry, the others wait for its result for up to LOCK_TIMEOUT
+    and build it themselves after that.
+    """
+    key = ":".join([KEY_PREFIX, day.isoformat(), *get_versions([version_key(day), RELATED_VERSION_KEY]), variant])
+    data = cache.get(key)
+    if data is not None:
+        _count(HITS_KEY)
+        return data
+
+    lock_key = f"{key}:lock"
+    locked = cache.add(lock_key, 1, timeout=LOCK_TIMEOUT)
+    if not locked:
+        deadline = time.monotonic() + LOCK_TIMEOUT
+        while time.monotonic() < deadline:
+            time.sleep(LOCK_POLL_INTERVAL)
+            data = cache.get(key)
+            if data is not None:
+                _count(HITS_KEY)
+                return data
+
+    _count(MISSES_KEY)
+    try:
+        data = build()
+        cache.set(key, data, settings.APPOINTMENT_DAY_CACHE_TIMEOUT)
+    finally:
+        if locked:
+            cache.delete(lock_key)
+    return data
+
+
+class DayCacheMixin:
+    """
+    Serve `list` requests filtered by `date` from a per-day cache of their serialized data,
+    other actions can do the same through `get_day_response`.
+
+    Entries are keyed by the day's version and the request's path and query parameters, the signals in
+    `appointment.signals` bump the versions on writes.
+    """
+
+    day_query_param = "date"
+
+    def list(self, request, *args, **kwargs):
+        return self.get_day_response(request, lambda: super(DayCacheMixin, self).list(request, *args, **kwargs))
+
+    def get_day_response(self, request, render):
+        """
+        Return `render()`'s response, or a response with its data cached for the requested day.
+        """
+        day = self.get_cached_day()
+        if day is None:
+            return render()
+
+        variant = hashlib.md5(
+            repr((request.build_absolute_uri(request.path), sorted(request.query_params.lists()))).encode(),
+            usedforsecurity=False,
+        ).hexdigest()
+        return Response(get_or_build(day, variant, lambda: render().data))
+
+    def get_cached_day(self):
+        if settings.APPOINTMENT_DAY_CACHE_TIMEOUT <= 0:
+            return None
+        try:
+            return parse_date(self.request.query_params.get(self.day_query_param, ""))
+        except ValueError:
+            return None
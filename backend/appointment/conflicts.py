@@ -0,0 +1,179 @@
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import serializers
+
+from .models import OWNER_OVERLAP_CONSTRAINT, Appointment
+from .occurrences import make_occurrence
+from .recurrence import get_rule, iter_starts
+
+CONFLICTS_SQL = """
+WITH checks AS (
+    SELECT *
+    FROM unnest(%s::integer[], %s::bigint[], %s::timestamptz[], %s::timestamptz[], %s::bigint[])
+        AS c(check_index, employee_id, start_datetime, end_datetime, exclude_id)
+)
+SELECT a.*, c.check_index, c.employee_id AS conflicting_employee_id
+FROM checks c
+JOIN {appointment} a
+    ON a.employee_id = c.employee_id
+    AND a.time_range && tstzrange(c.start_datetime, c.end_datetime, '[)')
+    AND a.recurrence = ''
+WHERE a.id IS DISTINCT FROM c.exclude_id
+UNION
+SELECT a.*, c.check_index, c.employee_id
+FROM checks c
+JOIN {appointment} a
+    ON a.time_range && tstzrange(c.start_datetime, c.end_datetime, '[)')
+    AND a.recurrence = ''
+JOIN {participants} p
+    ON p.appointment_id = a.id
+    AND p.employee_id = c.employee_id
+WHERE a.id IS DISTINCT FROM c.exclude_id
+UNION
+SELECT a.*, c.check_index, c.employee_id
+FROM checks c
+JOIN {appointment} a
+    ON a.span && tstzrange(c.start_datetime, c.end_datetime, '[)')
+    AND a.recurrence <> ''
+WHERE a.id IS DISTINCT FROM c.exclude_id
+    AND (
+        a.employee_id = c.employee_id
+        OR EXISTS (SELECT 1 FROM {participants} p WHERE p.appointment_id = a.id AND p.employee_id = c.employee_id)
+    )
+ORDER BY check_index, start_datetime, id, conflicting_employee_id
+"""
+
+
+def find_conflicts(checks):
+    """
+    Return the appointments and series occurrences that overlap each check, in one query.
+
+    `checks` are (employee ids, start, end, appointment id to ignore or None) tuples. Every result is an
+    Appointment with `check_index` (position in `checks`) and `conflicting_employee_id` set; an appointment
+    conflicts when one of the employees owns or attends it. Owners are found through the exclusion
+    constraint's (employee, time_range) GiST index, participants through the time_range GiST index and the
+    through table's (appointment, employee) unique index, so the cost follows the window, not the history.
+    Recurring appointments are found through the `span` GiST index and replaced by their overlapping
+    occurrences, which costs one more query for their overrides.
+    """
+    rows = [
+        (index, employee_id, start, end, exclude_id)
+        for index, (employee_ids, start, end, exclude_id) in enumerate(checks)
+        for employee_id in dict.fromkeys(employee_ids)
+        if employee_id is not None
+    ]
+    if not rows:
+        return []
+
+    sql = CONFLICTS_SQL.format(
+        appointment=Appointment._meta.db_table, participants=Appointment.participants.through._meta.db_table
+    )
+    conflicts = list(Appointment.objects.raw(sql, [list(column) for column in zip(*rows)]))
+    if any(conflict.recurrence for conflict in conflicts):
+        conflicts = _expand_series(conflicts, checks)
+    return conflicts
+
+
+def _expand_series(conflicts, checks):
+    series = {conflict.pk for conflict in conflicts if conflict.recurrence}
+    overridden = set(Appointment.objects.filter(series__in=series).values_list("series_id", "recurrence_id"))
+
+    expanded = []
+    for conflict in conflicts:
+        if not conflict.recurrence:
+            expanded.append(conflict)
+            continue
+        _, start, end, _ = checks[conflict.check_index]
+        duration = conflict.end_datetime - conflict.start_datetime
+        rules = get_rule(conflict.recurrence, conflict.start_datetime, conflict.recurrence_exceptions)
+        for occurrence_start in iter_starts(rules, duration, start, end):
+            if (conflict.pk, occurrence_start) not in overridden:
+                expanded.append(make_occurrence(conflict, occurrence_start, occurrence_start + duration))
+    return sorted(
+        expanded,
+        key=lambda conflict: (
+            conflict.check_index,
+            conflict.start_datetime,
+            conflict.pk,
+            conflict.conflicting_employee_id,
+        ),
+    )
+
+
+def get_series_checks(employee_ids, recurrence, start, end, exceptions=(), exclude_id=None, overridden=()):
+    """
+    Return a `find_conflicts` check for each occurrence of a series, leaving out the `overridden` starts.
+
+    Only the occurrences up to APPOINTMENT_MATERIALIZE_DAYS days after today, or after the series' start
+    when that is later, are checked, so series without an end stay bounded.
+    """
+    duration = end - start
+    upper = max(start, timezone.now()) + timedelta(days=settings.APPOINTMENT_MATERIALIZE_DAYS)
+    rules = get_rule(recurrence, start, exceptions)
+    return [
+        (employee_ids, occurrence_start, occurrence_start + duration, exclude_id)
+        for occurrence_start in iter_starts(rules, duration, start, upper)
+        if occurrence_start not in overridden
+    ]
+
+
+def find_overlaps(checks):
+    """
+    Return (index, other index, employee id) for the checks that overlap another check of the same employee.
+
+    `checks` are (employee ids, start, end) tuples, compared among themselves with one sort per employee.
+    """
+    bookings = defaultdict(list)
+    for index, (employee_ids, start, end) in enumerate(checks):
+        for employee_id in dict.fromkeys(employee_ids):
+            if employee_id is not None:
+                bookings[employee_id].append((start, end, index))
+
+    overlaps = []
+    for employee_id, ranges in bookings.items():
+        ranges.sort()
+        latest_end, latest_index = None, None
+        for start, end, index in ranges:
+            if latest_end is not None and start < latest_end:
+                overlaps.append((index, latest_index, employee_id))
+            if latest_end is None or end > latest_end:
+                latest_end, latest_index = end, index
+    return overlaps
+
+
+def describe(conflict):
+    start, end = timezone.localtime(conflict.start_datetime), timezone.localtime(conflict.end_datetime)
+    return (
+        f"Employee {conflict.conflicting_employee_id} is already booked in appointment {conflict.pk} "
+        f'"{conflict.title}" ({start:%Y-%m-%d %H:%M} - {end:%Y-%m-%d %H:%M}).'
+    )
+
+
+def conflict_errors(conflicts, owner_id):
+    """
+    Return serializer errors for `conflicts`, under `employee` for the owner and `participants` for the rest.
+    """
+    errors = {}
+    for conflict in conflicts:
+        field = "employee" if conflict.conflicting_employee_id == owner_id else "participants"
+        errors.setdefault(field, []).append(describe(conflict))
+    return errors
+
+
+@contextmanager
+def translate_overlap_error():
+    """
+    Turn a concurrent write that trips the owner exclusion constraint into a validation error.
+    """
+    try:
+        with transaction.atomic():
+            yield
+    except IntegrityError as exc:
+        if OWNER_OVERLAP_CONSTRAINT not in str(exc):
+            raise
+        raise serializers.ValidationError({"employee": ["The employee is already booked at this time."]}) from exc
@@ -0,0 +1,65 @@
+from collections import defaultdict
+
+from core.events import get_broker
+
+from .cache import spanned_days
+from .models import Appointment
+
+# Past this many employees, or days, an event is sent to every stream, or for every day, keeping NOTIFY
+# payloads small
+MAX_EVENT_EMPLOYEES = 100
+MAX_EVENT_DAYS = 100
+
+
+def publish(action, changes):
+    """
+    Publish an `appointment.<action>` event for each (appointment id, ranges, employee ids) of `changes`
+    once the transaction commits.
+
+    Events name the days the `ranges` span, the appointment's rows before and after the change, and the
+    employees it concerns, so streams can be filtered on them. Clients refetch what they show. `ranges` is
+    None for series and their overrides, whose occurrences are on days their rows do not tell, and their
+    events reach every day, as do those of appointments spanning more than MAX_EVENT_DAYS days.
+    """
+    messages = []
+    for pk, ranges, employees in changes:
+        employees = sorted({employee for employee in employees if employee is not None})
+        days = None
+        if ranges is not None:
+            days = sorted({day.isoformat() for start, end in ranges for day in spanned_days(start, end)})
+        messages.append(
+            {
+                "type": f"appointment.{action}",
+                "id": pk,
+                "days": days if days is None or len(days) <= MAX_EVENT_DAYS else None,
+                "employees": employees if len(employees) <= MAX_EVENT_EMPLOYEES else None,
+            }
+        )
+    get_broker().publish(messages)
+
+
+def participant_ids(appointment_ids):
+    """
+    Return the participant ids of each of `appointment_ids`.
+    """
+    participants = defaultdict(set)
+    for appointment_id, employee_id in Appointment.participants.through.objects.filter(
+        appointment_id__in=appointment_ids
+    ).values_list("appointment_id", "employee_id"):
+        participants[appointment_id].add(employee_id)
+    return participants
+
+
+def matches(day=None, employees=()):
+    """
+    Return a filter accepting the events of `day` that concern any of `employees`, either one optional.
+    """
+    day = day and day.isoformat()
+    employees = set(employees)
+
+    def match(message):
+        if day is not None and message["days"] is not None and day not in message["days"]:
+            return False
+        return not employees or message["employees"] is None or not employees.isdisjoint(message["employees"])
+
+    return match
@@ -1,20 +1,68 @@
-from datetime import datetime, time
+from datetime import datetime, time, timedelta
 
 import django_filters
+from django.db.backends.postgresql.psycopg_any import DateTimeTZRange
 from django.utils import timezone
+from django_filters.utils import translate_validation
+from rest_framework.exceptions import ValidationError
 
 from .models import Appointment
 
 
+def day_bounds(day):
+    """
+    Return the start of `day` and of the next day in the current timezone.
+    """
+    start_of_day = timezone.make_aware(datetime.combine(day, time.min))
+    start_of_next_day = timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+    return start_of_day, start_of_next_day
+
+
 class AppointmentFilter(django_filters.FilterSet):
     date = django_filters.DateFilter(method="filter_by_date")
+    start = django_filters.IsoDateTimeFilter(method="filter_by_start")
+    end = django_filters.IsoDateTimeFilter(method="filter_by_end")
 
     class Meta:
         model = Appointment
-        fields = ["date"]
+        fields = ["date", "start", "end"]
+
+    # `span` also matches recurring appointments with an occurrence in the range, the views expand them
 
     def filter_by_date(self, queryset, name, value):
-        start_of_day = timezone.make_aware(datetime.combine(value, time.min))
-        end_of_day = timezone.make_aware(datetime.combine(value, time.max))
+        return queryset.filter(span__overlap=DateTimeTZRange(*day_bounds(value)))
+
+    def filter_by_start(self, queryset, name, value):
+        return queryset.filter(span__overlap=DateTimeTZRange(value, None))
+
+    def filter_by_end(self, queryset, name, value):
+        return queryset.filter(span__overlap=DateTimeTZRange(None, value))
+
+
+def get_window(data):
+    """
+    Return the (lower, upper) range the AppointmentFilter query parameters in `data` read, None for open sides.
+    """
+    form = AppointmentFilter(data, queryset=Appointment.objects.none()).form
+    if not form.is_valid():
+        return None, None
+
+    lower, upper = form.cleaned_data.get("start"), form.cleaned_data.get("end")
+    if day := form.cleaned_data.get("date"):
+        day_start, day_end = day_bounds(day)
+        lower = day_start if lower is None else max(lower, day_start)
+        upper = day_end if upper is None else min(upper, day_end)
+    return lower, upper
+
 
-        return queryset.filter(start_datetime__lte=end_of_day, end_datetime__gte=start_of_day)
+def get_bounded_window(data):
+    """
+    Return `get_window(data)`, requiring a `date`, or a `start` and an `end`, and raising ValidationError for
+    invalid values.
+    """
+    if "date" not in data and not ("start" in data and "end" in data):
+        raise ValidationError({"date": ["Pass a date, or a start and an end."]})
+    form = AppointmentFilter(data, queryset=Appointment.objects.none()).form
+    if not form.is_valid():
+        raise translate_validation(form.errors)
+    return get_window(data)
@@ -0,0 +1,46 @@
+import heapq
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class Slot:
+    """
+    Where an appointment goes in a day view: its overlap group, its column and the group's column count.
+    """
+
+    group: int
+    column: int
+    columns: int
+
+
+def compute_layout(items):
+    """
+    Return a Slot for each (key, start, end) in `items`, keyed by `key`. Items must end after they start.
+
+    Two items overlap when each starts before the other ends, so back to back items do not. Groups are the
+    connected runs of overlapping items, numbered in start order. Each item takes the lowest column that is
+    free at its start, and a group has as many columns as it has items running at once at its busiest.
+    Runs in O(n log n): one sort, then a sweep that keeps the running items' ends in a heap.
+    """
+    slots = {}
+    group, group_end, members = -1, None, []
+    running, free_columns, columns = [], [], 0
+
+    for key, start, end in sorted(items, key=lambda item: (item[1], item[2])):
+        if group_end is None or start >= group_end:
+            slots.update((member, Slot(group, column, columns)) for member, column in members)
+            group, group_end, members = group + 1, end, []
+            running, free_columns, columns = [], [], 0
+        group_end = max(group_end, end)
+
+        while running and running[0][0] <= start:
+            heapq.heappush(free_columns, heapq.heappop(running)[1])
+        if free_columns:
+            column = heapq.heappop(free_columns)
+        else:
+            column, columns = columns, columns + 1
+        heapq.heappush(running, (end, column))
+        members.append((key, column))
+
+    slots.update((member, Slot(group, column, columns)) for member, column in members)
+    return slots
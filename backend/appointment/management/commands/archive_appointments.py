@@ -0,0 +1,45 @@
+from datetime import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from appointment import archive
+from appointment.models import ArchivedMonth
+
+
+def month(value):
+    return datetime.strptime(value, "%Y-%m").date()
+
+
+class Command(BaseCommand):
+    help = (
+        "Move appointments that ended before the last --months whole months (UTC) into the archive, a table "
+        "partitioned by start month that /appointments/archived/ reads. Run it monthly. --export then writes "
+        "the archived months to gzipped files and drops their partitions, --restore loads one back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--months", type=int, default=settings.APPOINTMENT_ARCHIVE_MONTHS)
+        parser.add_argument("--export", metavar="DIRECTORY", help="Where to write the archived months.")
+        parser.add_argument("--restore", type=month, metavar="YYYY-MM", help="Exported month to load back.")
+
+    def handle(self, *args, months, export=None, restore=None, **options):
+        if restore:
+            try:
+                archive.restore(restore)
+            except ArchivedMonth.DoesNotExist as error:
+                raise CommandError(f"{restore:%Y-%m} was not exported.") from error
+            self.stdout.write(f"Restored {restore:%Y-%m}.")
+            return
+
+        cutoff, _ = archive.month_bounds(archive.add_months(archive.month_of(timezone.now()), -months))
+        moved = archive.archive(cutoff)
+        self.stdout.write(
+            f"Archived {sum(moved.values())} appointments of {len(moved)} months, before {cutoff:%Y-%m-%d}."
+        )
+
+        if export:
+            for archived in ArchivedMonth.objects.filter(file=""):
+                path = archive.export(archived.month, export)
+                self.stdout.write(f"Exported {archived.month:%Y-%m} to {path}.")
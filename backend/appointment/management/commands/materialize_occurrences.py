@@ -0,0 +1,29 @@
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.backends.postgresql.psycopg_any import DateTimeTZRange
+from django.utils import timezone
+
+from appointment.filters import day_bounds
+from appointment.models import Appointment
+from appointment.occurrences import materialize
+
+
+class Command(BaseCommand):
+    help = (
+        "Precompute the occurrences of recurring appointments for the coming days, so reads of that window "
+        "skip expanding their rules. Run it daily, series edited since are expanded on the fly until the next run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start", type=date.fromisoformat, help="First day, today by default.")
+        parser.add_argument("--days", type=int, default=settings.APPOINTMENT_MATERIALIZE_DAYS)
+
+    def handle(self, *args, start=None, days, **options):
+        start = start or timezone.localdate()
+        lower, upper = day_bounds(start)[0], day_bounds(start + timedelta(days=days))[0]
+
+        series = Appointment.objects.exclude(recurrence="").filter(span__overlap=DateTimeTZRange(lower, upper))
+        materialized = sum(materialize(appointment, lower, upper) for appointment in series.iterator())
+        self.stdout.write(f"Materialized {materialized} series from {lower:%Y-%m-%d} to {upper:%Y-%m-%d}.")
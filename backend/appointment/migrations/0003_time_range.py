@@ -0,0 +1,30 @@
+# Generated by Django 5.2 on 2026-10-18 12:25
+
+import appointment.models
+import django.contrib.postgres.fields.ranges
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("appointment", "0002_initial"),
+        ("employee", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="appointment",
+            name="time_range",
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=appointment.models.TsTzRange("start_datetime", "end_datetime", models.Value("[)")),
+                output_field=django.contrib.postgres.fields.ranges.DateTimeRangeField(),
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="appointment",
+            index=django.contrib.postgres.indexes.GistIndex(fields=["time_range"], name="appointment_time_range_gist"),
+        ),
+    ]
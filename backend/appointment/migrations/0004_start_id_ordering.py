@@ -0,0 +1,22 @@
+# Generated by Django 5.2 on 2026-10-18 12:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("appointment", "0003_time_range"),
+        ("employee", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="appointment",
+            options={"ordering": ["start_datetime", "id"]},
+        ),
+        migrations.AddIndex(
+            model_name="appointment",
+            index=models.Index(fields=["start_datetime", "id"], name="appointment_start_id_idx"),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 12:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("appointment", "0004_start_id_ordering"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="appointment",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+    ]
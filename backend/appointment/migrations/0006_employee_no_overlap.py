@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-18 12:44
+
+import django.contrib.postgres.constraints
+from django.contrib.postgres.operations import BtreeGistExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("appointment", "0005_updated_at_index"),
+        ("employee", "0002_employee_updated_at"),
+    ]
+
+    operations = [
+        BtreeGistExtension(),
+        migrations.AddConstraint(
+            model_name="appointment",
+            constraint=django.contrib.postgres.constraints.ExclusionConstraint(
+                expressions=[("employee", "="), ("time_range", "&&")], name="appointment_employee_no_overlap"
+            ),
+        ),
+    ]
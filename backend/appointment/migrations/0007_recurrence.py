@@ -0,0 +1,139 @@
+# Generated by Django 5.2 on 2026-10-18 12:57
+
+import appointment.models
+import django.contrib.postgres.constraints
+import django.contrib.postgres.fields
+import django.contrib.postgres.fields.ranges
+import django.contrib.postgres.indexes
+import django.db.models.deletion
+import django.db.models.lookups
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("appointment", "0006_employee_no_overlap"),
+        ("employee", "0002_employee_updated_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Occurrence",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("start_datetime", models.DateTimeField()),
+                ("end_datetime", models.DateTimeField()),
+                (
+                    "time_range",
+                    models.GeneratedField(
+                        db_persist=True,
+                        expression=appointment.models.TsTzRange("start_datetime", "end_datetime", models.Value("[)")),
+                        output_field=django.contrib.postgres.fields.ranges.DateTimeRangeField(),
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["start_datetime", "series"],
+            },
+        ),
+        migrations.RemoveConstraint(
+            model_name="appointment",
+            name="appointment_employee_no_overlap",
+        ),
+        migrations.AddField(
+            model_name="appointment",
+            name="materialized_range",
+            field=django.contrib.postgres.fields.ranges.DateTimeRangeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="appointment",
+            name="recurrence",
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name="appointment",
+            name="recurrence_end",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="appointment",
+            name="recurrence_exceptions",
+            field=django.contrib.postgres.fields.ArrayField(
+                base_field=models.DateTimeField(), blank=True, default=list, size=None
+            ),
+        ),
+        migrations.AddField(
+            model_name="appointment",
+            name="recurrence_id",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="appointment",
+            name="series",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="overrides",
+                to="appointment.appointment",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="appointment",
+            constraint=django.contrib.postgres.constraints.ExclusionConstraint(
+                condition=models.Q(("recurrence", "")),
+                expressions=[("employee", "="), ("time_range", "&&")],
+                name="appointment_employee_no_overlap",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="appointment",
+            constraint=models.UniqueConstraint(fields=("series", "recurrence_id"), name="appointment_unique_override"),
+        ),
+        migrations.AddConstraint(
+            model_name="appointment",
+            constraint=models.CheckConstraint(
+                condition=models.Q(
+                    models.Q(("recurrence_id__isnull", True), ("series__isnull", True)),
+                    models.Q(("recurrence", ""), ("recurrence_id__isnull", False), ("series__isnull", False)),
+                    _connector="OR",
+                ),
+                name="appointment_override_of_occurrence",
+            ),
+        ),
+        migrations.AddField(
+            model_name="occurrence",
+            name="series",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE, related_name="occurrences", to="appointment.appointment"
+            ),
+        ),
+        migrations.AddField(
+            model_name="appointment",
+            name="span",
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=models.Case(
+                    models.When(
+                        django.db.models.lookups.Exact(models.F("recurrence"), models.Value("")),
+                        then=appointment.models.TsTzRange("start_datetime", "end_datetime", models.Value("[)")),
+                    ),
+                    default=appointment.models.TsTzRange("start_datetime", "recurrence_end", models.Value("[)")),
+                ),
+                output_field=django.contrib.postgres.fields.ranges.DateTimeRangeField(),
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="appointment",
+            index=django.contrib.postgres.indexes.GistIndex(fields=["span"], name="appointment_span_gist"),
+        ),
+        migrations.AddIndex(
+            model_name="occurrence",
+            index=django.contrib.postgres.indexes.GistIndex(fields=["time_range"], name="occurrence_time_range_gist"),
+        ),
+        migrations.AddConstraint(
+            model_name="occurrence",
+            constraint=models.UniqueConstraint(fields=("series", "start_datetime"), name="occurrence_unique_start"),
+        ),
+    ]
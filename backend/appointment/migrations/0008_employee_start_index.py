@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 13:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("appointment", "0007_recurrence"),
+        ("employee", "0003_search_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="appointment",
+            index=models.Index(fields=["employee", "start_datetime", "id"], name="appointment_employee_start_idx"),
+        ),
+    ]
@@ -0,0 +1,111 @@
+# Generated by Django 5.2 on 2026-10-18 14:15
+
+import appointment.models
+import datetime
+import django.contrib.postgres.fields
+import django.contrib.postgres.fields.ranges
+import django.db.models.lookups
+from django.db import migrations, models
+
+# Partitioned by start month, appointment.archive creates the partitions. Unique indexes of a partitioned
+# table must hold its partition key, hence the primary key.
+ARCHIVE_TABLE_SQL = """
+CREATE TABLE appointment_archivedappointment (
+    id bigint NOT NULL,
+    start_datetime timestamp with time zone NOT NULL,
+    end_datetime timestamp with time zone NOT NULL,
+    recurrence text NOT NULL,
+    recurrence_exceptions timestamp with time zone[] NOT NULL,
+    recurrence_end timestamp with time zone,
+    series_id bigint,
+    recurrence_id timestamp with time zone,
+    span tstzrange GENERATED ALWAYS AS (
+        CASE WHEN recurrence = '' THEN tstzrange(start_datetime, end_datetime, '[)')
+        ELSE tstzrange(start_datetime, recurrence_end, '[)') END
+    ) STORED,
+    title varchar(255) NOT NULL,
+    description text NOT NULL,
+    employee_id bigint,
+    participant_ids bigint[] NOT NULL,
+    created_at timestamp with time zone,
+    updated_at timestamp with time zone NOT NULL,
+    archived_at timestamp with time zone NOT NULL,
+    PRIMARY KEY (id, start_datetime)
+) PARTITION BY RANGE (start_datetime);
+CREATE INDEX appointment_archived_employee_start_idx ON appointment_archivedappointment (employee_id, start_datetime);
+CREATE INDEX appointment_archived_span_gist ON appointment_archivedappointment USING gist (span);
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("appointment", "0009_sync"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchivedAppointment",
+            fields=[
+                ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                ("start_datetime", models.DateTimeField()),
+                ("end_datetime", models.DateTimeField()),
+                ("recurrence", models.TextField(blank=True)),
+                (
+                    "recurrence_exceptions",
+                    django.contrib.postgres.fields.ArrayField(
+                        base_field=models.DateTimeField(), blank=True, default=list, size=None
+                    ),
+                ),
+                ("recurrence_end", models.DateTimeField(blank=True, null=True)),
+                ("series", models.BigIntegerField(blank=True, db_column="series_id", null=True)),
+                ("recurrence_id", models.DateTimeField(blank=True, null=True)),
+                (
+                    "span",
+                    models.GeneratedField(
+                        db_persist=True,
+                        expression=models.Case(
+                            models.When(
+                                django.db.models.lookups.Exact(models.F("recurrence"), models.Value("")),
+                                then=appointment.models.TsTzRange("start_datetime", "end_datetime", models.Value("[)")),
+                            ),
+                            default=appointment.models.TsTzRange(
+                                "start_datetime", "recurrence_end", models.Value("[)")
+                            ),
+                        ),
+                        output_field=django.contrib.postgres.fields.ranges.DateTimeRangeField(),
+                    ),
+                ),
+                ("title", models.CharField(max_length=255)),
+                ("description", models.TextField(blank=True)),
+                (
+                    "participant_ids",
+                    django.contrib.postgres.fields.ArrayField(
+                        base_field=models.BigIntegerField(), blank=True, default=list, size=None
+                    ),
+                ),
+                ("created_at", models.DateTimeField(null=True)),
+                ("updated_at", models.DateTimeField()),
+                ("archived_at", models.DateTimeField()),
+            ],
+            options={
+                "ordering": ["start_datetime", "id"],
+                "managed": False,
+            },
+        ),
+        migrations.CreateModel(
+            name="ArchivedMonth",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("month", models.DateField(unique=True)),
+                ("appointments", models.PositiveIntegerField(default=0)),
+                ("longest", models.DurationField(default=datetime.timedelta)),
+                ("file", models.CharField(blank=True, max_length=500)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "ordering": ["month"],
+            },
+        ),
+        migrations.RunSQL(ARCHIVE_TABLE_SQL, "DROP TABLE appointment_archivedappointment"),
+    ]
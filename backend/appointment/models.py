@@ -1,11 +1,55 @@
+from datetime import timedelta
+
+from django.contrib.postgres.constraints import ExclusionConstraint
+from django.contrib.postgres.fields import ArrayField, DateTimeRangeField, RangeOperators
+from django.contrib.postgres.indexes import GistIndex
 from django.db import models
+from django.db.models.lookups import Exact
 
 from employee.models import Employee
 
+from .recurrence import get_series_end
+
+OWNER_OVERLAP_CONSTRAINT = "appointment_employee_no_overlap"
+
+
+class TsTzRange(models.Func):
+    function = "TSTZRANGE"
+    output_field = DateTimeRangeField()
+
 
 class Appointment(models.Model):
     start_datetime = models.DateTimeField()
     end_datetime = models.DateTimeField()
+    time_range = models.GeneratedField(
+        expression=TsTzRange("start_datetime", "end_datetime", models.Value("[)")),
+        output_field=DateTimeRangeField(),
+        db_persist=True,
+    )
+    # RRULE repeating the appointment, its start and end are the first occurrence's
+    recurrence = models.TextField(blank=True)
+    # Starts of the cancelled occurrences
+    recurrence_exceptions = ArrayField(models.DateTimeField(), default=list, blank=True)
+    # End of the last occurrence, null for series without an end
+    recurrence_end = models.DateTimeField(null=True, blank=True, editable=False)
+    # Overrides are appointments replacing the occurrence of `series` that started at `recurrence_id`
+    series = models.ForeignKey("self", on_delete=models.CASCADE, related_name="overrides", null=True, blank=True)
+    recurrence_id = models.DateTimeField(null=True, blank=True)
+    # Everything the row can show up in: the appointment, or the whole series
+    span = models.GeneratedField(
+        expression=models.Case(
+            # A lookup rather than a Q, Q conditions break constraint validation of generated fields
+            models.When(
+                Exact(models.F("recurrence"), models.Value("")),
+                then=TsTzRange("start_datetime", "end_datetime", models.Value("[)")),
+            ),
+            default=TsTzRange("start_datetime", "recurrence_end", models.Value("[)")),
+        ),
+        output_field=DateTimeRangeField(),
+        db_persist=True,
+    )
+    # Occurrence starts copied to the Occurrence table, see materialize_occurrences
+    materialized_range = DateTimeRangeField(null=True, blank=True, editable=False)
     title = models.CharField(max_length=255)
     description = models.TextField(blank=True)
     employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name="appointments", null=True)
@@ -16,8 +60,129 @@ class Appointment(models.Model):
     def __str__(self):
         return f"{self.title} ({self.start_datetime} - {self.end_datetime})"
 
+    def save(self, *args, **kwargs):
+        if self.recurrence:
+            self.recurrence_end = get_series_end(self.recurrence, self.start_datetime, self.end_datetime)
+            self.materialized_range = None
+        else:
+            self.recurrence_end = None
+        super().save(*args, **kwargs)
+
+    def validate_constraints(self, exclude=None):
+        # Postgres cannot build time_range from an inverted range, end_after_start reports it instead
+        if self.start_datetime and self.end_datetime and self.end_datetime < self.start_datetime:
+            exclude = {*(exclude or ()), "time_range"}
+        super().validate_constraints(exclude)
+
+    class Meta:
+        ordering = ["start_datetime", "id"]
+        constraints = [
+            models.CheckConstraint(check=models.Q(end_datetime__gt=models.F("start_datetime")), name="end_after_start"),
+            # Its GiST index also serves the owner half of appointment.conflicts. Series only book their
+            # first occurrence here, so they are left to the conflict checks.
+            ExclusionConstraint(
+                name=OWNER_OVERLAP_CONSTRAINT,
+                expressions=[("employee", RangeOperators.EQUAL), ("time_range", RangeOperators.OVERLAPS)],
+                condition=models.Q(recurrence=""),
+            ),
+            models.UniqueConstraint(fields=["series", "recurrence_id"], name="appointment_unique_override"),
+            models.CheckConstraint(
+                check=models.Q(series__isnull=True, recurrence_id__isnull=True)
+                | models.Q(series__isnull=False, recurrence_id__isnull=False, recurrence=""),
+                name="appointment_override_of_occurrence",
+            ),
+        ]
+        indexes = [
+            GistIndex(fields=["time_range"], name="appointment_time_range_gist"),
+            GistIndex(fields=["span"], name="appointment_span_gist"),
+            models.Index(fields=["start_datetime", "id"], name="appointment_start_id_idx"),
+            # Next appointment of an employee, see appointment.upcoming
+            models.Index(fields=["employee", "start_datetime", "id"], name="appointment_employee_start_idx"),
+            # Delta sync, see core.sync.DeltaSyncMixin
+            models.Index(fields=["updated_at", "id"], name="appointment_updated_id_idx"),
+        ]
+
+
+class Occurrence(models.Model):
+    """
+    A precomputed occurrence of a recurring Appointment, for windows read often enough to skip expanding rules.
+    """
+
+    series = models.ForeignKey(Appointment, on_delete=models.CASCADE, related_name="occurrences")
+    start_datetime = models.DateTimeField()
+    end_datetime = models.DateTimeField()
+    time_range = models.GeneratedField(
+        expression=TsTzRange("start_datetime", "end_datetime", models.Value("[)")),
+        output_field=DateTimeRangeField(),
+        db_persist=True,
+    )
+
     class Meta:
-        ordering = ["start_datetime"]
+        ordering = ["start_datetime", "series"]
         constraints = [
-            models.CheckConstraint(check=models.Q(end_datetime__gt=models.F("start_datetime")), name="end_after_start")
+            models.UniqueConstraint(fields=["series", "start_datetime"], name="occurrence_unique_start"),
         ]
+        indexes = [
+            GistIndex(fields=["time_range"], name="occurrence_time_range_gist"),
+        ]
+
+
+class ArchivedAppointment(models.Model):
+    """
+    An Appointment `archive_appointments` moved out of the live table, with the ids of its participants.
+
+    The table is partitioned by the month of `start_datetime` in UTC, see appointment.archive. Its primary
+    key is (id, start_datetime) and it has no foreign keys, archived employees and series may be gone.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    start_datetime = models.DateTimeField()
+    end_datetime = models.DateTimeField()
+    recurrence = models.TextField(blank=True)
+    recurrence_exceptions = ArrayField(models.DateTimeField(), default=list, blank=True)
+    recurrence_end = models.DateTimeField(null=True, blank=True)
+    series = models.BigIntegerField(null=True, blank=True, db_column="series_id")
+    recurrence_id = models.DateTimeField(null=True, blank=True)
+    # The appointment, or the whole series, like Appointment.span
+    span = models.GeneratedField(
+        expression=models.Case(
+            models.When(
+                Exact(models.F("recurrence"), models.Value("")),
+                then=TsTzRange("start_datetime", "end_datetime", models.Value("[)")),
+            ),
+            default=TsTzRange("start_datetime", "recurrence_end", models.Value("[)")),
+        ),
+        output_field=DateTimeRangeField(),
+        db_persist=True,
+    )
+    title = models.CharField(max_length=255)
+    description = models.TextField(blank=True)
+    employee = models.ForeignKey(
+        Employee, on_delete=models.DO_NOTHING, db_constraint=False, null=True, related_name="+"
+    )
+    participant_ids = ArrayField(models.BigIntegerField(), default=list, blank=True)
+    created_at = models.DateTimeField(null=True)
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField()
+
+    class Meta:
+        # Partitioned tables are created with SQL, see migration 0010_archive
+        managed = False
+        ordering = ["start_datetime", "id"]
+
+
+class ArchivedMonth(models.Model):
+    """
+    A month of ArchivedAppointment rows, by start in UTC, in the table or exported to `file`.
+    """
+
+    month = models.DateField(unique=True)
+    appointments = models.PositiveIntegerField(default=0)
+    # Longest span of its rows, how far before a window reads look for rows overlapping it
+    longest = models.DurationField(default=timedelta)
+    # Where `archive_appointments --export` wrote the month, empty while its partition is in the database
+    file = models.CharField(max_length=500, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["month"]
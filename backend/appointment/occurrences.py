@@ -0,0 +1,169 @@
+import copy
+import heapq
+from collections import defaultdict
+from datetime import timedelta
+from itertools import islice
+
+from django.contrib.postgres.expressions import ArraySubquery
+from django.db import transaction
+from django.db.backends.postgresql.psycopg_any import DateTimeTZRange
+from django.db.models import OuterRef
+
+from core.pagination import seek
+
+from .models import Appointment, Occurrence
+from .recurrence import get_rule, iter_starts
+
+SERIES_COLUMNS = ("pk", "start_datetime", "end_datetime", "recurrence", "recurrence_exceptions", "materialized_range")
+
+
+def split_series(queryset):
+    """
+    Return the single appointments and the recurring ones in `queryset`.
+    """
+    return queryset.filter(recurrence=""), queryset.exclude(recurrence="")
+
+
+def expand(series, window=(None, None), position=None, reverse=False, limit=None):
+    """
+    Return the occurrences of the recurring appointments in `series` that overlap `window`, in (start, id) order.
+
+    Each occurrence is a copy of its series' row, an instance or a `values()` dict like `series` yields, with
+    the occurrence's start and end and `recurrence_id` set. `window` is a (lower, upper) pair, None leaves a
+    side open. With `position` only occurrences from that (start, id) on are returned (up to it when
+    `reverse`), and at most `limit` of them, so series without an end are only expanded as far as needed.
+    Series whose materialized range covers the window are read from the Occurrence table instead.
+
+    Costs one query when there are no series, two when there are and one more for materialized ones.
+    """
+    streams, overridden = _streams(series, window, position, reverse, limit)
+    keys = heapq.merge(*streams, key=lambda key: key[:2], reverse=reverse)
+    keys = list(islice((key for key in keys if key[0] not in overridden[key[1]]), limit))
+    return _load(series, keys)
+
+
+def first_occurrences(series, window=(None, None)):
+    """
+    Return the first occurrence of each recurring appointment in `series` that overlaps `window`, in (start, id)
+    order, as `expand` returns them. Each series is only expanded up to its first occurrence.
+
+    Costs the same queries as `expand`.
+    """
+    streams, overridden = _streams(series, window)
+    keys = [next((key for key in stream if key[0] not in overridden[key[1]]), None) for stream in streams]
+    return _load(series, sorted(key for key in keys if key is not None))
+
+
+def _streams(series, window, position=None, reverse=False, limit=None):
+    # One stream of (start, id, end) keys per series, in order, and the overridden starts of each series
+    rows = list(
+        series.prefetch_related(None).values_list(
+            *SERIES_COLUMNS,
+            ArraySubquery(Appointment.objects.filter(series=OuterRef("pk")).values("recurrence_id")),
+        )
+    )
+    lower, upper = window
+    streams, materialized, overridden = [], [], {}
+    for pk, start, end, recurrence, exceptions, materialized_range, overrides in rows:
+        overridden[pk] = set(overrides)
+        duration = end - start
+        if _covers(materialized_range, lower, upper, duration):
+            materialized.append(pk)
+        else:
+            rules = get_rule(recurrence, start, exceptions)
+            streams.append(_stream(pk, rules, duration, lower, upper, position, reverse))
+    if materialized:
+        # Overridden occurrences are only dropped after the merge, read enough rows to make up for them
+        extra = sum(len(overridden[pk]) for pk in materialized)
+        by_series = defaultdict(list)
+        for key in _materialized(materialized, lower, upper, position, reverse, limit and limit + extra):
+            by_series[key[1]].append(key)
+        streams.extend(by_series.values())
+    return streams, overridden
+
+
+def _load(series, keys):
+    if not keys:
+        return []
+    # Only the series of `keys` are loaded in full
+    loaded = {_pk(item): item for item in series.filter(pk__in={pk for _, pk, _ in keys})}
+    return [make_occurrence(loaded[pk], start, end) for start, pk, end in keys]
+
+
+def iter_window(series, window, step=timedelta(days=7)):
+    """
+    Yield the occurrences `expand` returns for the bounded `window`, expanding it `step` at a time so only
+    one step's occurrences are held in memory.
+    """
+    lower, upper = window
+    step_lower = lower
+    while step_lower < upper:
+        step_upper = min(step_lower + step, upper)
+        for occurrence in expand(series, (step_lower, step_upper)):
+            # Occurrences spanning several steps come with the first one
+            if step_lower == lower or _start(occurrence) >= step_lower:
+                yield occurrence
+        step_lower = step_upper
+
+
+def materialize(series, lower, upper):
+    """
+    Replace the Occurrence rows of the recurring appointment `series` with its occurrences overlapping [lower, upper).
+
+    The series only reads them once its materialized range is set, which an edit made in the meantime prevents.
+    """
+    duration = series.end_datetime - series.start_datetime
+    rules = get_rule(series.recurrence, series.start_datetime, series.recurrence_exceptions)
+    with transaction.atomic():
+        Occurrence.objects.filter(series=series).delete()
+        Occurrence.objects.bulk_create(
+            Occurrence(series=series, start_datetime=start, end_datetime=start + duration)
+            for start in iter_starts(rules, duration, lower, upper)
+        )
+        # Occurrences starting after lower - duration overlap the window and are now all there
+        return Appointment.objects.filter(pk=series.pk, updated_at=series.updated_at).update(
+            materialized_range=DateTimeTZRange(lower - duration, upper)
+        )
+
+
+def _covers(materialized_range, lower, upper, duration):
+    if materialized_range is None or lower is None or upper is None:
+        return False
+    return (materialized_range.lower is None or materialized_range.lower <= lower - duration) and (
+        materialized_range.upper is None or upper <= materialized_range.upper
+    )
+
+
+def _stream(pk, rules, duration, lower, upper, position, reverse):
+    for start in iter_starts(rules, duration, lower, upper, position and position[0], reverse):
+        if position and start == position[0] and (pk <= position[1] if not reverse else pk >= position[1]):
+            continue
+        yield start, pk, start + duration
+
+
+def _materialized(pks, lower, upper, position, reverse, limit):
+    occurrences = Occurrence.objects.filter(series_id__in=list(pks), time_range__overlap=DateTimeTZRange(lower, upper))
+    if position:
+        occurrences = occurrences.filter(seek(("start_datetime", "series_id"), position, reverse))
+    order = ["-start_datetime", "-series_id"] if reverse else ["start_datetime", "series_id"]
+    occurrences = occurrences.order_by(*order).values_list("start_datetime", "series_id", "end_datetime")
+    return list(occurrences if limit is None else occurrences[:limit])
+
+
+def _pk(item):
+    return item["pk"] if isinstance(item, dict) else item.pk
+
+
+def _start(item):
+    return item["start_datetime"] if isinstance(item, dict) else item.start_datetime
+
+
+def make_occurrence(item, start, end):
+    """
+    Return a copy of the series `item` standing for its occurrence from `start` to `end`.
+    """
+    if isinstance(item, dict):
+        return {**item, "start_datetime": start, "end_datetime": end, "recurrence_id": start}
+    occurrence = copy.copy(item)
+    occurrence.start_datetime, occurrence.end_datetime, occurrence.recurrence_id = start, end, start
+    return occurrence
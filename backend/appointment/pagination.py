@@ -0,0 +1,39 @@
+import heapq
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+
+from core.pagination import KeysetPagination
+
+from .filters import get_window
+from .occurrences import expand, split_series
+
+
+class AppointmentPagination(KeysetPagination):
+    """
+    Page single appointments and the occurrences of recurring ones, expanded for the filtered range, together.
+    """
+
+    ordering = ("start_datetime", "id")
+
+    def get_results(self, queryset, request, position):
+        single, series = split_series(queryset)
+        results = super().get_results(single, request, position)
+        occurrences = expand(series, get_window(request.query_params), position, self.reverse, self.page_size + 1)
+        return self.merge(results, occurrences)
+
+    async def aget_results(self, queryset, request, position):
+        single, series = split_series(queryset)
+        results = await super().aget_results(single, request, position)
+        occurrences = await sync_to_async(expand)(
+            series, get_window(request.query_params), position, self.reverse, self.page_size + 1
+        )
+        return self.merge(results, occurrences)
+
+    def merge(self, results, occurrences):
+        merged = heapq.merge(results, occurrences, key=self.get_position, reverse=self.reverse)
+        return list(islice(merged, self.page_size + 1))
+
+
+class ArchivedAppointmentPagination(KeysetPagination):
+    ordering = ("start_datetime", "id")
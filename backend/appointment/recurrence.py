@@ -0,0 +1,80 @@
+from functools import lru_cache
+
+from dateutil.rrule import DAILY, MONTHLY, WEEKLY, YEARLY, rrule, rruleset, rrulestr
+from django.utils import timezone
+
+FREQUENCIES = (YEARLY, MONTHLY, WEEKLY, DAILY)
+
+
+def get_rule(recurrence, start, exceptions=()):
+    """
+    Return the occurrence starts of a series as a dateutil rruleset.
+
+    `recurrence` is one RRULE (with or without the "RRULE:" prefix) repeating daily or less often, it is
+    expanded in the current timezone's wall time so a weekly 9:00 stays at 9:00 across DST. `start` is
+    always the first occurrence and `exceptions` are left out. Raises ValueError for anything else.
+    """
+    return _parse(recurrence.strip(), timezone.localtime(start), tuple(exceptions))
+
+
+@lru_cache(maxsize=1024)
+def _parse(recurrence, start, exceptions):
+    if recurrence[:6].upper() == "RRULE:":
+        recurrence = recurrence[6:]
+    if not recurrence or any(part in recurrence.upper() for part in ("\n", "\r", ":", "DTSTART")):
+        raise ValueError("Recurrence must be a single RRULE.")
+
+    rule = rrulestr(recurrence, dtstart=start)
+    if not isinstance(rule, rrule):
+        raise ValueError("Recurrence must be a single RRULE.")
+    if rule._freq not in FREQUENCIES:
+        raise ValueError("Appointments can repeat daily, weekly, monthly or yearly.")
+
+    rules = rruleset()
+    rules.rrule(rule)
+    rules.rdate(start)
+    for exception in exceptions:
+        rules.exdate(exception)
+    return rules
+
+
+def is_bounded(rules):
+    return all(rule._count is not None or rule._until is not None for rule in rules._rrule)
+
+
+def get_series_end(recurrence, start, end):
+    """
+    Return the end of the last occurrence of the series, or None if it repeats forever.
+    """
+    rules = get_rule(recurrence, start)
+    if not is_bounded(rules):
+        return None
+    return rules[-1] + (end - start)
+
+
+def iter_starts(rules, duration, lower=None, upper=None, position=None, reverse=False):
+    """
+    Yield the starts in `rules` of the occurrences overlapping [lower, upper), in order, from `position` on
+    (up to `position` when `reverse`, both inclusive).
+
+    None leaves a side open. Going forward only the occurrences yielded are expanded, so series without an
+    end are fine. Reversed reads expand their bounded window at once and need `upper` or `position`.
+    """
+    if reverse:
+        after = rules[0] if lower is None else lower - duration
+        until = min(value for value in (upper, position) if value is not None)
+        starts = reversed(rules.between(after, until, inc=True))
+    else:
+        bounds = [value for value in (None if lower is None else lower - duration, position) if value is not None]
+        starts = rules.xafter(max(bounds), inc=True) if bounds else iter(rules)
+
+    for start in starts:
+        if upper is not None and start >= upper:
+            if reverse:
+                continue
+            return
+        if lower is not None and start + duration <= lower:
+            if reverse:
+                return
+            continue
+        yield start
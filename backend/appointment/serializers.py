@@ -1,12 +1,23 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
 from rest_framework import serializers
 
+from core.serializers import ExpandableFieldsMixin
+from department import stats
 from employee.models import Employee
 from employee.serializers import EmployeeSerializer
 
-from .models import Appointment
+from . import events
+from .cache import invalidate_days, invalidate_related, spanned_days
+from .conflicts import conflict_errors, find_conflicts, find_overlaps, get_series_checks, translate_overlap_error
+from .models import Appointment, ArchivedAppointment, Occurrence
+from .recurrence import get_rule, get_series_end
 
 
-class AppointmentReadSerializer(serializers.HyperlinkedModelSerializer):
+class AppointmentReadSerializer(ExpandableFieldsMixin, serializers.HyperlinkedModelSerializer):
     url = serializers.HyperlinkedIdentityField(view_name="appointment-detail", lookup_field="pk")
     employee = EmployeeSerializer(many=False)
     participants = EmployeeSerializer(many=True)
@@ -22,12 +33,70 @@ class AppointmentReadSerializer(serializers.HyperlinkedModelSerializer):
             "description",
             "employee",
             "participants",
+            "recurrence",
+            "recurrence_exceptions",
+            "series",
+            "recurrence_id",
             "created_at",
             "updated_at",
         )
         read_only_fields = fields
 
 
+class AppointmentExportSerializer(serializers.ModelSerializer):
+    """
+    Flat appointment rows for CSV and NDJSON exports.
+    """
+
+    employee_name = serializers.CharField(source="employee.name", default=None, read_only=True)
+    employee_email = serializers.EmailField(source="employee.email", default=None, read_only=True)
+
+    class Meta:
+        model = Appointment
+        fields = (
+            "id",
+            "start_datetime",
+            "end_datetime",
+            "title",
+            "description",
+            "employee",
+            "employee_name",
+            "employee_email",
+            "participants",
+            "series",
+            "recurrence_id",
+        )
+        read_only_fields = fields
+
+
+class ArchivedAppointmentSerializer(serializers.ModelSerializer):
+    """
+    Archived appointments, with their employee and participants as ids.
+    """
+
+    participants = serializers.ListField(source="participant_ids", child=serializers.IntegerField(), read_only=True)
+
+    class Meta:
+        model = ArchivedAppointment
+        fields = (
+            "id",
+            "start_datetime",
+            "end_datetime",
+            "title",
+            "description",
+            "employee",
+            "participants",
+            "recurrence",
+            "recurrence_exceptions",
+            "series",
+            "recurrence_id",
+            "created_at",
+            "updated_at",
+            "archived_at",
+        )
+        read_only_fields = fields
+
+
 class AppointmentWriteSerializer(serializers.HyperlinkedModelSerializer):
     participants = serializers.HyperlinkedRelatedField(
         many=True, queryset=Employee.objects.all(), view_name="employee-detail", lookup_field="pk"
@@ -38,4 +107,418 @@ class AppointmentWriteSerializer(serializers.HyperlinkedModelSerializer):
 
     class Meta:
         model = Appointment
-        fields = ("start_datetime", "end_datetime", "title", "employee", "participants")
+        fields = (
+            "start_datetime",
+            "end_datetime",
+            "title",
+            "employee",
+            "participants",
+            "recurrence",
+            "recurrence_exceptions",
+            "series",
+            "recurrence_id",
+        )
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        instance = self.instance
+        start = attrs.get("start_datetime", getattr(instance, "start_datetime", None))
+        end = attrs.get("end_datetime", getattr(instance, "end_datetime", None))
+        if end <= start:
+            raise serializers.ValidationError({"end_datetime": ["End time must be after start time."]})
+        series, recurrence_id = self.check_series(attrs, start)
+
+        employee_id = attrs["employee"].pk if "employee" in attrs else instance.employee_id
+        if "participants" in attrs:
+            participant_ids = [participant.pk for participant in attrs["participants"]]
+        else:
+            participant_ids = list(instance.participants.values_list("pk", flat=True)) if instance else []
+
+        employee_ids = [employee_id, *participant_ids]
+        recurrence = attrs.get("recurrence", getattr(instance, "recurrence", ""))
+        if recurrence:
+            # Every occurrence books the employees, those the series' overrides replace are checked as overrides
+            overridden = set(instance.overrides.values_list("recurrence_id", flat=True)) if instance else set()
+            exceptions = attrs.get("recurrence_exceptions", getattr(instance, "recurrence_exceptions", []))
+            checks = get_series_checks(
+                employee_ids, recurrence, start, end, exceptions, getattr(instance, "pk", None), overridden
+            )
+        else:
+            checks = [(employee_ids, start, end, getattr(instance, "pk", None))]
+        # An override takes the place of its own occurrence
+        replaced = (series.pk, recurrence_id) if series else None
+        conflicts = [
+            conflict for conflict in find_conflicts(checks) if (conflict.pk, conflict.recurrence_id) != replaced
+        ]
+        if conflicts:
+            raise serializers.ValidationError(conflict_errors(conflicts, employee_id))
+        return attrs
+
+    def check_series(self, attrs, start):
+        """
+        Check the recurrence rule of a series, or that an override replaces an occurrence of its series.
+
+        Returns the series and recurrence id the appointment overrides, or Nones.
+        """
+        instance = self.instance
+        recurrence = attrs.get("recurrence", getattr(instance, "recurrence", ""))
+        exceptions = attrs.get("recurrence_exceptions", getattr(instance, "recurrence_exceptions", []))
+        series = attrs["series"] if "series" in attrs else getattr(instance, "series", None)
+        recurrence_id = attrs.get("recurrence_id", getattr(instance, "recurrence_id", None))
+
+        if recurrence:
+            if series is not None:
+                raise serializers.ValidationError({"recurrence": ["Overrides cannot recur."]})
+            try:
+                get_rule(recurrence, start, exceptions)
+            except ValueError as exc:
+                raise serializers.ValidationError({"recurrence": [str(exc)]}) from exc
+        elif exceptions:
+            raise serializers.ValidationError(
+                {"recurrence_exceptions": ["Only recurring appointments have exceptions."]}
+            )
+
+        if (series is None) != (recurrence_id is None):
+            raise serializers.ValidationError({"recurrence_id": ["Overrides need both a series and a recurrence id."]})
+        if series is not None:
+            if not series.recurrence:
+                raise serializers.ValidationError({"series": ["Not a recurring appointment."]})
+            if recurrence_id not in get_rule(series.recurrence, series.start_datetime, series.recurrence_exceptions):
+                raise serializers.ValidationError({"recurrence_id": ["Not an occurrence of the series."]})
+        return series, recurrence_id
+
+    def create(self, validated_data):
+        with translate_overlap_error():
+            return super().create(validated_data)
+
+    def update(self, instance, validated_data):
+        with translate_overlap_error():
+            return super().update(instance, validated_data)
+
+
+class PkHyperlinkedRelatedField(serializers.HyperlinkedRelatedField):
+    """
+    Resolve a hyperlink to the primary key it points to without loading the object.
+
+    The bulk serializer checks that all of them exist with a single query. Each distinct URL is only
+    resolved once per serializer.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.resolved = {}
+
+    def to_internal_value(self, data):
+        if not isinstance(data, str):
+            return super().to_internal_value(data)
+        if data not in self.resolved:
+            self.resolved[data] = super().to_internal_value(data)
+        return self.resolved[data]
+
+    def get_object(self, view_name, view_args, view_kwargs):
+        return self.get_queryset().model._meta.pk.get_prep_value(view_kwargs[self.lookup_url_kwarg])
+
+
+class AppointmentBulkSerializer(serializers.ListSerializer):
+    """
+    Validate and write a list of appointments with a fixed number of queries.
+
+    Hyperlinks are resolved to primary keys and checked with one `IN` query, appointments are written
+    with `bulk_create`/`bulk_update` and participants with one batched insert, all in one transaction.
+    Errors are reported per item. With `partial` it updates existing appointments, each item needs an `id`.
+    """
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault("max_length", settings.API_MAX_BULK_ITEMS)
+        super().__init__(*args, **kwargs)
+
+    def to_internal_value(self, data):
+        try:
+            items = super().to_internal_value(data)
+        except serializers.ValidationError as exc:
+            # DRF before 3.17, or without LIST_SERIALIZER_ERRORS_AS_DICT, lists an entry for every item
+            if isinstance(exc.detail, list):
+                raise serializers.ValidationError(
+                    {index: item_errors for index, item_errors in enumerate(exc.detail) if item_errors}
+                ) from exc
+            raise
+        errors = [{} for _ in items]
+        self.instances = self.get_instances(items, errors) if self.partial else {}
+
+        employee_ids = {pk for item in items for pk in (item.get("employee"), *item.get("participants", ()))}
+        existing = set(Employee.objects.filter(pk__in=employee_ids - {None}).values_list("pk", flat=True))
+        for item, item_errors in zip(items, errors):
+            if "employee" in item and item["employee"] not in existing:
+                item_errors["employee"] = [self.child.fields["employee"].error_messages["does_not_exist"]]
+            if any(pk not in existing for pk in item.get("participants", ())):
+                item_errors["participants"] = [
+                    self.child.fields["participants"].child_relation.error_messages["does_not_exist"]
+                ]
+
+            instance = self.instances.get(item.get("id"))
+            start = item.get("start_datetime", getattr(instance, "start_datetime", None))
+            end = item.get("end_datetime", getattr(instance, "end_datetime", None))
+            if start is not None and end is not None and end <= start:
+                item_errors.setdefault("end_datetime", []).append("End time must be after start time.")
+
+        self.check_conflicts(items, errors)
+        if any(errors):
+            raise serializers.ValidationError(
+                {index: item_errors for index, item_errors in enumerate(errors) if item_errors}
+            )
+        return items
+
+    def check_conflicts(self, items, errors):
+        """
+        Record the conflicts of the valid items with stored appointments (one query) and with each other.
+        """
+        current_participants = defaultdict(list)
+        if self.partial and any("participants" not in item for item in items):
+            through = Appointment.participants.through
+            for appointment_id, employee_id in through.objects.filter(appointment__in=self.instances).values_list(
+                "appointment_id", "employee_id"
+            ):
+                current_participants[appointment_id].append(employee_id)
+
+        overridden = defaultdict(set)
+        if series := [instance.pk for instance in self.instances.values() if instance.recurrence]:
+            for series_id, recurrence_id in Appointment.objects.filter(series__in=series).values_list(
+                "series_id", "recurrence_id"
+            ):
+                overridden[series_id].add(recurrence_id)
+
+        # One check per appointment, or per occurrence of the series the items update
+        indexes, owners, checks = [], [], []
+        for index, (item, item_errors) in enumerate(zip(items, errors)):
+            if item_errors:
+                continue
+            instance = self.instances.get(item.get("id"))
+            owner = item["employee"] if "employee" in item else instance.employee_id
+            participants = item["participants"] if "participants" in item else current_participants[instance.pk]
+            start = item.get("start_datetime", getattr(instance, "start_datetime", None))
+            end = item.get("end_datetime", getattr(instance, "end_datetime", None))
+            if instance is not None and instance.recurrence:
+                item_checks = get_series_checks(
+                    [owner, *participants],
+                    instance.recurrence,
+                    start,
+                    end,
+                    instance.recurrence_exceptions,
+                    instance.pk,
+                    overridden[instance.pk],
+                )
+            else:
+                item_checks = [([owner, *participants], start, end, getattr(instance, "pk", None))]
+            indexes += [index] * len(item_checks)
+            owners += [owner] * len(item_checks)
+            checks += item_checks
+
+        # Appointments updated by this request are compared with their new times below
+        conflicts = [conflict for conflict in find_conflicts(checks) if conflict.pk not in self.instances]
+        for conflict in conflicts:
+            for field, messages in conflict_errors([conflict], owners[conflict.check_index]).items():
+                errors[indexes[conflict.check_index]].setdefault(field, []).extend(messages)
+
+        for position, other, employee_id in find_overlaps([check[:3] for check in checks]):
+            if indexes[position] == indexes[other]:
+                continue
+            field = "employee" if employee_id == owners[position] else "participants"
+            errors[indexes[position]].setdefault(field, []).append(
+                f"Employee {employee_id} is also booked by item {indexes[other]} at an overlapping time."
+            )
+
+    def get_instances(self, items, errors):
+        """
+        Return {id: Appointment} for the appointments `items` update, recording missing and repeated ids.
+        """
+        ids = [item.get("id") for item in items]
+        instances = Appointment.objects.in_bulk({pk for pk in ids if pk is not None})
+        seen = set()
+        for pk, item_errors in zip(ids, errors):
+            if pk is None:
+                item_errors["id"] = [serializers.Field.default_error_messages["required"]]
+            elif pk not in instances:
+                item_errors["id"] = ["Not found."]
+            elif pk in seen:
+                item_errors["id"] = ["Appears more than once."]
+            seen.add(pk)
+        return instances
+
+    def save(self, **kwargs):
+        with translate_overlap_error():
+            if self.partial:
+                self.instance = self.update(self.instances, self.validated_data)
+            else:
+                self.instance = self.create(self.validated_data)
+        return self.instance
+
+    def create(self, validated_data):
+        appointments = Appointment.objects.bulk_create(
+            Appointment(
+                start_datetime=item["start_datetime"],
+                end_datetime=item["end_datetime"],
+                title=item["title"],
+                employee_id=item["employee"],
+            )
+            for item in validated_data
+        )
+        self.set_participants(zip(appointments, validated_data), replace=False)
+        ranges = [(appointment.start_datetime, appointment.end_datetime) for appointment in appointments]
+        invalidate_days(ranges)
+        stats.refresh(days={day for start, end in ranges for day in spanned_days(start, end)})
+        events.publish(
+            "created",
+            (
+                (appointment.pk, [appointment_range], {appointment.employee_id, *item.get("participants", ())})
+                for appointment, appointment_range, item in zip(appointments, ranges, validated_data)
+            ),
+        )
+        return appointments
+
+    def update(self, instances, validated_data):
+        ranges = [(instance.start_datetime, instance.end_datetime) for instance in instances.values()]
+        previous = {
+            pk: (instance.start_datetime, instance.end_datetime, instance.employee_id)
+            for pk, instance in instances.items()
+        }
+        participants = events.participant_ids(list(previous))
+        fields = {"updated_at"}
+        now = timezone.now()
+        appointments = []
+        for item in validated_data:
+            appointment = instances[item["id"]]
+            for name, value in item.items():
+                if name == "employee":
+                    appointment.employee_id = value
+                elif name not in ("id", "participants"):
+                    setattr(appointment, name, value)
+                fields.add(name)
+            appointment.updated_at = now
+            if appointment.recurrence:
+                appointment.recurrence_end = get_series_end(
+                    appointment.recurrence, appointment.start_datetime, appointment.end_datetime
+                )
+                appointment.materialized_range = None
+                fields |= {"recurrence_end", "materialized_range"}
+            appointments.append(appointment)
+
+        fields -= {"id", "participants"}
+        Appointment.objects.bulk_update(appointments, sorted(fields))
+        if series := [appointment.pk for appointment in appointments if appointment.recurrence]:
+            Occurrence.objects.filter(series__in=series).delete()
+            invalidate_related()
+        self.set_participants(
+            ((appointment, item) for appointment, item in zip(appointments, validated_data) if "participants" in item),
+            replace=True,
+        )
+        ranges += [(appointment.start_datetime, appointment.end_datetime) for appointment in appointments]
+        invalidate_days(ranges)
+        stats.refresh(days={day for start, end in ranges for day in spanned_days(start, end)})
+        changes = []
+        for appointment, item in zip(appointments, validated_data):
+            start, end, employee_id = previous[appointment.pk]
+            changes.append(
+                (
+                    appointment.pk,
+                    (
+                        None
+                        if appointment.recurrence or appointment.series_id
+                        else [(start, end), (appointment.start_datetime, appointment.end_datetime)]
+                    ),
+                    {
+                        employee_id,
+                        appointment.employee_id,
+                        *participants[appointment.pk],
+                        *item.get("participants", ()),
+                    },
+                )
+            )
+        events.publish("updated", changes)
+        return appointments
+
+    def set_participants(self, pairs, replace):
+        """
+        Write the participants of each (appointment, item) pair with one insert, after one delete when `replace`.
+        """
+        through = Appointment.participants.through
+        pairs = list(pairs)
+        if replace:
+            through.objects.filter(appointment__in=[appointment.pk for appointment, _ in pairs]).delete()
+        through.objects.bulk_create(
+            through(appointment_id=appointment.pk, employee_id=employee_id)
+            for appointment, item in pairs
+            for employee_id in dict.fromkeys(item.get("participants", ()))
+        )
+
+
+class AppointmentBulkItemSerializer(AppointmentWriteSerializer):
+    id = serializers.IntegerField(required=False)
+    participants = PkHyperlinkedRelatedField(many=True, queryset=Employee.objects.all(), view_name="employee-detail")
+    employee = PkHyperlinkedRelatedField(queryset=Employee.objects.all(), view_name="employee-detail")
+
+    class Meta(AppointmentWriteSerializer.Meta):
+        # Series are written one at a time, their occurrences and overrides need the checks in `validate`
+        fields = ("id", "start_datetime", "end_datetime", "title", "employee", "participants")
+        list_serializer_class = AppointmentBulkSerializer
+
+    def validate(self, attrs):
+        # Ranges and conflicts are checked for all items at once by AppointmentBulkSerializer
+        return attrs
+
+
+class AppointmentBulkDeleteSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False)
+
+    def validate_ids(self, ids):
+        if len(ids) > settings.API_MAX_BULK_ITEMS:
+            raise serializers.ValidationError(
+                f"Ensure this field has no more than {settings.API_MAX_BULK_ITEMS} elements."
+            )
+        existing = set(Appointment.objects.filter(pk__in=ids).values_list("pk", flat=True))
+        missing = {index: ["Not found."] for index, pk in enumerate(ids) if pk not in existing}
+        if missing:
+            raise serializers.ValidationError(missing)
+        return ids
+
+    def save(self):
+        with transaction.atomic():
+            deleted, _ = Appointment.objects.filter(pk__in=self.validated_data["ids"]).delete()
+        return deleted
+
+
+class ConflictQuerySerializer(serializers.Serializer):
+    start = serializers.DateTimeField()
+    end = serializers.DateTimeField()
+    employees = serializers.ListField(child=serializers.IntegerField(), allow_empty=False)
+    exclude = serializers.IntegerField(required=False)
+
+    def validate(self, attrs):
+        if attrs["end"] <= attrs["start"]:
+            raise serializers.ValidationError({"end": ["End time must be after start time."]})
+        return attrs
+
+
+class NextQuerySerializer(serializers.Serializer):
+    employees = serializers.ListField(child=serializers.IntegerField(), required=False, allow_empty=False)
+    department = serializers.IntegerField(required=False)
+
+    def validate(self, attrs):
+        if ("employees" in attrs) == ("department" in attrs):
+            raise serializers.ValidationError({"employees": ["Pass employees or a department."]})
+        return attrs
+
+
+class EventQuerySerializer(serializers.Serializer):
+    date = serializers.DateField(required=False)
+    employees = serializers.ListField(child=serializers.IntegerField(), required=False)
+
+
+class AppointmentConflictSerializer(serializers.HyperlinkedModelSerializer):
+    url = serializers.HyperlinkedIdentityField(view_name="appointment-detail", lookup_field="pk")
+    conflicting_employee = serializers.HyperlinkedRelatedField(
+        source="conflicting_employee_id", view_name="employee-detail", read_only=True
+    )
+
+    class Meta:
+        model = Appointment
+        fields = ("url", "id", "start_datetime", "end_datetime", "title", "recurrence_id", "conflicting_employee")
@@ -0,0 +1,175 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from appointment import events
+from appointment.cache import invalidate_days, invalidate_related, spanned_days
+from appointment.models import Appointment, Occurrence
+from department import stats
+from department.models import Department
+from employee.importer import imported
+from employee.models import Employee
+
+
+@receiver(pre_save, sender=Appointment)
+def remember_previous_range(sender, instance, **kwargs):
+    instance._previous_range, instance._was_series, instance._previous_employee_id = None, False, None
+    if instance.pk is not None:
+        previous = (
+            Appointment.objects.filter(pk=instance.pk)
+            .values_list("start_datetime", "end_datetime", "recurrence", "employee_id")
+            .first()
+        )
+        if previous:
+            instance._previous_range, instance._was_series = previous[:2], bool(previous[2])
+            instance._previous_employee_id = previous[3]
+
+
+@receiver(post_save, sender=Appointment)
+def invalidate_saved_days(sender, instance, **kwargs):
+    """
+    Bump the cached days the appointment was and is in. Series and overrides show up on days their own row
+    does not span, edits to them drop every day and the series' materialized occurrences.
+    """
+    was_series = getattr(instance, "_was_series", False)
+    if instance.recurrence or was_series:
+        Occurrence.objects.filter(series=instance).delete()
+    if instance.recurrence or was_series or instance.series_id:
+        invalidate_related()
+        return
+
+    ranges = [(instance.start_datetime, instance.end_datetime)]
+    if previous_range := getattr(instance, "_previous_range", None):
+        ranges.append(previous_range)
+    invalidate_days(ranges)
+    stats.refresh(days=_days(ranges))
+
+
+@receiver(post_save, sender=Appointment)
+def publish_saved(sender, instance, created, **kwargs):
+    employees = {instance.employee_id}
+    ranges = [(instance.start_datetime, instance.end_datetime)]
+    if not created:
+        # New appointments get their participants afterwards, publish_participants_change reports them
+        employees |= {
+            getattr(instance, "_previous_employee_id", None),
+            *instance.participants.values_list("pk", flat=True),
+        }
+        if previous_range := getattr(instance, "_previous_range", None):
+            ranges.append(previous_range)
+    if instance.recurrence or getattr(instance, "_was_series", False) or instance.series_id:
+        ranges = None
+    events.publish("created" if created else "updated", [(instance.pk, ranges, employees)])
+
+
+@receiver(pre_delete, sender=Appointment)
+def invalidate_deleted_days(sender, instance, **kwargs):
+    if instance.recurrence or instance.series_id:
+        invalidate_related()
+    else:
+        invalidate_days([(instance.start_datetime, instance.end_datetime)])
+
+
+@receiver(post_delete, sender=Appointment)
+def refresh_deleted_days(sender, instance, **kwargs):
+    if not instance.recurrence:
+        stats.refresh(days=_days([(instance.start_datetime, instance.end_datetime)]))
+
+
+@receiver(pre_delete, sender=Appointment)
+def remember_deleted_participants(sender, instance, **kwargs):
+    # Participant rows go with the appointment, without m2m_changed
+    instance._participant_ids = set(instance.participants.values_list("pk", flat=True))
+
+
+@receiver(post_delete, sender=Appointment)
+def publish_deleted(sender, instance, **kwargs):
+    ranges = None if instance.recurrence or instance.series_id else [(instance.start_datetime, instance.end_datetime)]
+    employees = {instance.employee_id, *getattr(instance, "_participant_ids", ())}
+    events.publish("deleted", [(instance.pk, ranges, employees)])
+
+
+@receiver(m2m_changed, sender=Appointment.participants.through)
+def touch_appointments_on_participants_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Bump `updated_at` and the cached days of the appointments whose participants changed, `save()` does not
+    see m2m writes.
+    """
+    if not reverse:
+        if action not in ("post_add", "post_remove", "post_clear"):
+            return
+        appointments = Appointment.objects.filter(pk=instance.pk)
+    elif action in ("post_add", "post_remove"):
+        appointments = Appointment.objects.filter(pk__in=pk_set)
+    elif action == "pre_clear":
+        appointments = Appointment.objects.filter(participants=instance)
+    else:
+        return
+
+    rows = list(appointments.values_list("start_datetime", "end_datetime", "recurrence"))
+    if any(recurrence for _, _, recurrence in rows):
+        invalidate_related()
+    invalidate_days((start, end) for start, end, _ in rows)
+    appointments.update(updated_at=timezone.now())
+
+
+@receiver(m2m_changed, sender=Appointment.participants.through)
+def publish_participants_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Publish an update of the appointments whose participants changed, for their owners, their participants
+    and the employees that were added or removed.
+    """
+    if action == "pre_clear":
+        # What was cleared is gone by post_clear. Both sides name the relation `participants`.
+        instance._cleared = set(instance.participants.values_list("pk", flat=True))
+        return
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+
+    changed = getattr(instance, "_cleared", set()) if action == "post_clear" else pk_set
+    appointment_ids, removed = (changed, {instance.pk}) if reverse else ({instance.pk}, changed)
+    participants = events.participant_ids(appointment_ids)
+    rows = Appointment.objects.filter(pk__in=appointment_ids).values_list(
+        "pk", "start_datetime", "end_datetime", "recurrence", "series_id", "employee_id"
+    )
+    events.publish(
+        "updated",
+        [
+            (
+                pk,
+                None if recurrence or series_id else [(start, end)],
+                {employee_id, *participants[pk], *removed},
+            )
+            for pk, start, end, recurrence, series_id, employee_id in rows
+        ],
+    )
+
+
+@receiver(pre_delete, sender=Employee)
+def touch_attended_appointments(sender, instance, **kwargs):
+    # Their participant rows go with the employee, without m2m_changed
+    Appointment.objects.filter(participants=instance).update(updated_at=timezone.now())
+
+
+@receiver(imported)
+@receiver(post_save, sender=Employee)
+@receiver(post_delete, sender=Employee)
+@receiver(post_save, sender=Department)
+@receiver(post_delete, sender=Department)
+def invalidate_nested_output(sender, **kwargs):
+    invalidate_related()
+
+
+@receiver(post_save, sender=Employee)
+def refresh_moved_employee_days(sender, instance, created, update_fields=None, **kwargs):
+    if not created and (update_fields is None or {"department", "department_id"} & update_fields):
+        stats.refresh(employees=[instance.pk])
+
+
+@receiver(imported)
+def refresh_imported(sender, **kwargs):
+    stats.refresh()
+
+
+def _days(ranges):
+    return {day for start, end in ranges for day in spanned_days(start, end)}
@@ -0,0 +1,149 @@
+from datetime import UTC, date, datetime, timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.db import connection
+
+from appointment import archive
+from appointment.models import Appointment, ArchivedAppointment, ArchivedMonth, Occurrence
+from core.models import Tombstone
+from employee.models import Employee
+
+CUTOFF = datetime(2024, 4, 1, tzinfo=UTC)
+URL = "/api/v1/appointments/archived/"
+
+
+def at(month, day, hour=9):
+    return datetime(2024, month, day, hour, tzinfo=UTC)
+
+
+def create(employee, start, hours=1, **kwargs):
+    return Appointment.objects.create(
+        start_datetime=start, end_datetime=start + timedelta(hours=hours), title="Archive", employee=employee, **kwargs
+    )
+
+
+@pytest.fixture
+def history(employee):
+    """
+    Appointments before and around CUTOFF, by what archive() does with them.
+    """
+    colleague = Employee.objects.create(name="Colleague", email="colleague@testmail.com")
+    single = create(employee, at(1, 10))
+    single.participants.set([colleague])
+    ended_series = create(employee, at(2, 5, 14), recurrence="FREQ=WEEKLY;COUNT=3")
+    Occurrence.objects.create(series=ended_series, start_datetime=at(2, 12, 14), end_datetime=at(2, 12, 15))
+    ended_override = create(employee, at(3, 1, 16), series=ended_series, recurrence_id=at(2, 19, 14))
+    return {
+        "archived": [single, ended_series, ended_override],
+        "kept": [
+            # Ends after the cutoff
+            create(employee, at(3, 31, 23), hours=2),
+            # Overrides an occurrence of a series still running
+            create(
+                employee,
+                at(2, 1, 8),
+                series=create(employee, at(1, 4, 7), recurrence="FREQ=MONTHLY;COUNT=6"),
+                recurrence_id=at(2, 4, 7),
+            ),
+            create(employee, datetime.now(UTC) + timedelta(hours=1)),
+        ],
+        "colleague": colleague,
+    }
+
+
+def partitions():
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = %s::regclass ORDER BY 1",
+            [ArchivedAppointment._meta.db_table],
+        )
+        return [name for [name] in cursor.fetchall()]
+
+
+@pytest.mark.django_db
+def test_archive_moves_ended_appointments_into_month_partitions(history):
+    single, series, override = history["archived"]
+    kept = history["kept"][:2] + [history["kept"][1].series] + history["kept"][2:]
+
+    assert archive.archive(CUTOFF) == {date(2024, 1, 1): 1, date(2024, 2, 1): 1, date(2024, 3, 1): 1}
+    assert set(Appointment.objects.values_list("pk", flat=True)) == {appointment.pk for appointment in kept}
+    assert not Occurrence.objects.exists()
+    assert partitions() == [archive.partition_name(date(2024, month, 1)) for month in (1, 2, 3)]
+    assert set(Tombstone.objects.values_list("object_id", flat=True)) == {single.pk, series.pk, override.pk}
+
+    archived = ArchivedAppointment.objects.get(pk=single.pk)
+    assert archived.participant_ids == [history["colleague"].pk]
+    assert archived.employee_id == single.employee_id
+    assert ArchivedAppointment.objects.get(pk=override.pk).series == series.pk
+    assert list(ArchivedMonth.objects.values_list("month", "appointments", "longest")) == [
+        (date(2024, 1, 1), 1, timedelta(hours=1)),
+        (date(2024, 2, 1), 1, timedelta(days=14, hours=1)),
+        (date(2024, 3, 1), 1, timedelta(hours=1)),
+    ]
+
+    assert archive.archive(CUTOFF) == {}
+
+
+@pytest.mark.django_db
+def test_find_archived_reads_the_partitions_of_the_window(history):
+    single, series, override = history["archived"]
+    archive.archive(CUTOFF)
+
+    january = archive.find_archived(at(1, 10, 0), at(1, 11, 0))
+    assert list(january) == [ArchivedAppointment.objects.get(pk=single.pk)]
+    plan = january.explain()
+    assert archive.partition_name(date(2024, 1, 1)) in plan
+    assert archive.partition_name(date(2024, 3, 1)) not in plan
+
+    # Series overlapping the window are found from the earlier months their rows start in
+    march = archive.find_archived(at(2, 19, 0), at(3, 2, 0))
+    assert [appointment.pk for appointment in march] == [series.pk, override.pk]
+
+
+@pytest.mark.django_db
+def test_archived_endpoint(api_client, history):
+    single, series, override = history["archived"]
+    archive.archive(CUTOFF)
+
+    response = api_client.get(URL, {"start": "2024-01-01T00:00:00Z", "end": "2024-04-01T00:00:00Z", "page_size": 2})
+    assert response.status_code == 200
+    first, second = response.data["results"]
+    assert (first["id"], first["participants"], first["employee"]) == (
+        single.pk,
+        [history["colleague"].pk],
+        single.employee_id,
+    )
+    assert (second["id"], second["recurrence"]) == (series.pk, "FREQ=WEEKLY;COUNT=3")
+
+    response = api_client.get(response.data["next"])
+    assert [item["id"] for item in response.data["results"]] == [override.pk]
+    assert response.data["next"] is None
+
+    assert api_client.get(URL, {"date": "2024-01-10"}).data["results"][0]["id"] == single.pk
+    assert api_client.get(URL).status_code == 400
+
+
+@pytest.mark.django_db
+def test_archive_appointments_command_exports_and_restores(history, tmp_path):
+    out = StringIO()
+    call_command("archive_appointments", months=0, export=tmp_path, stdout=out)
+    # Everything but the upcoming appointment
+    assert "Archived 6 appointments of 3 months" in out.getvalue()
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "appointments-2024-01.tsv.gz",
+        "appointments-2024-02.tsv.gz",
+        "appointments-2024-03.tsv.gz",
+    ]
+    assert partitions() == []
+    assert not archive.find_archived(at(1, 1), at(4, 1))
+
+    call_command("archive_appointments", "--restore=2024-01", stdout=StringIO())
+    single, running = history["archived"][0], history["kept"][1].series
+    assert [appointment.pk for appointment in archive.find_archived(at(1, 1), at(2, 1))] == [running.pk, single.pk]
+    assert ArchivedAppointment.objects.get(pk=single.pk).participant_ids == [history["colleague"].pk]
+
+    with pytest.raises(CommandError, match="2024-01 was not exported"):
+        call_command("archive_appointments", "--restore=2024-01", stdout=StringIO())
@@ -0,0 +1,196 @@
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from appointment.cache import get_stats
+from appointment.models import Appointment
+from employee.models import Employee
+
+URL = "/api/v1/appointments/bulk/"
+START = timezone.make_aware(datetime(2025, 6, 7, 9))
+
+
+def employee_url(employee):
+    return f"http://testserver/api/v1/employees/{employee.pk}/"
+
+
+@pytest.fixture
+def employees():
+    return [Employee.objects.create(name=f"Employee {i}", email=f"employee{i}@testmail.com") for i in range(4)]
+
+
+def items(employees, count, participants=2, start=START):
+    return [
+        {
+            "start_datetime": (start + timedelta(hours=i)).isoformat(),
+            "end_datetime": (start + timedelta(hours=i, minutes=30)).isoformat(),
+            "title": f"Bulk {i}",
+            "employee": employee_url(employees[i % len(employees)]),
+            "participants": [employee_url(employee) for employee in employees[:participants]],
+        }
+        for i in range(count)
+    ]
+
+
+@pytest.mark.django_db
+def test_bulk_create(api_client, employees):
+    response = api_client.post(URL, items(employees, 3), format="json")
+    assert response.status_code == 201
+
+    created = response.json()
+    appointments = Appointment.objects.order_by("pk")
+    assert [item["id"] for item in created] == [appointment.pk for appointment in appointments]
+    assert created[0]["url"] == f"http://testserver/api/v1/appointments/{appointments[0].pk}/"
+    assert [appointment.title for appointment in appointments] == ["Bulk 0", "Bulk 1", "Bulk 2"]
+    assert appointments[1].employee == employees[1]
+    assert set(appointments[2].participants.all()) == set(employees[:2])
+
+
+@pytest.mark.django_db
+def test_bulk_create_query_count_is_constant(api_client, employees):
+    with CaptureQueriesContext(connection) as small:
+        api_client.post(URL, items(employees, 2), format="json")
+    with CaptureQueriesContext(connection) as large:
+        api_client.post(URL, items(employees, 50, participants=4, start=START + timedelta(days=1)), format="json")
+
+    # employee check, conflicts, savepoint, appointments, participants, release
+    assert len(small) == len(large) == 6
+    assert Appointment.participants.through.objects.count() == 2 * 2 + 50 * 4
+
+
+@pytest.mark.django_db
+def test_bulk_create_reports_errors_per_item(api_client, employees):
+    payload = items(employees, 3)
+    payload[0]["employee"] = "http://testserver/api/v1/employees/0/"
+    payload[1]["end_datetime"] = payload[1]["start_datetime"]
+
+    response = api_client.post(URL, payload, format="json")
+
+    assert response.status_code == 400
+    assert response.json() == {
+        "0": {"employee": ["Invalid hyperlink - Object does not exist."]},
+        "1": {"end_datetime": ["End time must be after start time."]},
+    }
+    assert not Appointment.objects.exists()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("errors_as_dict", [True, False])
+def test_bulk_create_reports_field_errors_before_checking_the_database(api_client, settings, employees, errors_as_dict):
+    # Older DRF versions only have the list format
+    settings.REST_FRAMEWORK = {**settings.REST_FRAMEWORK, "LIST_SERIALIZER_ERRORS_AS_DICT": errors_as_dict}
+    payload = items(employees, 3)
+    payload[0]["employee"] = "http://testserver/api/v1/employees/0/"
+    payload[1]["participants"].append("http://testserver/api/v1/departments/1/")
+    del payload[2]["title"]
+
+    response = api_client.post(URL, payload, format="json")
+
+    assert response.status_code == 400
+    assert response.json() == {
+        "1": {"participants": ["Invalid hyperlink - Incorrect URL match."]},
+        "2": {"title": ["This field is required."]},
+    }
+
+
+@pytest.mark.django_db
+def test_bulk_create_rejects_too_many_items(api_client, settings, employees):
+    settings.API_MAX_BULK_ITEMS = 2
+    response = api_client.post(URL, items(employees, 3), format="json")
+    assert response.status_code == 400
+    assert not Appointment.objects.exists()
+
+
+@pytest.mark.django_db
+def test_bulk_update(api_client, employees):
+    ids = [item["id"] for item in api_client.post(URL, items(employees, 3), format="json").json()]
+    before = Appointment.objects.get(pk=ids[1]).updated_at
+
+    payload = [
+        {"id": ids[0], "title": "Renamed"},
+        {"id": ids[1], "participants": [employee_url(employees[3])], "employee": employee_url(employees[3])},
+    ]
+    response = api_client.patch(URL, payload, format="json")
+    assert response.status_code == 200
+    assert [item["id"] for item in response.json()] == ids[:2]
+
+    first, second, third = Appointment.objects.order_by("pk")
+    assert first.title == "Renamed"
+    assert set(first.participants.all()) == set(employees[:2])
+    assert second.title == "Bulk 1"
+    assert second.employee == employees[3]
+    assert list(second.participants.all()) == [employees[3]]
+    assert second.updated_at > before
+    assert set(third.participants.all()) == set(employees[:2])
+
+
+@pytest.mark.django_db
+def test_bulk_update_reports_errors_per_item(api_client, employees):
+    ids = [item["id"] for item in api_client.post(URL, items(employees, 2), format="json").json()]
+
+    payload = [
+        {"title": "No id"},
+        {"id": 0, "title": "Missing"},
+        {"id": ids[0], "title": "Renamed"},
+        {"id": ids[0], "title": "Twice"},
+        {"id": ids[1], "end_datetime": START.isoformat()},
+    ]
+    response = api_client.patch(URL, payload, format="json")
+
+    assert response.status_code == 400
+    assert response.json() == {
+        "0": {"id": ["This field is required."]},
+        "1": {"id": ["Not found."]},
+        "3": {"id": ["Appears more than once."]},
+        "4": {"end_datetime": ["End time must be after start time."]},
+    }
+    assert not Appointment.objects.filter(title="Renamed").exists()
+
+
+@pytest.mark.django_db
+def test_bulk_delete(api_client, employees):
+    ids = [item["id"] for item in api_client.post(URL, items(employees, 3), format="json").json()]
+
+    response = api_client.delete(URL, {"ids": [ids[0], 0]}, format="json")
+    assert response.status_code == 400
+    assert response.json() == {"ids": {"1": ["Not found."]}}
+
+    response = api_client.delete(URL, {"ids": ids[:2]}, format="json")
+    assert response.status_code == 204
+    assert list(Appointment.objects.values_list("pk", flat=True)) == ids[2:]
+    assert Appointment.participants.through.objects.count() == 2
+
+
+@pytest.mark.django_db
+def test_bulk_writes_invalidate_the_day_cache(api_client, employees):
+    url = f"/api/v1/appointments/?date={START.date().isoformat()}"
+    ids = [item["id"] for item in api_client.post(URL, items(employees, 1), format="json").json()]
+
+    for method, payload in [
+        ("post", items(employees, 1, start=START + timedelta(hours=1))),
+        ("patch", [{"id": ids[0], "title": "Renamed"}]),
+        ("delete", {"ids": ids}),
+    ]:
+        api_client.get(url)
+        getattr(api_client, method)(URL, payload, format="json")
+        misses = get_stats()["misses"]
+        api_client.get(url)
+        assert get_stats()["misses"] == misses + 1, method
+
+
+@pytest.mark.benchmark
+@pytest.mark.django_db
+def test_bulk_create_benchmark(api_client, employees):
+    payload = items(employees, 10_000, participants=3)
+
+    started = time.perf_counter()
+    response = api_client.post(URL, payload, format="json")
+    elapsed = time.perf_counter() - started
+
+    assert response.status_code == 201
+    assert Appointment.objects.count() == 10_000
+    print(f"\n10k appointments: {elapsed:.2f}s")
@@ -0,0 +1,160 @@
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from appointment import cache as day_cache
+from appointment.cache import get_or_build, get_stats, spanned_days
+
+DAY = date(2025, 6, 7)
+NEXT_DAY = date(2025, 6, 8)
+
+
+def at(day, hour):
+    return timezone.make_aware(datetime.combine(day, datetime.min.time()) + timedelta(hours=hour))
+
+
+def day_url(day, query=""):
+    return f"/api/v1/appointments/?date={day.isoformat()}{query}"
+
+
+def rename(instance):
+    # Saves that change nothing write nothing
+    instance.name = f"{instance.name} (renamed)"
+    instance.save()
+
+
+@pytest.fixture
+def day_appointments(staffed_appointment_factory):
+    return staffed_appointment_factory(start=at(DAY, 10)), staffed_appointment_factory(start=at(NEXT_DAY, 10))
+
+
+def assert_cached(api_client, url, cached):
+    before = get_stats()
+    response = api_client.get(url)
+    assert response.status_code == 200
+    after = get_stats()
+    assert (after["hits"] - before["hits"], after["misses"] - before["misses"]) == ((1, 0) if cached else (0, 1))
+    return response
+
+
+@pytest.mark.parametrize(
+    "start, end, days",
+    [
+        (at(DAY, 10), at(DAY, 11), {DAY}),
+        (at(DAY, 23), at(NEXT_DAY, 0), {DAY}),
+        (at(DAY, 23), at(NEXT_DAY, 1), {DAY, NEXT_DAY}),
+        (at(DAY, 0), at(DAY, 72), {DAY, NEXT_DAY, date(2025, 6, 9)}),
+        ("2025-06-07T10:00:00", "2025-06-07T11:00:00", {DAY}),
+    ],
+)
+def test_spanned_days(start, end, days):
+    assert spanned_days(start, end) == days
+
+
+@pytest.mark.django_db
+def test_day_is_served_from_cache(api_client, day_appointments):
+    response = assert_cached(api_client, day_url(DAY), cached=False)
+
+    with CaptureQueriesContext(connection) as queries:
+        cached = assert_cached(api_client, day_url(DAY), cached=True)
+    assert cached.json() == response.json()
+    # Only the validator state is read
+    assert len(queries) == 1
+
+
+@pytest.mark.django_db
+def test_query_params_are_part_of_the_key(api_client, day_appointments):
+    assert_cached(api_client, day_url(DAY), cached=False)
+    response = assert_cached(api_client, day_url(DAY, "&fields=id"), cached=False)
+    assert list(response.json()["results"][0]) == ["id"]
+    api_client.get("/api/v1/appointments/")
+    assert get_stats() == {"hits": 0, "misses": 2}
+
+
+@pytest.mark.django_db
+def test_save_invalidates_only_the_spanned_days(api_client, day_appointments):
+    assert_cached(api_client, day_url(DAY), cached=False)
+    assert_cached(api_client, day_url(NEXT_DAY), cached=False)
+
+    day_appointments[0].title = "Renamed"
+    day_appointments[0].save()
+
+    response = assert_cached(api_client, day_url(DAY), cached=False)
+    assert response.json()["results"][0]["title"] == "Renamed"
+    assert_cached(api_client, day_url(NEXT_DAY), cached=True)
+
+
+@pytest.mark.django_db
+def test_moving_an_appointment_invalidates_old_and_new_days(api_client, day_appointments):
+    assert_cached(api_client, day_url(DAY), cached=False)
+    assert_cached(api_client, day_url(NEXT_DAY), cached=False)
+
+    moved = day_appointments[0]
+    moved.start_datetime, moved.end_datetime = at(NEXT_DAY, 12), at(NEXT_DAY, 13)
+    moved.save()
+
+    assert assert_cached(api_client, day_url(DAY), cached=False).json()["results"] == []
+    assert len(assert_cached(api_client, day_url(NEXT_DAY), cached=False).json()["results"]) == 2
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "change",
+    [
+        lambda appointment: appointment.delete(),
+        lambda appointment: appointment.participants.clear(),
+        lambda appointment: appointment.participants.first().participants.clear(),
+        lambda appointment: rename(appointment.employee),
+        lambda appointment: rename(appointment.employee.department),
+    ],
+    ids=["delete", "participants", "reverse participants", "employee", "department"],
+)
+def test_writes_invalidate_the_day(api_client, day_appointments, change):
+    assert_cached(api_client, day_url(DAY), cached=False)
+    change(day_appointments[0])
+    assert_cached(api_client, day_url(DAY), cached=False)
+
+
+@pytest.mark.django_db
+def test_disabled(api_client, settings, day_appointments):
+    settings.APPOINTMENT_DAY_CACHE_TIMEOUT = 0
+    api_client.get(day_url(DAY))
+    api_client.get(day_url(DAY))
+    assert get_stats() == {"hits": 0, "misses": 0}
+
+
+def test_only_one_caller_builds_a_cold_day():
+    builds = []
+
+    def build():
+        builds.append(1)
+        time.sleep(0.2)
+        return {"results": []}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(get_or_build(DAY, "variant", build))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(builds) == 1
+    assert results == [{"results": []}] * 5
+    assert get_stats() == {"hits": 4, "misses": 1}
+
+
+def test_waiters_build_after_the_lock_times_out(monkeypatch):
+    monkeypatch.setattr(day_cache, "LOCK_TIMEOUT", 0.1)
+    add = cache.add
+    monkeypatch.setattr(
+        cache, "add", lambda key, *args, **kwargs: not key.endswith(":lock") and add(key, *args, **kwargs)
+    )
+
+    assert get_or_build(DAY, "variant", lambda: {"results": []}) == {"results": []}
+    assert get_stats() == {"hits": 0, "misses": 1}
@@ -0,0 +1,218 @@
+from datetime import datetime, timedelta
+from urllib.parse import urlencode
+
+import pytest
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+
+from appointment.conflicts import CONFLICTS_SQL, find_conflicts, find_overlaps
+from appointment.models import Appointment
+from employee.models import Employee
+
+START = timezone.make_aware(datetime(2025, 6, 7, 9))
+URL = "/api/v1/appointments/"
+
+
+def at(hours):
+    return START + timedelta(hours=hours)
+
+
+def employee_url(employee):
+    return f"http://testserver/api/v1/employees/{employee.pk}/"
+
+
+@pytest.fixture
+def people():
+    return [Employee.objects.create(name=f"Person {i}", email=f"person{i}@testmail.com") for i in range(4)]
+
+
+@pytest.fixture
+def booked(people):
+    """
+    people[0] owns 9-10 with people[1] attending, people[2] owns 12-13.
+    """
+    meeting = Appointment.objects.create(start_datetime=at(0), end_datetime=at(1), title="Meeting", employee=people[0])
+    meeting.participants.set([people[1]])
+    lunch = Appointment.objects.create(start_datetime=at(3), end_datetime=at(4), title="Lunch", employee=people[2])
+    return meeting, lunch
+
+
+def payload(owner, start, end, participants=()):
+    return {
+        "start_datetime": start.isoformat(),
+        "end_datetime": end.isoformat(),
+        "title": "New",
+        "employee": employee_url(owner),
+        "participants": [employee_url(participant) for participant in participants],
+    }
+
+
+@pytest.mark.django_db
+def test_exclusion_constraint_rejects_overlapping_owner_bookings(people, booked):
+    with pytest.raises(IntegrityError), transaction.atomic():
+        Appointment.objects.create(start_datetime=at(0.5), end_datetime=at(2), title="Overlap", employee=people[0])
+
+    Appointment.objects.create(start_datetime=at(1), end_datetime=at(2), title="Back to back", employee=people[0])
+    Appointment.objects.create(start_datetime=at(0), end_datetime=at(1), title="Someone else", employee=people[3])
+
+
+@pytest.mark.django_db
+def test_find_conflicts(people, booked):
+    meeting, lunch = booked
+
+    conflicts = find_conflicts(
+        [
+            ([people[0].pk, people[1].pk, people[3].pk], at(0.5), at(3.5), None),
+            ([people[1].pk], at(0), at(1), meeting.pk),
+            ([people[2].pk], at(4), at(5), None),
+            ([people[1].pk, people[2].pk], at(-1), at(5), None),
+        ]
+    )
+
+    assert [(c.check_index, c.pk, c.conflicting_employee_id) for c in conflicts] == [
+        (0, meeting.pk, people[0].pk),
+        (0, meeting.pk, people[1].pk),
+        (3, meeting.pk, people[1].pk),
+        (3, lunch.pk, people[2].pk),
+    ]
+    assert conflicts[0].title == "Meeting"
+
+
+@pytest.mark.django_db
+def test_find_conflicts_without_employees_makes_no_query(django_assert_num_queries):
+    with django_assert_num_queries(0):
+        assert find_conflicts([([None], at(0), at(1), None)]) == []
+
+
+@pytest.mark.django_db
+def test_find_conflicts_uses_gist_indexes(people, booked):
+    sql = CONFLICTS_SQL.format(
+        appointment=Appointment._meta.db_table, participants=Appointment.participants.through._meta.db_table
+    )
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute("SET LOCAL enable_seqscan = off")
+        cursor.execute("EXPLAIN " + sql, [[0], [people[0].pk], [at(0)], [at(1)], [None]])
+        plan = "\n".join(row[0] for row in cursor.fetchall())
+
+    assert "appointment_employee_no_overlap" in plan
+    assert "&&" in plan
+
+
+def test_find_overlaps():
+    checks = [
+        ([1, 2], at(0), at(1)),
+        ([2], at(1), at(2)),
+        ([3, 2], at(1.5), at(3)),
+        ([1], at(-1), at(0.5)),
+    ]
+    assert sorted(find_overlaps(checks)) == [(0, 3, 1), (2, 1, 2)]
+
+
+@pytest.mark.django_db
+def test_create_reports_owner_and_participant_conflicts(api_client, people, booked):
+    response = api_client.post(URL, payload(people[1], at(0.5), at(3.5), [people[0], people[2]]), format="json")
+
+    assert response.status_code == 400
+    errors = response.json()
+    assert errors["employee"] == [
+        f'Employee {people[1].pk} is already booked in appointment {booked[0].pk} "Meeting" '
+        "(2025-06-07 09:00 - 2025-06-07 10:00)."
+    ]
+    assert len(errors["participants"]) == 2
+
+
+@pytest.mark.django_db
+def test_create_and_update_without_conflicts(api_client, people, booked):
+    response = api_client.post(URL, payload(people[1], at(1), at(2), [people[0]]), format="json")
+    assert response.status_code == 201
+
+    meeting = booked[0]
+    response = api_client.patch(f"{URL}{meeting.pk}/", {"end_datetime": at(0.5).isoformat()}, format="json")
+    assert response.status_code == 200
+
+    response = api_client.patch(f"{URL}{meeting.pk}/", {"end_datetime": at(1.5).isoformat()}, format="json")
+    assert response.status_code == 400
+    assert list(response.json()) == ["employee", "participants"]
+
+
+@pytest.mark.django_db
+def test_create_rejects_inverted_range(api_client, people):
+    response = api_client.post(URL, payload(people[0], at(1), at(0)), format="json")
+    assert response.status_code == 400
+    assert response.json() == {"end_datetime": ["End time must be after start time."]}
+
+
+@pytest.mark.django_db
+def test_bulk_create_reports_conflicts(api_client, people, booked):
+    items = [
+        payload(people[3], at(0), at(1), [people[1]]),
+        payload(people[3], at(5), at(6)),
+        payload(people[2], at(5.5), at(7), [people[3]]),
+    ]
+    response = api_client.post(f"{URL}bulk/", items, format="json")
+
+    assert response.status_code == 400
+    errors = response.json()
+    assert list(errors) == ["0", "2"]
+    assert list(errors["0"]) == ["participants"]
+    assert errors["2"] == {
+        "participants": [f"Employee {people[3].pk} is also booked by item 1 at an overlapping time."]
+    }
+
+
+@pytest.mark.django_db
+def test_bulk_update_compares_moved_appointments_with_their_new_times(api_client, people, booked):
+    meeting, lunch = booked
+    lunch.participants.set([people[0]])
+
+    items = [{"id": meeting.pk, "start_datetime": at(3).isoformat(), "end_datetime": at(4).isoformat()}]
+    response = api_client.patch(f"{URL}bulk/", items, format="json")
+    assert response.status_code == 400
+    assert list(response.json()["0"]) == ["employee"]
+
+    items.append({"id": lunch.pk, "start_datetime": at(0).isoformat(), "end_datetime": at(1).isoformat()})
+    response = api_client.patch(f"{URL}bulk/", items, format="json")
+    assert response.status_code == 200
+
+
+@pytest.mark.django_db
+def test_conflicts_action(api_client, people, booked):
+    meeting, lunch = booked
+    query = urlencode({"start": at(0).isoformat(), "end": at(4).isoformat()})
+
+    response = api_client.get(f"{URL}conflicts/?{query}&employees={people[1].pk}&employees={people[2].pk}")
+    assert response.status_code == 200
+    assert [(item["id"], item["conflicting_employee"]) for item in response.json()] == [
+        (meeting.pk, employee_url(people[1])),
+        (lunch.pk, employee_url(people[2])),
+    ]
+    assert response.json()[0]["url"] == f"http://testserver/api/v1/appointments/{meeting.pk}/"
+
+    response = api_client.get(f"{URL}conflicts/?{query}&employees={people[1].pk}&exclude={meeting.pk}")
+    assert response.json() == []
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "query",
+    ["employees=1", "start=2025-06-07T10:00:00Z&end=2025-06-07T09:00:00Z&employees=1", "start=x&end=y&employees=a"],
+)
+def test_conflicts_action_validates_the_query(api_client, query):
+    assert api_client.get(f"{URL}conflicts/?{query}").status_code == 400
+
+
+@pytest.mark.django_db
+def test_conflicts_ignore_years_of_history(api_client, people, django_assert_num_queries):
+    history = [
+        Appointment(start_datetime=at(-24 * day), end_datetime=at(-24 * day + 1), title="Past", employee=people[0])
+        for day in range(1, 3 * 365)
+    ]
+    Through = Appointment.participants.through
+    past = Appointment.objects.bulk_create(history)
+    Through.objects.bulk_create(
+        Through(appointment_id=appointment.pk, employee_id=people[1].pk) for appointment in past
+    )
+
+    with django_assert_num_queries(1):
+        assert find_conflicts([([people[0].pk, people[1].pk], at(0), at(1), None)]) == []
+    assert len(find_conflicts([([people[0].pk, people[1].pk], at(-48), at(-47), None)])) == 2
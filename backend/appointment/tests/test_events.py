@@ -0,0 +1,217 @@
+import asyncio
+from datetime import date, datetime, timedelta
+
+import pytest
+from django.db import transaction
+from django.test import AsyncClient
+from django.utils import timezone
+
+from appointment.events import MAX_EVENT_DAYS, MAX_EVENT_EMPLOYEES, matches, publish
+from appointment.models import Appointment
+from core.events import LocalBroker, get_broker
+from employee.models import Employee
+
+START = timezone.make_aware(datetime(2025, 6, 7, 9))
+
+
+class RecordingBroker(LocalBroker):
+    def __init__(self):
+        super().__init__()
+        self.delivered = []
+
+    def deliver(self, messages):
+        self.delivered += messages
+        super().deliver(messages)
+
+
+@pytest.fixture
+def published(settings):
+    """
+    Return the events delivered by committed writes, run them in `django_capture_on_commit_callbacks`.
+    """
+    settings.EVENTS_BROKER = "appointment.tests.test_events.RecordingBroker"
+    broker = get_broker()
+    broker.delivered = []
+    return broker.delivered
+
+
+@pytest.fixture
+def staff(db):
+    return [Employee.objects.create(name=f"Staff {n}", email=f"staff{n}@testmail.com") for n in range(4)]
+
+
+def event(action, appointment, days, employees):
+    return {
+        "type": f"appointment.{action}",
+        "id": appointment.pk,
+        "days": days,
+        "employees": sorted(employee.pk for employee in employees),
+    }
+
+
+def book(owner, start=START, hours=1, **kwargs):
+    return Appointment.objects.create(
+        start_datetime=start, end_datetime=start + timedelta(hours=hours), title="Booked", employee=owner, **kwargs
+    )
+
+
+@pytest.mark.django_db
+def test_saves_publish_events(published, staff, django_capture_on_commit_callbacks):
+    owner, attendee, new_owner, _ = staff
+    with django_capture_on_commit_callbacks(execute=True):
+        appointment = book(owner)
+        appointment.participants.set([attendee])
+        appointment.start_datetime += timedelta(days=1)
+        appointment.end_datetime += timedelta(days=1)
+        appointment.employee = new_owner
+        appointment.save()
+
+    assert published == [
+        event("created", appointment, ["2025-06-07"], [owner]),
+        event("updated", appointment, ["2025-06-07"], [owner, attendee]),
+        event("updated", appointment, ["2025-06-07", "2025-06-08"], [owner, attendee, new_owner]),
+    ]
+
+
+@pytest.mark.django_db
+def test_deletes_publish_events(published, staff, django_capture_on_commit_callbacks):
+    owner, attendee, *_ = staff
+    appointment = book(owner, hours=16)
+    appointment.participants.set([attendee])
+
+    with django_capture_on_commit_callbacks(execute=True):
+        Appointment.objects.filter(pk=appointment.pk).delete()
+
+    assert published == [event("deleted", appointment, ["2025-06-07", "2025-06-08"], [owner, attendee])]
+
+
+@pytest.mark.django_db
+def test_participant_changes_publish_events(published, staff, django_capture_on_commit_callbacks):
+    owner, attendee, other, _ = staff
+    first, second = book(owner), book(other, START + timedelta(days=1))
+    first.participants.set([attendee])
+    second.participants.set([attendee])
+
+    with django_capture_on_commit_callbacks(execute=True):
+        first.participants.remove(attendee)
+        attendee.participants.clear()
+
+    assert published == [
+        event("updated", first, ["2025-06-07"], [owner, attendee]),
+        event("updated", second, ["2025-06-08"], [other, attendee]),
+    ]
+
+
+@pytest.mark.django_db
+def test_series_events_reach_every_day(published, staff, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        series = book(staff[0], recurrence="FREQ=DAILY;COUNT=3")
+        override = book(
+            staff[0], START + timedelta(days=1, hours=2), series=series, recurrence_id=START + timedelta(days=1)
+        )
+
+    assert published == [event("created", series, None, [staff[0]]), event("created", override, None, [staff[0]])]
+
+
+@pytest.mark.django_db
+def test_rolled_back_writes_publish_nothing(published, staff, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        with transaction.atomic():
+            book(staff[0])
+            transaction.set_rollback(True)
+    assert published == []
+
+
+@pytest.mark.django_db
+def test_bulk_writes_publish_events(published, api_client, staff, django_capture_on_commit_callbacks):
+    owner, attendee, other, _ = staff
+    url = "/api/v1/appointments/bulk/"
+
+    def employee_url(employee):
+        return f"http://testserver/api/v1/employees/{employee.pk}/"
+
+    payload = {
+        "start_datetime": START.isoformat(),
+        "end_datetime": (START + timedelta(hours=1)).isoformat(),
+        "title": "Bulk",
+        "employee": employee_url(owner),
+        "participants": [employee_url(attendee)],
+    }
+    with django_capture_on_commit_callbacks(execute=True):
+        [created] = api_client.post(url, [payload], format="json").json()
+    appointment = Appointment.objects.get(pk=created["id"])
+    changes = [
+        {
+            "id": appointment.pk,
+            "start_datetime": (START + timedelta(days=1)).isoformat(),
+            "end_datetime": (START + timedelta(days=1, hours=1)).isoformat(),
+            "participants": [employee_url(other)],
+        }
+    ]
+    with django_capture_on_commit_callbacks(execute=True):
+        assert api_client.patch(url, changes, format="json").status_code == 200
+        assert api_client.delete(url, {"ids": [appointment.pk]}, format="json").status_code == 204
+
+    assert published == [
+        event("created", appointment, ["2025-06-07"], [owner, attendee]),
+        event("updated", appointment, ["2025-06-07", "2025-06-08"], [owner, attendee, other]),
+        event("deleted", appointment, ["2025-06-08"], [owner, other]),
+    ]
+
+
+@pytest.mark.django_db
+def test_large_events_reach_every_employee(published, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        publish("updated", [(1, [], range(MAX_EVENT_EMPLOYEES + 1))])
+    assert published[0]["employees"] is None
+
+
+@pytest.mark.django_db
+def test_long_events_reach_every_day(published, staff, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        publish("updated", [(1, [(START, START + timedelta(days=MAX_EVENT_DAYS - 1))], [])])
+        long = book(staff[0], hours=24 * 700)
+    assert len(published[0]["days"]) == MAX_EVENT_DAYS
+    assert published[1] == event("created", long, None, [staff[0]])
+
+
+def test_matches():
+    message = {"days": ["2025-06-07"], "employees": [1, 2]}
+    assert matches()(message)
+    assert matches(date(2025, 6, 7), [2, 3])(message)
+    assert not matches(date(2025, 6, 8))(message)
+    assert not matches(employees=[3])(message)
+    assert matches(date(2025, 6, 8), [3])({"days": None, "employees": None})
+
+
+def test_events_endpoint_is_refused_under_wsgi(client):
+    assert client.get("/api/v1/appointments/events/").status_code == 501
+
+
+def test_events_endpoint_validates_query():
+    response = asyncio.run(AsyncClient().get("/api/v1/appointments/events/?date=tomorrow&employees=x"))
+    assert response.status_code == 400
+    assert set(response.json()) == {"date", "employees"}
+
+
+def test_events_endpoint_streams_matching_events(settings):
+    settings.EVENTS_BROKER = "core.events.LocalBroker"
+    appointment = {"type": "appointment.updated", "id": 1, "employees": [1]}
+
+    async def receive():
+        response = await AsyncClient().get("/api/v1/appointments/events/?date=2025-06-07&employees=1&employees=2")
+        chunks = aiter(response.streaming_content)
+        retry = await anext(chunks)
+        get_broker().deliver(
+            [{**appointment, "id": 2, "days": ["2025-06-08"]}, {**appointment, "days": ["2025-06-07"]}]
+        )
+        return response, retry, await anext(chunks)
+
+    response, retry, chunk = asyncio.run(asyncio.wait_for(receive(), 10))
+    assert response["Content-Type"] == "text/event-stream"
+    assert response["Cache-Control"] == "no-cache"
+    assert retry == b"retry: 3000\n\n"
+    assert chunk == (
+        b'event: appointment.updated\ndata: {"type":"appointment.updated","id":1,"employees":[1],'
+        b'"days":["2025-06-07"]}\n\n'
+    )
@@ -0,0 +1,71 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+from django.db import connection
+from django.utils import timezone
+
+from appointment.filters import AppointmentFilter
+from appointment.models import Appointment
+
+
+def make_appointment(employee, start, hours=1, title="Meeting"):
+    return Appointment.objects.create(
+        start_datetime=start, end_datetime=start + timedelta(hours=hours), title=title, employee=employee
+    )
+
+
+@pytest.fixture
+def day_appointments(employee):
+    day = timezone.make_aware(datetime(2025, 6, 7))
+    return {
+        "previous_day": make_appointment(employee, day - timedelta(hours=3), title="Previous day"),
+        "overnight": make_appointment(employee, day - timedelta(hours=1), hours=2, title="Overnight"),
+        "morning": make_appointment(employee, day + timedelta(hours=9), title="Morning"),
+        "ends_at_midnight": make_appointment(employee, day + timedelta(hours=23), title="Ends at midnight"),
+        "next_day": make_appointment(employee, day + timedelta(days=1), title="Next day"),
+    }
+
+
+@pytest.mark.django_db
+def test_filter_by_date_returns_overlapping_appointments(day_appointments):
+    qs = AppointmentFilter({"date": "2025-06-07"}, queryset=Appointment.objects.all()).qs
+
+    assert [a.title for a in qs] == ["Overnight", "Morning", "Ends at midnight"]
+
+
+@pytest.mark.django_db
+def test_filter_by_start_and_end_range(day_appointments):
+    params = {"start": "2025-06-07T08:00:00Z", "end": "2025-06-08T00:00:00Z"}
+    qs = AppointmentFilter(params, queryset=Appointment.objects.all()).qs
+    assert [a.title for a in qs] == ["Morning", "Ends at midnight"]
+
+    qs = AppointmentFilter({"start": "2025-06-07T23:30:00Z"}, queryset=Appointment.objects.all()).qs
+    assert [a.title for a in qs] == ["Ends at midnight", "Next day"]
+
+    qs = AppointmentFilter({"end": "2025-06-07T00:00:00Z"}, queryset=Appointment.objects.all()).qs
+    assert [a.title for a in qs] == ["Previous day", "Overnight"]
+
+
+def explain_with_index_scans_forced(queryset):
+    with connection.cursor() as cursor:
+        cursor.execute("SET LOCAL enable_seqscan = off")
+    return queryset.explain()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "params",
+    [
+        {"date": "2025-06-07"},
+        {"start": "2025-06-07T08:00:00Z", "end": "2025-06-07T18:00:00Z"},
+        {"start": "2025-06-07T08:00:00Z"},
+    ],
+)
+def test_filters_use_span_gist_index(employee, params):
+    make_appointment(employee, timezone.make_aware(datetime.combine(date(2025, 6, 7), datetime.min.time())))
+    qs = AppointmentFilter(params, queryset=Appointment.objects.all()).qs
+
+    plan = explain_with_index_scans_forced(qs)
+
+    assert "appointment_span_gist" in plan
+    assert "&&" in plan
@@ -0,0 +1,134 @@
+from datetime import datetime, timedelta
+
+import pytest
+from django.utils import timezone
+from hypothesis import given
+from hypothesis import strategies as st
+
+from appointment.cache import get_stats
+from appointment.layout import Slot, compute_layout
+from appointment.models import Appointment
+
+START = timezone.make_aware(datetime(2025, 6, 7, 9))
+URL = "/api/v1/appointments/layout/"
+
+intervals = st.lists(
+    st.tuples(st.integers(0, 96), st.integers(1, 24)).map(lambda item: (item[0], item[0] + item[1])), max_size=40
+)
+
+
+def overlaps(a, b):
+    return a[0] < b[1] and b[0] < a[1]
+
+
+def brute_force_groups(items):
+    """
+    Connected components of the overlap graph, by repeated merging.
+    """
+    groups = [{index} for index in range(len(items))]
+    merged = True
+    while merged:
+        merged = False
+        for i in range(len(groups)):
+            for j in range(i + 1, len(groups)):
+                if any(overlaps(items[a], items[b]) for a in groups[i] for b in groups[j]):
+                    groups[i] |= groups.pop(j)
+                    merged = True
+                    break
+            if merged:
+                break
+    return groups
+
+
+def busiest(items, members):
+    return max(sum(items[i][0] <= items[j][0] < items[i][1] for i in members) for j in members)
+
+
+@given(intervals)
+def test_groups_are_the_connected_overlaps(items):
+    slots = compute_layout((index, start, end) for index, (start, end) in enumerate(items))
+
+    groups = {}
+    for index, slot in slots.items():
+        groups.setdefault(slot.group, set()).add(index)
+    assert sorted(map(sorted, groups.values())) == sorted(map(sorted, brute_force_groups(items)))
+    assert sorted(groups) == list(range(len(groups)))
+
+
+@given(intervals)
+def test_columns_never_collide_and_match_the_busiest_moment(items):
+    slots = compute_layout((index, start, end) for index, (start, end) in enumerate(items))
+
+    for i, a in enumerate(items):
+        assert 0 <= slots[i].column < slots[i].columns
+        for j in range(i + 1, len(items)):
+            if overlaps(a, items[j]):
+                assert slots[i].column != slots[j].column
+
+    for group in brute_force_groups(items):
+        assert {slots[i].columns for i in group} == {busiest(items, group)}
+
+
+@given(intervals)
+def test_groups_are_numbered_in_start_order(items):
+    slots = compute_layout((index, start, end) for index, (start, end) in enumerate(items))
+    by_start = sorted(range(len(items)), key=lambda index: items[index])
+    assert [slots[i].group for i in by_start] == sorted(slots[i].group for i in by_start)
+
+
+def test_layout():
+    slots = compute_layout(
+        [("a", 9, 11), ("b", 10, 12), ("c", 11, 13), ("back to back", 13, 14), ("d", 10, 11), ("alone", 20, 21)]
+    )
+    assert slots == {
+        "a": Slot(0, 0, 3),
+        "d": Slot(0, 1, 3),
+        "b": Slot(0, 2, 3),
+        "c": Slot(0, 0, 3),
+        "back to back": Slot(1, 0, 1),
+        "alone": Slot(2, 0, 1),
+    }
+
+
+@pytest.fixture
+def day(staffed_appointment_factory):
+    return [staffed_appointment_factory(start=START + timedelta(minutes=minutes)) for minutes in (0, 30, 60, 180)]
+
+
+@pytest.mark.django_db
+def test_layout_action(api_client, day, django_assert_num_queries):
+    # appointments, recurring series
+    with django_assert_num_queries(2):
+        response = api_client.get(f"{URL}?date=2025-06-07")
+
+    assert response.status_code == 200
+    assert [(item["id"], item["group"], item["column"], item["columns"]) for item in response.json()] == [
+        (day[0].pk, 0, 0, 2),
+        (day[1].pk, 0, 1, 2),
+        (day[2].pk, 0, 0, 2),
+        (day[3].pk, 1, 0, 1),
+    ]
+    assert response.json()[0]["url"] == f"http://testserver/api/v1/appointments/{day[0].pk}/"
+
+    query = "start=2025-06-07T09:45:00Z&end=2025-06-07T10:15:00Z"
+    response = api_client.get(f"{URL}?{query}")
+    assert [item["id"] for item in response.json()] == [day[0].pk, day[1].pk, day[2].pk]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("query", ["", "?start=2025-06-07T09:00:00Z", "?date=tomorrow"])
+def test_layout_action_needs_a_range(api_client, query):
+    assert api_client.get(f"{URL}{query}").status_code == 400
+
+
+@pytest.mark.django_db
+def test_layout_is_cached_with_the_day(api_client, day):
+    url = f"{URL}?date=2025-06-07"
+    api_client.get(url)
+    api_client.get(url)
+    api_client.get("/api/v1/appointments/?date=2025-06-07")
+    assert get_stats() == {"hits": 1, "misses": 2}
+
+    Appointment.objects.filter(pk=day[3].pk).delete()
+    assert len(api_client.get(url).json()) == 3
+    assert get_stats() == {"hits": 1, "misses": 3}
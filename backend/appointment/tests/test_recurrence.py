@@ -0,0 +1,362 @@
+from datetime import datetime, timedelta
+from io import StringIO
+from urllib.parse import urlencode
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from zoneinfo import ZoneInfo
+
+from appointment.models import Appointment, Occurrence
+from appointment.occurrences import expand
+from appointment.recurrence import get_rule, get_series_end
+from employee.models import Employee
+
+# A Monday
+START = timezone.make_aware(datetime(2025, 6, 2, 9))
+URL = "/api/v1/appointments/"
+
+
+def at(days, hours=0):
+    return START + timedelta(days=days, hours=hours)
+
+
+def appointment_url(appointment):
+    return f"http://testserver{URL}{appointment.pk}/"
+
+
+def employee_url(employee):
+    return f"http://testserver/api/v1/employees/{employee.pk}/"
+
+
+@pytest.fixture
+def standup(employee):
+    """
+    A weekly 9:00-9:15 series without an end.
+    """
+    return Appointment.objects.create(
+        start_datetime=START,
+        end_datetime=START + timedelta(minutes=15),
+        title="Stand-up",
+        employee=employee,
+        recurrence="FREQ=WEEKLY",
+    )
+
+
+def window(lower, upper):
+    return urlencode({"start": lower.isoformat(), "end": upper.isoformat()})
+
+
+def starts(results):
+    return [(item["id"], item["start_datetime"], item["recurrence_id"]) for item in results]
+
+
+@pytest.mark.parametrize(
+    "recurrence",
+    ["", "FREQ=HOURLY", "FREQ=WEEKLY\nFREQ=DAILY", "DTSTART:20250101T000000Z", "FREQ=WEEKLY;COUNT=x", "FREQ=NEVER"],
+)
+def test_get_rule_rejects(recurrence):
+    with pytest.raises(ValueError):
+        get_rule(recurrence, START)
+
+
+def test_get_rule():
+    rules = get_rule("RRULE:FREQ=WEEKLY;BYDAY=WE;COUNT=2", START, exceptions=[at(2)])
+    # The start is always the first occurrence, exceptions are left out
+    assert list(rules) == [START, at(9)]
+
+
+def test_rules_follow_the_wall_clock_across_dst():
+    with timezone.override(ZoneInfo("Europe/Budapest")):
+        start = timezone.make_aware(datetime(2025, 10, 20, 9))
+        rules = get_rule("FREQ=WEEKLY;COUNT=2", start)
+        assert [timezone.localtime(value).hour for value in rules] == [9, 9]
+        assert rules[1].astimezone(ZoneInfo("UTC")) - rules[0].astimezone(ZoneInfo("UTC")) == timedelta(days=7, hours=1)
+
+
+def test_get_series_end():
+    assert get_series_end("FREQ=WEEKLY;COUNT=3", START, at(0, 1)) == at(14, 1)
+    assert get_series_end("FREQ=DAILY;UNTIL=20250605T090000Z", START, at(0, 1)) == at(3, 1)
+    assert get_series_end("FREQ=DAILY", START, at(0, 1)) is None
+
+
+@pytest.mark.django_db
+def test_series_span_covers_every_occurrence(employee):
+    series = Appointment.objects.create(
+        start_datetime=START, end_datetime=at(0, 1), title="Weekly", employee=employee, recurrence="FREQ=WEEKLY;COUNT=3"
+    )
+    series.refresh_from_db()
+    assert series.recurrence_end == at(14, 1)
+    assert (series.span.lower, series.span.upper) == (START, at(14, 1))
+
+    series.recurrence = ""
+    series.save()
+    series.refresh_from_db()
+    assert series.recurrence_end is None
+    assert (series.span.lower, series.span.upper) == (START, at(0, 1))
+
+
+@pytest.mark.django_db
+def test_list_expands_the_filtered_day(api_client, standup, employee):
+    single = Appointment.objects.create(
+        start_datetime=at(14, -1), end_datetime=at(14), title="Single", employee=employee
+    )
+
+    response = api_client.get(f"{URL}?date=2025-06-16")
+    assert response.status_code == 200
+    assert starts(response.json()["results"]) == [
+        (single.pk, "2025-06-16T08:00:00Z", None),
+        (standup.pk, "2025-06-16T09:00:00Z", "2025-06-16T09:00:00Z"),
+    ]
+    item = response.json()["results"][1]
+    assert item["url"] == appointment_url(standup)
+    assert (item["end_datetime"], item["recurrence"], item["title"]) == (
+        "2025-06-16T09:15:00Z",
+        "FREQ=WEEKLY",
+        "Stand-up",
+    )
+
+    assert api_client.get(f"{URL}?date=2025-06-17").json()["results"] == []
+    assert api_client.get(f"{URL}?date=2025-06-01").json()["results"] == []
+
+
+@pytest.mark.django_db
+def test_pages_merge_occurrences_with_single_appointments(api_client, standup, employee):
+    singles = [
+        Appointment.objects.create(
+            start_datetime=at(days, 1), end_datetime=at(days, 2), title="Single", employee=employee
+        )
+        for days in (0, 8)
+    ]
+
+    response = api_client.get(f"{URL}?page_size=2")
+    pages = [response.json()]
+    while pages[-1]["next"] and len(pages) < 3:
+        pages.append(api_client.get(pages[-1]["next"]).json())
+
+    assert [starts(page["results"]) for page in pages] == [
+        [(standup.pk, "2025-06-02T09:00:00Z", "2025-06-02T09:00:00Z"), (singles[0].pk, "2025-06-02T10:00:00Z", None)],
+        [(standup.pk, "2025-06-09T09:00:00Z", "2025-06-09T09:00:00Z"), (singles[1].pk, "2025-06-10T10:00:00Z", None)],
+        [
+            (standup.pk, "2025-06-16T09:00:00Z", "2025-06-16T09:00:00Z"),
+            (standup.pk, "2025-06-23T09:00:00Z", "2025-06-23T09:00:00Z"),
+        ],
+    ]
+
+    previous = api_client.get(pages[2]["previous"]).json()
+    assert starts(previous["results"]) == starts(pages[1]["results"])
+
+
+@pytest.mark.django_db
+def test_exceptions_and_overrides(api_client, standup, employee):
+    response = api_client.patch(f"{URL}{standup.pk}/", {"recurrence_exceptions": [at(7).isoformat()]}, format="json")
+    assert response.status_code == 200
+
+    moved = {
+        "start_datetime": at(14, 2).isoformat(),
+        "end_datetime": at(14, 3).isoformat(),
+        "title": "Late stand-up",
+        "employee": employee_url(employee),
+        "participants": [],
+        "series": appointment_url(standup),
+        "recurrence_id": at(14).isoformat(),
+    }
+    response = api_client.post(URL, moved, format="json")
+    assert response.status_code == 201
+    override = response.json()
+
+    response = api_client.get(f"{URL}?{window(at(6), at(22))}")
+    assert starts(response.json()["results"]) == [
+        (override["id"], "2025-06-16T11:00:00Z", "2025-06-16T09:00:00Z"),
+        (standup.pk, "2025-06-23T09:00:00Z", "2025-06-23T09:00:00Z"),
+    ]
+    assert response.json()["results"][0]["series"] == appointment_url(standup)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "changes, error",
+    [
+        ({"recurrence_id": at(1).isoformat()}, "recurrence_id"),
+        ({"recurrence": "FREQ=DAILY"}, "recurrence"),
+        ({"series": None}, "recurrence_id"),
+    ],
+)
+def test_override_validation(api_client, standup, employee, changes, error):
+    override = {
+        "start_datetime": at(7, 2).isoformat(),
+        "end_datetime": at(7, 3).isoformat(),
+        "title": "Moved",
+        "employee": employee_url(employee),
+        "participants": [],
+        "series": appointment_url(standup),
+        "recurrence_id": at(7).isoformat(),
+    }
+    response = api_client.post(URL, {**override, **changes}, format="json")
+    assert response.status_code == 400
+    assert list(response.json()) == [error]
+
+
+@pytest.mark.django_db
+def test_invalid_rule_is_rejected(api_client, standup):
+    response = api_client.patch(f"{URL}{standup.pk}/", {"recurrence": "FREQ=MINUTELY"}, format="json")
+    assert response.status_code == 400
+    assert response.json() == {"recurrence": ["Appointments can repeat daily, weekly, monthly or yearly."]}
+
+
+@pytest.mark.django_db
+def test_series_occurrences_conflict(api_client, standup, employee):
+    booking = {
+        "start_datetime": at(21).isoformat(),
+        "end_datetime": at(21, 1).isoformat(),
+        "title": "Clash",
+        "employee": employee_url(employee),
+        "participants": [],
+    }
+    response = api_client.post(URL, booking, format="json")
+    assert response.status_code == 400
+    assert response.json()["employee"] == [
+        f'Employee {employee.pk} is already booked in appointment {standup.pk} "Stand-up" '
+        "(2025-06-23 09:00 - 2025-06-23 09:15)."
+    ]
+
+    # An override may take the place of its own occurrence
+    response = api_client.post(
+        URL, {**booking, "series": appointment_url(standup), "recurrence_id": at(21).isoformat()}, format="json"
+    )
+    assert response.status_code == 201
+
+    conflicts = api_client.get(f"{URL}conflicts/?{window(at(28), at(28, 1))}&employees={employee.pk}").json()
+    assert [(item["id"], item["recurrence_id"]) for item in conflicts] == [(standup.pk, "2025-06-30T09:00:00Z")]
+
+
+@pytest.mark.django_db
+def test_every_occurrence_of_a_written_series_is_checked(api_client, standup, employee):
+    other = Employee.objects.create(name="Other", email="other@testmail.com")
+    later = Appointment.objects.create(start_datetime=at(8), end_datetime=at(8, 1), title="Later", employee=other)
+    series = {
+        "start_datetime": at(1).isoformat(),
+        "end_datetime": at(1, 1).isoformat(),
+        "title": "Weekly",
+        "employee": employee_url(other),
+        "participants": [],
+        "recurrence": "FREQ=WEEKLY",
+    }
+    response = api_client.post(URL, series, format="json")
+    assert response.status_code == 400
+    assert response.json() == {
+        "employee": [
+            f'Employee {other.pk} is already booked in appointment {later.pk} "Later" '
+            "(2025-06-10 09:00 - 2025-06-10 10:00)."
+        ]
+    }
+
+    # Its second occurrence meets the first of another series
+    response = api_client.post(
+        URL,
+        {**series, "start_datetime": at(-7).isoformat(), "end_datetime": at(-7, 1).isoformat()},
+        format="json",
+    )
+    assert response.status_code == 201
+    response = api_client.post(
+        URL,
+        {
+            **series,
+            "start_datetime": at(-7).isoformat(),
+            "end_datetime": at(-7, 1).isoformat(),
+            "employee": employee_url(employee),
+            "recurrence": "FREQ=WEEKLY;COUNT=2",
+        },
+        format="json",
+    )
+    assert response.status_code == 400
+    assert response.json() == {
+        "employee": [
+            f'Employee {employee.pk} is already booked in appointment {standup.pk} "Stand-up" '
+            "(2025-06-02 09:00 - 2025-06-02 09:15)."
+        ]
+    }
+
+    # Edits expand the series again
+    response = api_client.patch(f"{URL}{standup.pk}/", {"participants": [employee_url(other)]}, format="json")
+    assert response.status_code == 400
+    assert len(response.json()["participants"]) > 1
+
+
+@pytest.mark.django_db
+def test_bulk_update_checks_every_occurrence_of_a_series(api_client, standup, employee):
+    later = Appointment.objects.create(
+        start_datetime=at(15, 3), end_datetime=at(15, 4), title="Later", employee=employee
+    )
+    item = {"id": standup.pk, "start_datetime": at(1, 3).isoformat(), "end_datetime": at(1, 4).isoformat()}
+
+    response = api_client.patch(f"{URL}bulk/", [item], format="json")
+    assert response.status_code == 400
+    assert response.json() == {
+        "0": {
+            "employee": [
+                f'Employee {employee.pk} is already booked in appointment {later.pk} "Later" '
+                "(2025-06-17 12:00 - 2025-06-17 13:00)."
+            ]
+        }
+    }
+
+    # Moved by the same request, the appointment is compared with its new time
+    moved = {"id": later.pk, "start_datetime": at(16, 3).isoformat(), "end_datetime": at(16, 4).isoformat()}
+    response = api_client.patch(f"{URL}bulk/", [item, moved], format="json")
+    assert response.status_code == 200
+
+
+@pytest.mark.django_db
+def test_closest_returns_the_next_occurrence(api_client, standup, employee, monkeypatch):
+    monkeypatch.setattr(timezone, "now", lambda: at(10))
+    Appointment.objects.create(start_datetime=at(15), end_datetime=at(15, 1), title="Later", employee=employee)
+
+    response = api_client.get(f"{URL}closest/")
+    assert (response.json()["id"], response.json()["start_datetime"]) == (standup.pk, "2025-06-16T09:00:00Z")
+
+
+@pytest.mark.django_db
+def test_layout_includes_occurrences(api_client, standup, employee):
+    other = Appointment.objects.create(start_datetime=at(7), end_datetime=at(7, 1), title="Clash", employee=None)
+
+    response = api_client.get(f"{URL}layout/?date=2025-06-09")
+    assert [(item["id"], item["recurrence_id"], item["column"], item["columns"]) for item in response.json()] == [
+        (standup.pk, "2025-06-09T09:00:00Z", 0, 2),
+        (other.pk, None, 1, 2),
+    ]
+
+
+@pytest.mark.django_db
+def test_series_without_an_end_are_expanded_as_far_as_needed(standup, django_assert_num_queries):
+    with django_assert_num_queries(2):
+        occurrences = expand(Appointment.objects.all(), (at(700), None), limit=3)
+
+    assert [occurrence.start_datetime for occurrence in occurrences] == [at(700), at(707), at(714)]
+    assert all(occurrence.recurrence_id == occurrence.start_datetime for occurrence in occurrences)
+    assert {occurrence.pk for occurrence in occurrences} == {standup.pk}
+
+
+@pytest.mark.django_db
+def test_materialized_occurrences(api_client, standup):
+    output = StringIO()
+    call_command("materialize_occurrences", start=START.date(), days=28, stdout=output)
+    assert output.getvalue() == "Materialized 1 series from 2025-06-02 to 2025-06-30.\n"
+    assert list(Occurrence.objects.values_list("start_datetime", flat=True)) == [at(0), at(7), at(14), at(21)]
+
+    url = f"{URL}?date=2025-06-16"
+    with CaptureQueriesContext(connection) as queries:
+        response = api_client.get(url)
+    assert starts(response.json()["results"]) == [(standup.pk, "2025-06-16T09:00:00Z", "2025-06-16T09:00:00Z")]
+    assert any('"appointment_occurrence"' in query["sql"] for query in queries.captured_queries)
+
+    # Outside the window, and after an edit, the rule is expanded again
+    assert len(api_client.get(f"{URL}?date=2025-06-30").json()["results"]) == 1
+    standup.title = "Daily"
+    standup.recurrence = "FREQ=DAILY"
+    standup.save()
+    assert not Occurrence.objects.exists()
+    response = api_client.get(f"{URL}?{window(at(14), at(16))}")
+    assert len(response.json()["results"]) == 2
@@ -0,0 +1,178 @@
+from datetime import timedelta
+
+import pytest
+from django.db import connection, transaction
+from django.utils import timezone
+from rest_framework import status
+
+from appointment.models import Appointment
+from appointment.upcoming import NEXT_SQL, find_closest, find_next
+from department.models import Department
+from employee.models import Employee
+
+NOW = timezone.make_aware(timezone.datetime(2025, 6, 7, 12))
+
+
+def at(hours):
+    return NOW + timedelta(hours=hours)
+
+
+def book(owner, start, end, participants=(), **kwargs):
+    appointment = Appointment.objects.create(
+        start_datetime=at(start), end_datetime=at(end), title=f"{owner.name} {start}", employee=owner, **kwargs
+    )
+    appointment.participants.set(participants)
+    return appointment
+
+
+@pytest.fixture
+def people(db):
+    department = Department.objects.create(name="Roster")
+    return [
+        Employee.objects.create(name=f"Person {n}", email=f"person{n}@testmail.com", department=department)
+        for n in range(4)
+    ]
+
+
+@pytest.mark.django_db
+def test_find_next(people):
+    owner, attendee, running, idle = people
+    book(owner, -3, -2)
+    later = book(owner, 5, 6)
+    first = book(owner, 2, 3, participants=[attendee])
+    book(attendee, 4, 5)
+    current = book(running, -1, 1)
+    book(running, 1, 2)
+
+    result = find_next(Employee.objects.filter(pk__in=[p.pk for p in people]), NOW)
+
+    assert [(employee_id, row and row["pk"]) for employee_id, row in result] == [
+        (owner.pk, first.pk),
+        (attendee.pk, first.pk),
+        (running.pk, current.pk),
+        (idle.pk, None),
+    ]
+    assert result[0][1]["start_datetime"] == at(2)
+    assert later.pk not in {row and row["pk"] for _, row in result}
+
+
+@pytest.mark.django_db
+def test_find_next_includes_series_occurrences(people):
+    owner, attendee, other, _ = people
+    book(owner, 30, 31)
+    series = book(owner, -48, -47, participants=[attendee], recurrence="FREQ=DAILY")
+    book(other, 30, 31)
+
+    result = dict(find_next(Employee.objects.filter(pk__in=[owner.pk, attendee.pk, other.pk]), NOW))
+
+    for employee in (owner, attendee):
+        assert result[employee.pk]["pk"] == series.pk
+        assert result[employee.pk]["recurrence_id"] == at(0)
+    assert "recurrence_id" not in result[other.pk]
+
+
+@pytest.mark.django_db
+def test_find_next_query_count(people, django_assert_num_queries):
+    book(people[0], 1, 2, participants=people[1:])
+    employees = Employee.objects.filter(department__name="Roster")
+
+    # next single appointments, recurring ones
+    with django_assert_num_queries(2):
+        find_next(employees, NOW)
+
+    book(people[0], 5, 6, recurrence="FREQ=DAILY", participants=people[1:])
+    # and the series' rows and participants
+    with django_assert_num_queries(4):
+        find_next(employees, NOW)
+
+
+@pytest.mark.django_db
+def test_next_sql_uses_employee_start_index(people):
+    staff = Employee.objects.bulk_create(
+        Employee(name=f"Staff {n}", email=f"staff{n}@testmail.com", department=people[0].department) for n in range(100)
+    )
+    Appointment.objects.bulk_create(
+        Appointment(start_datetime=at(hours), end_datetime=at(hours + 1), title="Shift", employee=employee)
+        for hours in range(-40, 40, 2)
+        for employee in staff
+    )
+    sql = NEXT_SQL.format(
+        employee=Employee._meta.db_table,
+        appointment=Appointment._meta.db_table,
+        participants=Appointment.participants.through._meta.db_table,
+        employees="%s",
+    )
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute("ANALYZE " + Appointment._meta.db_table)
+        cursor.execute("EXPLAIN " + sql, [NOW, NOW, NOW, NOW, staff[0].pk])
+        plan = "\n".join(row[0] for row in cursor.fetchall())
+
+    assert "appointment_employee_start_idx" in plan
+
+
+@pytest.mark.django_db
+def test_find_closest(people):
+    assert find_closest(NOW) is None
+
+    book(people[0], -3, -2)
+    upcoming = book(people[1], 1, 2)
+    assert find_closest(NOW)["pk"] == upcoming.pk
+
+    running = book(people[2], -1, 3)
+    assert find_closest(NOW)["pk"] == running.pk
+
+    series = book(people[3], -47.5, -47, recurrence="FREQ=DAILY")
+    assert find_closest(NOW)["pk"] == running.pk
+    running.delete()
+    assert find_closest(NOW)["pk"] == series.pk
+
+
+@pytest.mark.django_db
+def test_next_endpoint(api_client, people):
+    owner, attendee, _, idle = people
+    start = timezone.now() + timedelta(hours=1)
+    appointment = Appointment.objects.create(
+        start_datetime=start, end_datetime=start + timedelta(hours=1), title="Next", employee=owner
+    )
+    appointment.participants.set([attendee])
+
+    response = api_client.get(f"/api/v1/appointments/next/?employees={owner.pk}&employees={idle.pk}")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == [
+        {
+            "employee": f"http://testserver/api/v1/employees/{owner.pk}/",
+            "appointment": api_client.get(f"/api/v1/appointments/{appointment.pk}/").json(),
+        },
+        {"employee": f"http://testserver/api/v1/employees/{idle.pk}/", "appointment": None},
+    ]
+
+    response = api_client.get(f"/api/v1/appointments/next/?department={owner.department_id}&fields=id")
+    assert [item["appointment"] for item in response.json()] == [
+        {"id": appointment.pk},
+        {"id": appointment.pk},
+        None,
+        None,
+    ]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("query", ["", "?employees=1&department=1", "?employees=x"])
+def test_next_endpoint_validates_query(api_client, query):
+    response = api_client.get(f"/api/v1/appointments/next/{query}")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_next_endpoint_query_count_is_constant(api_client, staffed_appointment_factory, django_assert_num_queries):
+    employees = []
+    for count in (1, 10):
+        while len(employees) < count:
+            appointment = staffed_appointment_factory(participants=2)
+            employees += [appointment.employee_id, *appointment.participants.values_list("pk", flat=True)]
+        query = "&".join(f"employees={pk}" for pk in employees)
+
+        # next appointments, recurring ones, related table states, appointments with their owners, participants
+        with django_assert_num_queries(5):
+            response = api_client.get(f"/api/v1/appointments/next/?{query}")
+        assert all(item["appointment"] for item in response.json())
@@ -1,6 +1,8 @@
 from datetime import timedelta
 
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from rest_framework import status
 
@@ -75,3 +77,90 @@ def test_appointment_closest(api_client, employee):
     data = response.json()
     assert data["title"] == "Future Appointment"
     assert data["id"] == future_appointment.id
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("url", ["/api/v1/appointments/", "/api/v1/appointments/?date=2025-06-07"])
+def test_appointment_list_query_count_is_constant(assert_constant_queries, staffed_appointment_factory, url):
+    start = timezone.make_aware(timezone.datetime(2025, 6, 7, 10))
+    assert_constant_queries(url, lambda: staffed_appointment_factory(start=start))
+
+
+@pytest.mark.django_db
+def test_appointment_detail_query_count_is_constant(api_client, staffed_appointment_factory, django_assert_num_queries):
+    appointment = staffed_appointment_factory(participants=1)
+    crowded = staffed_appointment_factory(participants=5)
+
+    # the appointment's validator aggregate, related table states, the appointment with its owner, participants
+    with django_assert_num_queries(4):
+        api_client.get(f"/api/v1/appointments/{appointment.pk}/")
+    with django_assert_num_queries(4):
+        api_client.get(f"/api/v1/appointments/{crowded.pk}/")
+
+
+@pytest.mark.django_db
+def test_appointment_closest_query_count_is_constant(
+    api_client, staffed_appointment_factory, django_assert_num_queries
+):
+    staffed_appointment_factory(participants=6)
+
+    # closest single appointment and series, related table states, the appointment with its owner, participants
+    with django_assert_num_queries(5):
+        response = api_client.get("/api/v1/appointments/closest/")
+    assert len(response.json()["participants"]) == 6
+
+
+@pytest.mark.django_db
+def test_appointment_list_narrows_queries_to_requested_fields(api_client, staffed_appointment_factory):
+    staffed_appointment_factory()
+
+    with CaptureQueriesContext(connection) as ctx:
+        response = api_client.get("/api/v1/appointments/?fields=id,title")
+
+    assert list(response.json()["results"][0]) == ["id", "title"]
+    # table state, page, recurring series
+    assert len(ctx.captured_queries) == 3
+    sql = ctx.captured_queries[1]["sql"]
+    assert "JOIN" not in sql
+    assert '"description"' not in sql
+
+
+@pytest.mark.django_db
+def test_appointment_list_collapsed_participants_load_only_ids(api_client, staffed_appointment_factory):
+    appointment = staffed_appointment_factory()
+
+    with CaptureQueriesContext(connection) as ctx:
+        response = api_client.get("/api/v1/appointments/?fields=id,participants")
+
+    participants = response.json()["results"][0]["participants"]
+    assert participants == [
+        f"http://testserver/api/v1/employees/{p.pk}/" for p in appointment.participants.order_by("pk")
+    ]
+    # table states, page, participant ids, recurring series
+    assert len(ctx.captured_queries) == 4
+    assert '"employee_employee"."name"' not in ctx.captured_queries[2]["sql"]
+
+
+# Per endpoint, with six appointments of two participants each
+QUERY_BUDGETS = [
+    ("/api/v1/appointments/", 4),
+    ("/api/v1/appointments/?date={date}", 4),
+    ("/api/v1/appointments/?fields=id,title,participants.name&expand=employee", 4),
+    ("/api/v1/appointments/{appointment}/", 4),
+    ("/api/v1/appointments/layout/?date={date}", 2),
+    ("/api/v1/appointments/conflicts/?start={date}T00:00:00Z&end={date}T23:59:59Z&employees={employee}", 1),
+    ("/api/v1/appointments/closest/", 5),
+    ("/api/v1/appointments/next/?employees={employee}", 5),
+]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("url, budget", QUERY_BUDGETS)
+def test_appointment_endpoint_query_budgets(api_client, staffed_appointment_factory, assert_query_budget, url, budget):
+    start = (timezone.now() + timedelta(days=1)).replace(hour=8, minute=0, second=0, microsecond=0)
+    appointments = [staffed_appointment_factory(start=start + timedelta(hours=n)) for n in range(6)]
+    url = url.format(date=start.date(), appointment=appointments[0].pk, employee=appointments[0].employee_id)
+
+    with assert_query_budget(budget):
+        response = api_client.get(url)
+    assert response.status_code == 200, response.content
@@ -0,0 +1,129 @@
+from collections import defaultdict
+
+from django.db import connection
+from django.db.backends.postgresql.psycopg_any import DateTimeTZRange
+from django.db.models import Q
+
+from employee.models import Employee
+
+from .models import Appointment
+from .occurrences import expand, first_occurrences, split_series
+
+COLUMNS = ("pk", "start_datetime", "end_datetime", "updated_at")
+
+# The first single appointment of each employee ending after now, as owner or participant. Owned ones are
+# two short scans of the (employee, start_datetime, id) index: owned appointments never overlap, so only
+# the last one started before now can still be running.
+NEXT_SQL = """
+SELECT e.id, n.id, n.start_datetime, n.end_datetime, n.updated_at
+FROM {employee} e
+LEFT JOIN LATERAL (
+    SELECT * FROM (
+        (
+            SELECT a.id, a.start_datetime, a.end_datetime, a.updated_at
+            FROM {appointment} a
+            WHERE a.employee_id = e.id AND a.recurrence = '' AND a.start_datetime >= %s
+            ORDER BY a.start_datetime, a.id
+            LIMIT 1
+        )
+        UNION ALL
+        SELECT * FROM (
+            SELECT a.id, a.start_datetime, a.end_datetime, a.updated_at
+            FROM {appointment} a
+            WHERE a.employee_id = e.id AND a.recurrence = '' AND a.start_datetime < %s
+            ORDER BY a.start_datetime DESC, a.id DESC
+            LIMIT 1
+        ) running
+        WHERE running.end_datetime > %s
+        UNION ALL
+        (
+            SELECT a.id, a.start_datetime, a.end_datetime, a.updated_at
+            FROM {participants} p JOIN {appointment} a ON a.id = p.appointment_id
+            WHERE p.employee_id = e.id AND a.recurrence = '' AND a.end_datetime > %s
+            ORDER BY a.start_datetime, a.id
+            LIMIT 1
+        )
+    ) candidates
+    ORDER BY start_datetime, id
+    LIMIT 1
+) n ON true
+WHERE e.id IN ({employees})
+ORDER BY e.id
+"""
+
+
+def find_next(employees, now):
+    """
+    Return [(employee id, next appointment or None)] for the Employee queryset `employees`, in id order.
+
+    The next appointment is the first one the employee owns or attends that ends after `now`, occurrences of
+    recurring appointments included, as a `values()` dict of COLUMNS (and `recurrence_id` for occurrences).
+    Single appointments are found with one LATERAL query whose cost follows the number of employees, not
+    their history, see NEXT_SQL. Recurring ones are expanded up to their first occurrence after `now`.
+
+    Costs two queries, and two more when some of the employees have recurring appointments.
+    """
+    employees_sql, employees_params = employees.values("pk").query.sql_with_params()
+    sql = NEXT_SQL.format(
+        employee=connection.ops.quote_name(Employee._meta.db_table),
+        appointment=connection.ops.quote_name(Appointment._meta.db_table),
+        participants=connection.ops.quote_name(Appointment.participants.through._meta.db_table),
+        employees=employees_sql,
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [now, now, now, now, *employees_params])
+        rows = cursor.fetchall()
+
+    upcoming = {
+        employee_id: dict(zip(COLUMNS, columns)) if columns[0] is not None else None for employee_id, *columns in rows
+    }
+    for employee_id, occurrence in _next_occurrences(list(upcoming), now):
+        current = upcoming[employee_id]
+        if current is None or _key(occurrence) < _key(current):
+            upcoming[employee_id] = occurrence
+    return list(upcoming.items())
+
+
+def find_closest(now):
+    """
+    Return the first appointment or occurrence ending after `now` as `find_next` does, or None.
+
+    Upcoming appointments are a range scan of the (start_datetime, id) index and running ones a lookup of
+    the time_range GiST index, so neither reads past appointments.
+    """
+    single, series = split_series(Appointment.objects.all())
+    upcoming = single.filter(start_datetime__gte=now).order_by("start_datetime", "id").values(*COLUMNS)[:1]
+    running = single.filter(time_range__contains=now).order_by("start_datetime", "id").values(*COLUMNS)[:1]
+    series = series.filter(span__overlap=DateTimeTZRange(now, None))
+    candidates = [*upcoming.union(running, all=True), *expand(series.values(*COLUMNS), (now, None), limit=1)]
+    return min(candidates, key=_key, default=None)
+
+
+def _next_occurrences(employee_ids, now):
+    # (employee id, first occurrence) of the recurring appointments each employee owns or attends
+    if not employee_ids:
+        return []
+    through = Appointment.participants.through
+    attended = through.objects.filter(employee_id__in=employee_ids)
+    series = split_series(Appointment.objects.all())[1].filter(
+        Q(employee_id__in=employee_ids) | Q(pk__in=attended.values("appointment_id")),
+        span__overlap=DateTimeTZRange(now, None),
+    )
+    occurrences = first_occurrences(series.values(*COLUMNS, "employee_id"), (now, None))
+    if not occurrences:
+        return []
+
+    staff = defaultdict(set)
+    for appointment_id, employee_id in attended.filter(
+        appointment_id__in=[occurrence["pk"] for occurrence in occurrences]
+    ).values_list("appointment_id", "employee_id"):
+        staff[appointment_id].add(employee_id)
+    return [
+        (employee_id, {key: value for key, value in occurrence.items() if key != "employee_id"})
+        for occurrence in occurrences
+        for employee_id in sorted(staff[occurrence["pk"]] | {occurrence["employee_id"]} & set(employee_ids))
+    ]
+
+
+def _key(row):
+    return row["start_datetime"], row["pk"]
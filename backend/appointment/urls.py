@@ -1,11 +1,13 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from .views import AppointmentViewSet
+from .views import AppointmentViewSet, appointment_events
 
 router = DefaultRouter()
 router.register(r"appointments", AppointmentViewSet)
 
 urlpatterns = [
+    # Ahead of the router, which would read "events" as an appointment id
+    path("appointments/events/", appointment_events, name="appointment-events"),
     path("", include(router.urls)),
 ]
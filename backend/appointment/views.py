@@ -1,25 +1,76 @@
+import heapq
+
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
 from django.utils import timezone
+from django.views.decorators.http import require_GET
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
-from .filters import AppointmentFilter
+from core.asyncread import AsyncReadMixin
+from core.conditional import ConditionalGetMixin
+from core.events import stream
+from core.export import ExportMixin
+from core.fastpath import FastReadMixin, UrlBuilder
+from core.prefetch import PrefetchPlanMixin, plan_queryset
+from core.sync import DeltaSyncMixin
+from employee.models import Employee
+
+from .archive import find_archived
+from .cache import DayCacheMixin
+from .conflicts import find_conflicts
+from .events import matches
+from .filters import AppointmentFilter, get_bounded_window
+from .layout import compute_layout
 from .models import Appointment
-from .serializers import AppointmentReadSerializer, AppointmentWriteSerializer
+from .occurrences import expand, iter_window, make_occurrence, split_series
+from .pagination import AppointmentPagination, ArchivedAppointmentPagination
+from .serializers import (
+    AppointmentBulkDeleteSerializer,
+    AppointmentBulkItemSerializer,
+    AppointmentConflictSerializer,
+    AppointmentExportSerializer,
+    AppointmentReadSerializer,
+    AppointmentWriteSerializer,
+    ArchivedAppointmentSerializer,
+    ConflictQuerySerializer,
+    EventQuerySerializer,
+    NextQuerySerializer,
+)
+from .upcoming import find_closest, find_next
 
 
-class AppointmentViewSet(viewsets.ModelViewSet):
-    queryset = Appointment.objects.select_related("employee").prefetch_related("participants")
+class AppointmentViewSet(
+    DeltaSyncMixin,
+    AsyncReadMixin,
+    ConditionalGetMixin,
+    DayCacheMixin,
+    ExportMixin,
+    FastReadMixin,
+    PrefetchPlanMixin,
+    viewsets.ModelViewSet,
+):
+    queryset = Appointment.objects.all()
     filter_backends = [DjangoFilterBackend]
     filterset_class = AppointmentFilter
+    pagination_class = AppointmentPagination
+    export_serializer_class = AppointmentExportSerializer
     _saved_instance = None
 
     def get_serializer_class(self):
         if self.action in ["list", "retrieve"]:
             return AppointmentReadSerializer
+        if self.action == "export":
+            return self.export_serializer_class
+        if self.action == "bulk":
+            return AppointmentBulkItemSerializer
         return AppointmentWriteSerializer
 
+    def get_read_serializer(self, *args, **kwargs):
+        return AppointmentReadSerializer(*args, context=self.get_serializer_context(), **kwargs)
+
     def perform_create(self, serializer):
         instance = serializer.save()
         self._saved_instance = instance
@@ -30,29 +81,224 @@ class AppointmentViewSet(viewsets.ModelViewSet):
 
     def create(self, request, *args, **kwargs):
         super().create(request, *args, **kwargs)
-        read_serializer = AppointmentReadSerializer(self._saved_instance, context={"request": request})
+        read_serializer = self.get_read_serializer(self._reload(self._saved_instance))
         return Response(read_serializer.data, status=status.HTTP_201_CREATED)
 
     def update(self, request, *args, **kwargs):
         super().update(request, *args, **kwargs)
-        read_serializer = AppointmentReadSerializer(self._saved_instance, context={"request": request})
+        read_serializer = self.get_read_serializer(self._reload(self._saved_instance))
         return Response(read_serializer.data)
 
+    def use_async_read(self):
+        # Cached days are served by the sync path, which waits for other workers rebuilding them
+        return super().use_async_read() and (self.action != "list" or self.get_cached_day() is None)
+
+    def get_bounded_window(self):
+        """
+        Return the (lower, upper) range the filters read, requiring a `date`, or a `start` and an `end`.
+        """
+        return get_bounded_window(self.request.query_params)
+
+    def get_export_items(self, queryset):
+        single, series = split_series(queryset)
+        occurrences = iter_window(series, self.get_bounded_window())
+        return heapq.merge(
+            super().get_export_items(single), occurrences, key=lambda item: (item.start_datetime, item.pk)
+        )
+
+    def _reload(self, instance):
+        return plan_queryset(Appointment.objects.filter(pk=instance.pk), self.get_read_serializer(), narrow=True).get()
+
+    @action(detail=False, methods=["post", "patch", "delete"], url_path="bulk")
+    def bulk(self, request):
+        """
+        Create (POST), update (PATCH) or delete (DELETE) many Appointments in one transaction.
+
+        POST and PATCH take a list of appointments (PATCH items need an `id`) and return the url and id
+        of each one in order. DELETE takes {"ids": [...]}. Invalid requests change nothing and report
+        errors per item.
+        """
+
+        if request.method == "DELETE":
+            serializer = AppointmentBulkDeleteSerializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+            return Response(status=status.HTTP_204_NO_CONTENT)
+
+        serializer = self.get_serializer(data=request.data, many=True, partial=request.method == "PATCH")
+        serializer.is_valid(raise_exception=True)
+        appointments = serializer.save()
+
+        urls = UrlBuilder(request, self.format_kwarg)
+        data = [
+            {"url": urls.get("appointment-detail", appointment.pk), "id": appointment.pk}
+            for appointment in appointments
+        ]
+        return Response(data, status=status.HTTP_200_OK if serializer.partial else status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=["get"], url_path="conflicts")
+    def conflicts(self, request):
+        """
+        Return the Appointments that would conflict with booking `employees` (repeated ids) from `start` to `end`.
+
+        `exclude` leaves out the appointment being edited. Each conflict names the employee it is about.
+        """
+
+        query = ConflictQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+        conflicts = find_conflicts([(params["employees"], params["start"], params["end"], params.get("exclude"))])
+        serializer = AppointmentConflictSerializer(conflicts, many=True, context=self.get_serializer_context())
+        return Response(serializer.data)
+
+    @action(detail=False, methods=["get"], url_path="layout")
+    def layout(self, request):
+        """
+        Return where each Appointment of a `date`, or of a `start` to `end` range, goes in a day view.
+
+        Items come in start order with the appointment's overlap `group`, its `column` and the group's
+        `columns` count, occurrences of recurring appointments also with their `recurrence_id`. Responses
+        for a `date` are cached with the day's list.
+        """
+
+        window = self.get_bounded_window()
+        return self.get_day_response(request, lambda: self._render_layout(window))
+
+    def _render_layout(self, window):
+        single, series = split_series(self.filter_queryset(Appointment.objects.all()))
+        rows = [
+            *single.values("pk", "start_datetime", "end_datetime"),
+            *expand(series.values("pk", "start_datetime", "end_datetime"), window),
+        ]
+        rows.sort(key=lambda row: (row["start_datetime"], row["pk"]))
+        slots = compute_layout((index, row["start_datetime"], row["end_datetime"]) for index, row in enumerate(rows))
+
+        urls = UrlBuilder(self.request, self.format_kwarg)
+        data = [
+            {
+                "url": urls.get("appointment-detail", row["pk"]),
+                "id": row["pk"],
+                "recurrence_id": row.get("recurrence_id"),
+                "group": slots[index].group,
+                "column": slots[index].column,
+                "columns": slots[index].columns,
+            }
+            for index, row in enumerate(rows)
+        ]
+        return Response(data)
+
     @action(detail=False, methods=["get"], url_path="closest")
     def closest(self, request):
         """
-        Return the nearest future Appointment.
+        Return the nearest future Appointment, or occurrence of a recurring one.
         """
 
-        result = (
-            Appointment.objects.select_related("employee")
-            .prefetch_related("participants")
-            .filter(end_datetime__gte=timezone.now())
-            .order_by("start_datetime")
-            .first()
-        )
+        closest = find_closest(timezone.now())
+
+        serializer = self.get_read_serializer()
+        key = (closest["pk"], closest["updated_at"], closest["start_datetime"]) if closest else (None, None, None)
+        state = [("closest", *key), *self.get_related_state(Appointment, serializer)]
+        return self.conditional_response(state, self._render_closest, closest, serializer)
+
+    @action(detail=False, methods=["get"], url_path="next")
+    def next_appointments(self, request):
+        """
+        Return the next Appointment, or occurrence of a recurring one, of each of `employees` (repeated ids) or
+        of a `department`'s employees, as owner or participant.
+
+        Items come in employee id order with the `employee` and its `appointment`, null when there is none.
+        """
+
+        query = NextQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+        if "department" in params:
+            employees = Employee.objects.filter(department_id=params["department"])
+        else:
+            employees = Employee.objects.filter(pk__in=params["employees"])
+        upcoming = find_next(employees, timezone.now())
+
+        serializer = self.get_read_serializer()
+        keys = tuple((employee_id, row and (row["pk"], row["start_datetime"])) for employee_id, row in upcoming)
+        last_modified = max((row["updated_at"] for _, row in upcoming if row), default=None)
+        state = [("next", keys, last_modified), *self.get_related_state(Appointment, serializer)]
+        return self.conditional_response(state, self._render_next, upcoming, serializer)
+
+    def _render_next(self, upcoming, serializer):
+        pks = {row["pk"] for _, row in upcoming if row}
+        loaded = {
+            appointment.pk: appointment
+            for appointment in plan_queryset(Appointment.objects.filter(pk__in=pks), serializer, narrow=True)
+        }
+
+        appointments = []
+        for _, row in upcoming:
+            appointment = loaded.get(row["pk"]) if row else None
+            if appointment and row.get("recurrence_id"):
+                appointment = make_occurrence(appointment, row["start_datetime"], row["end_datetime"])
+            appointments.append(appointment)
+        rendered = iter(self.get_read_serializer([item for item in appointments if item], many=True).data)
+
+        urls = UrlBuilder(self.request, self.format_kwarg)
+        data = [
+            {
+                "employee": urls.get("employee-detail", employee_id),
+                "appointment": next(rendered) if appointment else None,
+            }
+            for (employee_id, _), appointment in zip(upcoming, appointments)
+        ]
+        return Response(data)
+
+    @action(detail=False, methods=["get"], url_path="archived")
+    def archived(self, request):
+        """
+        Return the archived Appointments overlapping a `date`, or a `start` to `end` range, a page at a time.
+
+        Only the archive partitions of months that can hold them are read. Recurring appointments come as their
+        series rows, followed by their overrides, not expanded. Months exported to files are left out until
+        `archive_appointments --restore` loads them back.
+        """
+
+        lower, upper = self.get_bounded_window()
+        paginator = ArchivedAppointmentPagination()
+        page = paginator.paginate_queryset(find_archived(lower, upper), request, view=self)
+        return paginator.get_paginated_response(ArchivedAppointmentSerializer(page, many=True).data)
+
+    def _render_closest(self, closest, serializer):
+        result = None
+        if closest:
+            result = plan_queryset(Appointment.objects.filter(pk=closest["pk"]), serializer, narrow=True).first()
 
         if result:
-            serializer = AppointmentReadSerializer(result, context={"request": request})
+            if closest.get("recurrence_id"):
+                result = make_occurrence(result, closest["start_datetime"], closest["end_datetime"])
+            serializer = self.get_read_serializer(result)
             return Response(serializer.data, status=status.HTTP_200_OK)
         return Response({"detail": "No future appointments found."}, status=status.HTTP_404_NOT_FOUND)
+
+
+@require_GET
+async def appointment_events(request):
+    """
+    Stream appointment.created, appointment.updated and appointment.deleted events as Server-Sent Events,
+    optionally only those of a `date` or concerning any of `employees` (repeated ids).
+
+    Events carry the appointment's id, days and employees (see appointment.events.publish), clients refetch
+    what they show with their ETags, and everything after a `reset` event. Served under ASGI only, a WSGI
+    worker would be tied up for as long as the stream stays open.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse(
+            {"detail": "Event streams are only served under ASGI."}, status=status.HTTP_501_NOT_IMPLEMENTED
+        )
+    query = EventQuerySerializer(data=request.GET)
+    if not query.is_valid():
+        return JsonResponse(query.errors, status=status.HTTP_400_BAD_REQUEST)
+    params = query.validated_data
+    response = StreamingHttpResponse(
+        stream(matches(params.get("date"), params.get("employees", ()))), content_type="text/event-stream"
+    )
+    response["Cache-Control"] = "no-cache"
+    # Keep nginx from buffering the stream
+    response["X-Accel-Buffering"] = "no"
+    return response
@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+# Serve reads from the async views, see settings.ASYNC_READS
+os.environ.setdefault("ASYNC_READS", "1")
 
 application = get_asgi_application()
@@ -0,0 +1,37 @@
+"""
+Gunicorn configuration for the production serving profile.
+
+    gunicorn -c config/gunicorn.py config.asgi:application
+
+Uvicorn workers serve the ASGI application, forked from an arbiter that loaded it once. Set DB_POOL=1 so
+every worker reuses connections from a pool, see config.settings.
+"""
+
+import multiprocessing
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+
+# Worker processes, each with its own event loop and connection pool
+workers = int(os.getenv("WEB_CONCURRENCY", str(multiprocessing.cpu_count() * 2 + 1)))
+
+worker_class = "uvicorn_worker.UvicornWorker"
+
+# Import Django once in the arbiter, workers start faster and share its memory
+preload_app = True
+
+# Restart workers after this many requests, spread so they do not all restart at once
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "10000"))
+max_requests_jitter = max_requests // 10
+
+# Seconds workers get to finish their requests on restart, event streams end with it
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+
+
+def pre_fork(server, worker):
+    # Workers must not share connections opened while loading the application
+    from django.db import connections
+
+    connections.close_all()
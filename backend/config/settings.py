@@ -37,9 +37,11 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "django_filters",
     "corsheaders",
     "rest_framework",
+    "core.apps.CoreConfig",
     "appointment.apps.AppointmentConfig",
     "department.apps.DepartmentConfig",
     "employee.apps.EmployeeConfig",
@@ -48,6 +50,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "corsheaders.middleware.CorsMiddleware",
+    "core.profiling.ProfilingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -80,6 +83,17 @@ WSGI_APPLICATION = "config.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Reuse connections from a pool each worker process keeps, the way to reuse them under ASGI. Every worker
+# opens up to DB_POOL_MAX_SIZE, keep workers * DB_POOL_MAX_SIZE under Postgres' max_connections.
+DB_POOL = os.getenv("DB_POOL", "0") == "1"
+
+# Connections each worker keeps open, and may open, in its pool
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "2"))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "4"))
+
+# Seconds a request waits for a pooled connection before failing
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "10"))
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.postgresql",
@@ -88,6 +102,21 @@ DATABASES = {
         "PASSWORD": os.getenv("DB_PASSWORD"),
         "HOST": os.getenv("DB_HOST"),
         "PORT": os.getenv("DB_PORT"),
+        # Seconds a thread keeps its connection without a pool, 0 closes it after every request
+        "CONN_MAX_AGE": 0 if DB_POOL else int(os.getenv("DB_CONN_MAX_AGE", "0")),
+        # Check kept and pooled connections before reusing them
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": (
+            {
+                "pool": {
+                    "min_size": DB_POOL_MIN_SIZE,
+                    "max_size": DB_POOL_MAX_SIZE,
+                    "timeout": DB_POOL_TIMEOUT,
+                }
+            }
+            if DB_POOL
+            else {}
+        ),
     }
 }
 
@@ -139,8 +168,85 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 REST_FRAMEWORK = {
     "DEFAULT_FILTER_BACKENDS": ["django_filters.rest_framework.DjangoFilterBackend"],
+    "DEFAULT_PAGINATION_CLASS": "core.pagination.KeysetPagination",
+    "PAGE_SIZE": int(os.getenv("API_PAGE_SIZE", "100")),
+    # DRF 3.17+ keys list serializer errors by index; AppointmentBulkSerializer does so itself on older versions
+    "LIST_SERIALIZER_ERRORS_AS_DICT": True,
+}
+
+# Upper bound for the `page_size` query parameter
+API_MAX_PAGE_SIZE = int(os.getenv("API_MAX_PAGE_SIZE", "1000"))
+
+# Upper bound for the number of items in one bulk request
+API_MAX_BULK_ITEMS = int(os.getenv("API_MAX_BULK_ITEMS", "10000"))
+
+# Upper bound, and default, for the number of employees /employees/autocomplete/ returns
+EMPLOYEE_AUTOCOMPLETE_LIMIT = int(os.getenv("EMPLOYEE_AUTOCOMPLETE_LIMIT", "10"))
+
+# A full bulk request is several megabytes, well over Django's 2.5 MB default
+DATA_UPLOAD_MAX_MEMORY_SIZE = int(os.getenv("DATA_UPLOAD_MAX_MEMORY_SIZE", str(20 * 1024 * 1024)))
+
+# Keep per-day department appointment load in DepartmentDayLoad, updated with every appointment write, so
+# /departments/stats/ reads whole-day windows from it. Run `refresh_department_stats` after turning it on.
+DEPARTMENT_STATS_MATERIALIZED = os.getenv("DEPARTMENT_STATS_MATERIALIZED", "0") == "1"
+
+# Days deletions are kept for `?updated_since=` syncs, older sync tokens must fetch the whole list again.
+# Run `prune_tombstones` daily to drop the rest.
+SYNC_TOMBSTONE_DAYS = int(os.getenv("SYNC_TOMBSTONE_DAYS", "30"))
+
+# Seconds an `updated_at`, taken by the application before writing, may precede its transaction's start on
+# the database: clock skew and the time to the transaction's first query. Changes that recent wait for the
+# next sync.
+SYNC_CLOCK_SKEW = int(os.getenv("SYNC_CLOCK_SKEW", "1"))
+
+# Rows exports read per round trip, and prefetch related objects for
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "2000"))
+
+# Render list endpoints with precompiled row builders instead of DRF serializers
+FAST_READ_ENGINE = os.getenv("FAST_READ_ENGINE", "0") == "1"
+
+# Serve list and retrieve from async views reading through the async ORM. Only pays off under ASGI, where
+# config.asgi turns it on, under WSGI every request would start an event loop.
+ASYNC_READS = os.getenv("ASYNC_READS", "0") == "1"
+
+# Fans change events out to /appointments/events/ streams. core.events.LocalBroker reaches the streams of
+# its own process, core.events.PostgresBroker those of every worker through LISTEN/NOTIFY.
+EVENTS_BROKER = os.getenv("EVENTS_BROKER", "core.events.LocalBroker")
+
+# Events a stream may fall behind by before it is reset
+EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", "100"))
+
+# Seconds between heartbeats of idle streams
+EVENTS_HEARTBEAT = int(os.getenv("EVENTS_HEARTBEAT", "15"))
+
+# Time every request's queries, view and rendering, reported in Server-Timing headers and "core.profiling" log
+# lines. Off, ProfilingMiddleware removes itself.
+REQUEST_PROFILING = os.getenv("REQUEST_PROFILING", "0") == "1"
+
+# Runs of one SQL shape in a request reported as a probable N+1
+REQUEST_PROFILING_REPEATS = int(os.getenv("REQUEST_PROFILING_REPEATS", "5"))
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.getenv("CACHE_LOCATION", ""),
+    }
 }
 
+# Seconds a day of appointments stays cached, 0 disables the day cache
+APPOINTMENT_DAY_CACHE_TIMEOUT = int(os.getenv("APPOINTMENT_DAY_CACHE_TIMEOUT", "300"))
+
+# Days from today materialize_occurrences precomputes recurring appointments for, and new or changed
+# series are checked for conflicts over
+APPOINTMENT_MATERIALIZE_DAYS = int(os.getenv("APPOINTMENT_MATERIALIZE_DAYS", "60"))
+
+# Months of ended appointments kept in the live table besides the current one, `archive_appointments`
+# moves older ones to the month-partitioned archive /appointments/archived/ reads
+APPOINTMENT_ARCHIVE_MONTHS = int(os.getenv("APPOINTMENT_ARCHIVE_MONTHS", "12"))
+
 CORS_ALLOW_ALL_ORIGINS = True
 
 CORS_ALLOWED_ORIGINS = [
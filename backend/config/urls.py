@@ -24,4 +24,5 @@ urlpatterns = [
     path("api/v1/", include("appointment.urls")),
     path("api/v1/", include("department.urls")),
     path("api/v1/", include("employee.urls")),
+    path("api/v1/", include("core.urls")),
 ]
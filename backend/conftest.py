@@ -1,11 +1,25 @@
+import itertools
+from contextlib import contextmanager
+
 import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from rest_framework.test import APIClient
 
 from appointment.models import Appointment
+from core.profiling import QueryProfile
 from department.models import Department
 from employee.models import Employee
 
+WRITES = ("INSERT", "UPDATE", "DELETE")
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+
 
 @pytest.fixture
 def api_client():
@@ -42,3 +56,90 @@ def appointment(employee):
         title="Test Appointment",
         employee=employee,
     )
+
+
+@pytest.fixture
+def assert_constant_queries(api_client):
+    """
+    Fail when the number of queries a GET makes grows with the number of rows `add_rows` creates.
+    """
+
+    def _assert_constant_queries(url, add_rows):
+        add_rows()
+        with CaptureQueriesContext(connection) as small:
+            response = api_client.get(url)
+        assert response.status_code == 200
+
+        add_rows()
+        add_rows()
+        with CaptureQueriesContext(connection) as large:
+            api_client.get(url)
+
+        queries = "\n".join(query["sql"] for query in large.captured_queries)
+        assert len(large) == len(small), f"{url} made {len(small)} then {len(large)} queries:\n{queries}"
+
+    return _assert_constant_queries
+
+
+@pytest.fixture
+def assert_num_writes():
+    """
+    Fail when the block makes other than `count` INSERT, UPDATE and DELETE queries.
+    """
+
+    @contextmanager
+    def _assert_num_writes(count):
+        with CaptureQueriesContext(connection) as context:
+            yield context
+        writes = [query["sql"] for query in context.captured_queries if query["sql"].startswith(WRITES)]
+        assert len(writes) == count, f"expected {count} writes, made {len(writes)}:\n" + "\n".join(writes)
+
+    return _assert_num_writes
+
+
+@pytest.fixture
+def assert_query_budget():
+    """
+    Fail when the block makes more than `queries` queries, or runs one SQL shape as often as a probable N+1.
+    """
+
+    @contextmanager
+    def _assert_query_budget(queries):
+        profile = QueryProfile()
+        with connection.execute_wrapper(profile):
+            yield profile
+        shapes = "\n".join(f"{count} x {shape}" for shape, count in profile.shapes.most_common())
+        assert profile.queries <= queries, f"expected at most {queries} queries, made {profile.queries}:\n{shapes}"
+        assert not profile.repeated(), f"probable N+1:\n{shapes}"
+
+    return _assert_query_budget
+
+
+@pytest.fixture
+def staffed_appointment_factory():
+    """
+    Create appointments whose owner and participants all belong to managed departments.
+    """
+    counter = itertools.count()
+
+    def create_employee(**kwargs):
+        n = next(counter)
+        manager = Employee.objects.create(
+            name=f"Manager {n}", email=f"manager{n}@testmail.com", position=Employee.POSITION_MANAGER
+        )
+        department = Department.objects.create(name=f"Department {n}", manager=manager)
+        return Employee.objects.create(name=f"Employee {n}", email=f"employee{n}@testmail.com", department=department)
+
+    def create_appointment(start=None, participants=2):
+        start = start or timezone.now() + timezone.timedelta(hours=1)
+        appointment = Appointment.objects.create(
+            start_datetime=start,
+            end_datetime=start + timezone.timedelta(hours=1),
+            title=f"Appointment {next(counter)}",
+            employee=create_employee(),
+        )
+        appointment.participants.set([create_employee() for _ in range(participants)])
+        return appointment
+
+    create_appointment.create_employee = create_employee
+    return create_appointment
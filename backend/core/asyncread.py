@@ -0,0 +1,113 @@
+from functools import update_wrapper
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.http import Http404
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.response import Response
+
+from .fastpath import UrlBuilder
+
+
+class AsyncReadMixin:
+    """
+    Serve `list` and `retrieve` from async views when settings.ASYNC_READS is on, for ASGI deployments.
+
+    Rows are read through the async ORM as `values()` and rendered with the viewset's RowBuilder (see
+    FastReadMixin), which answers exactly like the serializer. Validators, filters and pagination work
+    as on the sync path. Other methods and actions, and reads `use_async_read` turns down, run the sync
+    view in the request's thread as before. Object permissions are not checked on async retrieves,
+    viewsets that have them should leave "retrieve" out of `async_read_actions`.
+    """
+
+    async_read_actions = ("list", "retrieve")
+
+    @classmethod
+    def as_view(cls, actions=None, **initkwargs):
+        view = super().as_view(actions, **initkwargs)
+        actions = dict(actions)
+        if "get" in actions:
+            actions.setdefault("head", actions["get"])
+        reads = {method for method, action in actions.items() if action in cls.async_read_actions}
+        if not settings.ASYNC_READS or not reads:
+            return view
+        sync_view = sync_to_async(view)
+
+        async def async_view(request, *args, **kwargs):
+            if request.method.lower() not in reads:
+                return await sync_view(request, *args, **kwargs)
+
+            # What ViewSetMixin.as_view's view does before dispatching
+            self = cls(**initkwargs)
+            self.action_map = actions
+            for method, action in actions.items():
+                setattr(self, method, getattr(self, action))
+            self.request, self.args, self.kwargs = request, args, kwargs
+            return await self.adispatch(request, *args, **kwargs)
+
+        update_wrapper(async_view, view)
+        return csrf_exempt(async_view)
+
+    async def adispatch(self, request, *args, **kwargs):
+        """
+        `dispatch` awaiting the async handler of the action.
+        """
+        self.args, self.kwargs = args, kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            # Authentication may read the session and the user
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            if self.use_async_read():
+                response = await getattr(self, f"a{self.action}")(request, *args, **kwargs)
+            else:
+                response = await sync_to_async(getattr(self, self.action))(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    def use_async_read(self):
+        """
+        Return whether the current read can be served asynchronously.
+        """
+        paginator = self.paginator if self.action == "list" else None
+        return self.get_row_builder() is not None and (paginator is None or hasattr(paginator, "apaginate_queryset"))
+
+    async def alist(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        state = await self.aget_validator_state(queryset, self.get_serializer())
+        return await self.aconditional_response(state, self._render_async_list, queryset)
+
+    async def _render_async_list(self, queryset):
+        builder = self.get_row_builder()
+        columns = dict.fromkeys([*builder.columns, *getattr(self.paginator, "ordering", ())])
+        rows = queryset.prefetch_related(None).values(*columns)
+        urls = UrlBuilder(self.request, self.format_kwarg)
+        if self.paginator is None:
+            return Response(await builder.abuild([row async for row in rows.aiterator()], urls))
+        page = await self.paginator.apaginate_queryset(rows, self.request, view=self)
+        return self.get_paginated_response(await builder.abuild(page, urls))
+
+    async def aretrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            queryset = self.filter_queryset(self.get_queryset()).filter(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            )
+        except (TypeError, ValueError, ValidationError):
+            raise Http404 from None
+        state = await self.aget_validator_state(queryset, self.get_serializer(), single=True)
+        return await self.aconditional_response(state, self._render_async_detail, queryset)
+
+    async def _render_async_detail(self, queryset):
+        builder = self.get_row_builder()
+        row = await queryset.prefetch_related(None).values(*builder.columns).afirst()
+        if row is None:
+            raise Http404
+        [data] = await builder.abuild([row], UrlBuilder(self.request, self.format_kwarg))
+        return Response(data)
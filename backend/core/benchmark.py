@@ -0,0 +1,217 @@
+import json
+import platform
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import timedelta
+from itertools import count
+from statistics import mean
+
+import django
+from django.db import connection
+from django.utils import timezone
+
+from appointment.models import Appointment
+from department.models import Department
+from employee.models import Employee
+
+from .profiling import QueryProfile
+
+# Requests timed per scenario, after one warm-up request
+REPEATS = 20
+
+# Smallest latency change in milliseconds, and memory change in kilobytes, compare() reports as a regression
+MIN_LATENCY_CHANGE = 1.0
+MIN_MEMORY_CHANGE = 64
+
+
+@dataclass(frozen=True)
+class Scenario:
+    """
+    A request to benchmark. `path` is formatted with the benchmark context, `payload` builds the body of
+    the n-th request from it.
+    """
+
+    name: str
+    path: str
+    method: str = "get"
+    payload: object = None
+
+
+def _employee_url(context, pk):
+    return f"http://testserver/api/v1/employees/{pk}/"
+
+
+def _new_appointment(context, day, hour, owner, participants=()):
+    # Days after the dataset ends, new appointments never overlap
+    start = context["future"] + timedelta(days=day, hours=hour)
+    return {
+        "start_datetime": start.isoformat(),
+        "end_datetime": (start + timedelta(minutes=30)).isoformat(),
+        "title": f"Benchmark {day}",
+        "employee": _employee_url(context, owner),
+        "participants": [_employee_url(context, pk) for pk in participants],
+    }
+
+
+SCENARIOS = [
+    Scenario("appointment list", "/api/v1/appointments/"),
+    Scenario("appointment list by date", "/api/v1/appointments/?date={today}"),
+    Scenario("appointment list by window", "/api/v1/appointments/?start={today}T00:00:00Z&end={tomorrow}T00:00:00Z"),
+    Scenario("appointment list shaped", "/api/v1/appointments/?date={today}&fields=id,title,participants.name"),
+    Scenario("appointment detail", "/api/v1/appointments/{appointment}/"),
+    Scenario("appointment layout", "/api/v1/appointments/layout/?date={today}&employees={employee}"),
+    Scenario(
+        "appointment conflicts",
+        "/api/v1/appointments/conflicts/?start={today}T00:00:00Z&end={tomorrow}T00:00:00Z&employees={employee}",
+    ),
+    Scenario("appointment closest", "/api/v1/appointments/closest/"),
+    Scenario("appointment next", "/api/v1/appointments/next/?department={department}"),
+    Scenario(
+        "appointment create",
+        "/api/v1/appointments/",
+        "post",
+        lambda context, n: _new_appointment(context, n, 0, context["team"][0], context["team"][1:4]),
+    ),
+    Scenario(
+        "appointment update",
+        "/api/v1/appointments/{appointment}/",
+        "patch",
+        lambda context, n: {"title": f"Updated {n}"},
+    ),
+    Scenario(
+        "appointment bulk create",
+        "/api/v1/appointments/bulk/",
+        "post",
+        lambda context, n: [_new_appointment(context, n, 1 + hour, pk) for hour, pk in enumerate(context["team"])],
+    ),
+    Scenario("department list", "/api/v1/departments/"),
+    Scenario("department detail", "/api/v1/departments/{department}/"),
+    Scenario("department employees", "/api/v1/departments/{department}/employees/"),
+    Scenario("department stats", "/api/v1/departments/stats/?start={today}T00:00:00Z&end={tomorrow}T00:00:00Z"),
+    Scenario("employee list", "/api/v1/employees/"),
+    Scenario("employee detail", "/api/v1/employees/{employee}/"),
+    Scenario("employee filter by name", "/api/v1/employees/?name=maria"),
+    Scenario("employee filter by email", "/api/v1/employees/?email=kovacs"),
+    Scenario("employee search", "/api/v1/employees/?search=smit"),
+    Scenario("employee autocomplete", "/api/v1/employees/autocomplete/?q=mar"),
+    Scenario("database pools", "/api/v1/metrics/database-pools/"),
+]
+
+
+def get_context():
+    """
+    Return the values scenario paths and payloads are built from, taken from the data in the database.
+    """
+    department = Department.objects.filter(manager__isnull=False).order_by("pk").first()
+    team = list(Employee.objects.filter(department=department).order_by("pk").values_list("pk", flat=True))
+    appointment = Appointment.objects.filter(employee__in=team, recurrence="").order_by("pk").first()
+    today = timezone.now().date()
+    last = Appointment.objects.order_by("-start_datetime").values_list("start_datetime", flat=True).first()
+    return {
+        "today": today,
+        "tomorrow": today + timedelta(days=1),
+        "department": department.pk,
+        "employee": team[0],
+        "team": team,
+        "appointment": appointment.pk,
+        "future": (last or timezone.now()) + timedelta(days=365),
+    }
+
+
+def percentile(latencies, fraction):
+    latencies = sorted(latencies)
+    return latencies[min(int(len(latencies) * fraction), len(latencies) - 1)]
+
+
+def measure(client, scenario, context, repeats=REPEATS):
+    """
+    Send `scenario` `repeats` times after a warm-up, and once more tracing memory allocations. Return its
+    latency percentiles in milliseconds, most queries one request made, and peak memory in kilobytes.
+    """
+    requests = count()
+
+    def send():
+        n = next(requests)
+        data = scenario.payload(context, n) if scenario.payload else None
+        response = getattr(client, scenario.method)(scenario.path.format(**context), data, format="json")
+        if response.status_code >= 300:
+            raise RuntimeError(f"{scenario.name} answered {response.status_code}: {response.content[:500]!r}")
+
+    send()
+    latencies, queries = [], []
+    for _ in range(repeats):
+        profile = QueryProfile()
+        with connection.execute_wrapper(profile):
+            began = time.perf_counter()
+            send()
+            latencies.append((time.perf_counter() - began) * 1000)
+        queries.append(profile.queries)
+
+    tracemalloc.start()
+    try:
+        send()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "requests": repeats,
+        "mean_ms": round(mean(latencies), 2),
+        "p50_ms": round(percentile(latencies, 0.5), 2),
+        "p95_ms": round(percentile(latencies, 0.95), 2),
+        "p99_ms": round(percentile(latencies, 0.99), 2),
+        "queries": max(queries),
+        "peak_memory_kb": round(peak / 1024),
+    }
+
+
+def run(client, scenarios=SCENARIOS, repeats=REPEATS):
+    """
+    Measure every scenario against the data in the database, return the results by scenario name.
+    """
+    context = get_context()
+    return {scenario.name: measure(client, scenario, context, repeats) for scenario in scenarios}
+
+
+def environment():
+    with connection.cursor() as cursor:
+        cursor.execute("SHOW server_version")
+        [postgres] = cursor.fetchone()
+    return {"python": platform.python_version(), "django": django.get_version(), "postgres": postgres}
+
+
+def write_results(path, scales):
+    """
+    Write the results of every scale, {scale: {"dataset": counts, "scenarios": results}}, to `path`.
+    """
+    results = {"created": timezone.now().isoformat(), "environment": environment(), "scales": scales}
+    with open(path, "w") as file:
+        json.dump(results, file, indent=2, sort_keys=True)
+
+
+def compare(baseline, current, threshold):
+    """
+    Compare two write_results() files, return (scale, scenario, metric, before, after, regressed) rows for
+    the scales and scenarios both have.
+
+    Latencies and memory regress when they grow by more than `threshold` (a fraction) and by more than
+    MIN_LATENCY_CHANGE or MIN_MEMORY_CHANGE, query counts when they grow at all.
+    """
+    rows = []
+    for scale, results in current["scales"].items():
+        before_scenarios = baseline["scales"].get(scale, {}).get("scenarios", {})
+        for name, after in results["scenarios"].items():
+            before = before_scenarios.get(name)
+            if before is None:
+                continue
+            for metric, minimum in [
+                ("p50_ms", MIN_LATENCY_CHANGE),
+                ("p95_ms", MIN_LATENCY_CHANGE),
+                ("queries", 0),
+                ("peak_memory_kb", MIN_MEMORY_CHANGE),
+            ]:
+                growth = after[metric] - before[metric]
+                regressed = growth > minimum and (metric == "queries" or growth > before[metric] * threshold)
+                rows.append((scale, name, metric, before[metric], after[metric], regressed))
+    return rows
@@ -0,0 +1,188 @@
+import hashlib
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from rest_framework import serializers
+from rest_framework.relations import ManyRelatedField, RelatedField
+
+from .models import Tombstone
+from .prefetch import _resolve_field
+from .sync import WATERMARK_SQL
+
+# The latest tombstone and `updated_at` of a table, each read from the end of an index
+TABLE_STATE_SQL = """
+(SELECT max(deleted_at) FROM {tombstone} WHERE model = %s),
+(SELECT max(updated_at) FROM {table})
+"""
+
+# The state row standing for the transactions still to commit, see get_table_states
+IN_FLIGHT = "in flight"
+
+
+def rendered_models(serializer):
+    """
+    Return the models whose rows `serializer` renders or links to through its relations.
+    """
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+
+    models = set()
+    for field in serializer._readable_fields:
+        nested = field.child if isinstance(field, serializers.ListSerializer) else field
+        if isinstance(nested, serializers.BaseSerializer):
+            models.add(nested.Meta.model)
+            models |= rendered_models(nested)
+        elif isinstance(field, (RelatedField, ManyRelatedField)) and field.source != "*":
+            model_field = _resolve_field(serializer.Meta.model, field.source_attrs)
+            if model_field is not None and model_field.is_relation:
+                models.add(model_field.related_model)
+    return models
+
+
+def get_table_states(models):
+    """
+    Return [(model label, latest deletion, latest `updated_at`)] for the tables of `models` in one query.
+
+    Inserts and edits move `updated_at`, deletes leave a Tombstone. Both are read through the
+    (updated_at, id) and (model, deleted_at, id) indexes, whatever the table size. They are stamped
+    before commit though, so a transaction committing after a later stamped one does not move them.
+    Until every change stamped up to the latest is visible (see core.sync.get_watermark), the state
+    also holds the current snapshot as (IN_FLIGHT, snapshot, None): any commit changes it.
+    """
+    if not models:
+        return []
+    tombstone = connection.ops.quote_name(Tombstone._meta.db_table)
+    sql = ", ".join(
+        TABLE_STATE_SQL.format(tombstone=tombstone, table=connection.ops.quote_name(model._meta.db_table))
+        for model in models
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT {sql}, ({WATERMARK_SQL}), pg_current_snapshot()::text",
+            [model._meta.label_lower for model in models],
+        )
+        *row, watermark, snapshot = cursor.fetchone()
+    states = [(model._meta.label, *row[2 * index : 2 * index + 2]) for index, model in enumerate(models)]
+    latest = max((value for value in row if value is not None), default=None)
+    if latest is not None and latest >= watermark - timedelta(seconds=settings.SYNC_CLOCK_SKEW):
+        states.append((IN_FLIGHT, snapshot, None))
+    return states
+
+
+aget_table_states = sync_to_async(get_table_states)
+
+
+def get_state(queryset):
+    """
+    Return (row count, latest `updated_at`) for `queryset` in a single aggregate query.
+    """
+    state = queryset.aggregate(count=Count("pk"), last_modified=Max("updated_at"))
+    return state["count"], state["last_modified"]
+
+
+async def aget_state(queryset):
+    state = await queryset.aaggregate(count=Count("pk"), last_modified=Max("updated_at"))
+    return state["count"], state["last_modified"]
+
+
+class ConditionalGetMixin:
+    """
+    Answer `If-None-Match` and `If-Modified-Since` on `list` and `retrieve` before serializing anything.
+
+    The ETag hashes the state (see `get_table_states`) of the table being read and of every model its
+    serializer renders, so edits, inserts and deletes all change it, and retrieves hash their own row
+    instead of their table. Last-Modified only moves on edits and inserts, has one second resolution and
+    is left out while changes are in flight, clients should prefer the ETag.
+    """
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        state = self.get_validator_state(queryset, self.get_serializer())
+        return self.conditional_response(state, super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            queryset = self.filter_queryset(self.get_queryset()).filter(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            )
+            state = self.get_validator_state(queryset, self.get_serializer(), single=True)
+        except (TypeError, ValueError, ValidationError):
+            return super().retrieve(request, *args, **kwargs)
+        return self.conditional_response(state, super().retrieve, request, *args, **kwargs)
+
+    def get_validator_state(self, queryset, serializer, single=False):
+        """
+        Return the state of the table of `queryset` and of the models `serializer` renders. A list's state
+        costs one query however many rows it filters. With `single` the row `queryset` selects stands in
+        for its table, as (model label, row count, latest `updated_at`).
+        """
+        if single:
+            return [
+                (queryset.model._meta.label, *get_state(queryset)),
+                *self.get_related_state(queryset.model, serializer),
+            ]
+        return get_table_states([queryset.model, *self.get_related_models(queryset.model, serializer)])
+
+    async def aget_validator_state(self, queryset, serializer, single=False):
+        if single:
+            return [
+                (queryset.model._meta.label, *await aget_state(queryset)),
+                *await self.aget_related_state(queryset.model, serializer),
+            ]
+        return await aget_table_states([queryset.model, *self.get_related_models(queryset.model, serializer)])
+
+    def get_related_state(self, model, serializer):
+        return get_table_states(self.get_related_models(model, serializer))
+
+    async def aget_related_state(self, model, serializer):
+        return await aget_table_states(self.get_related_models(model, serializer))
+
+    def get_related_models(self, model, serializer):
+        return sorted(rendered_models(serializer) - {model}, key=lambda related_model: related_model._meta.label)
+
+    def conditional_response(self, state, render, *args, **kwargs):
+        """
+        Return 304 (or 412) if the request's validators match `state`, otherwise the response `render` builds.
+        """
+        etag, timestamp = self.get_validators(state)
+        response = get_conditional_response(self.request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = render(*args, **kwargs)
+        return self.add_validators(response, etag, timestamp)
+
+    async def aconditional_response(self, state, render, *args, **kwargs):
+        """
+        `conditional_response` awaiting the coroutine function `render`.
+        """
+        etag, timestamp = self.get_validators(state)
+        response = get_conditional_response(self.request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = await render(*args, **kwargs)
+        return self.add_validators(response, etag, timestamp)
+
+    def get_validators(self, state):
+        etag = quote_etag(
+            hashlib.md5(repr((self.request.accepted_media_type, state)).encode(), usedforsecurity=False).hexdigest()
+        )
+        last_modified = max((row[-1] for row in state if row[-1] is not None), default=None)
+        if any(row[0] == IN_FLIGHT for row in state):
+            # A transaction still to commit may write rows older than it
+            last_modified = None
+        return etag, int(last_modified.timestamp()) if last_modified else None
+
+    def add_validators(self, response, etag, timestamp):
+        if response.status_code not in (200, 304):
+            return response
+        response.headers["ETag"] = etag
+        if timestamp is not None:
+            response.headers["Last-Modified"] = http_date(timestamp)
+        patch_cache_control(response, no_cache=True)
+        patch_vary_headers(response, ("Accept",))
+        return response
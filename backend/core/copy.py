@@ -0,0 +1,15 @@
+def copy_rows(cursor, table, columns, rows, blank_as_null=True):
+    """
+    Load `rows`, tuples of `columns` values, into `table` with a single COPY FROM STDIN.
+
+    Rows are sent as they are read, never all held in memory. None is loaded as NULL, and so are empty
+    strings unless `blank_as_null` is off.
+    """
+    sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN"
+    with cursor.copy(sql) as copy:
+        if not blank_as_null:
+            for row in rows:
+                copy.write_row(row)
+            return
+        for row in rows:
+            copy.write_row([None if value == "" else value for value in row])
@@ -0,0 +1,321 @@
+import random
+from datetime import datetime, time, timedelta
+from itertools import accumulate, chain, count, islice
+from math import ceil, log
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from appointment.models import Appointment
+from appointment.recurrence import get_series_end
+from department.models import Department
+from employee.importer import imported
+from employee.models import Employee
+
+from .copy import copy_rows
+
+# Fewest employees a dataset has, however few appointments it holds
+MIN_EMPLOYEES = 20
+
+# Working days the appointments of a large dataset spread over, centred on today. Smaller datasets take
+# fewer days, larger ones more employees.
+DAYS = 20
+
+# Department sizes are log-normal around a median of DEPARTMENT_SIZE, between the bounds
+DEPARTMENT_SIZE = 12
+DEPARTMENT_SIZE_SIGMA = 0.6
+DEPARTMENT_SIZE_BOUNDS = (3, 60)
+
+# Working hours, local time, split in quarter hours
+WORKDAY_START = time(8)
+QUARTERS = 40
+
+# Appointments an employee owns on a working day, meeting lengths in quarter hours and the number of
+# teammates invited, each with its weight
+OWNED = {0: 20, 1: 30, 2: 25, 3: 15, 4: 10}
+LENGTHS = {1: 20, 2: 40, 3: 10, 4: 20, 6: 7, 8: 3}
+INVITED = {0: 25, 1: 25, 2: 20, 3: 12, 4: 8, 6: 6, 10: 4}
+
+# Tries at finding a free start before an appointment is left out
+ATTEMPTS = 3
+
+# Recurring meetings keep to quarters no single appointment takes, so they never conflict: the share of
+# departments with a daily standup at STANDUP, and of employees with a weekly or fortnightly one-on-one
+# with their manager in the ONE_ON_ONES half hours of a weekday, at most 5 * len(ONE_ON_ONES) per manager
+STANDUPS = 0.6
+STANDUP = 4
+ONE_ON_ONES = 0.3
+ONE_ON_ONE_SLOTS = (32, 34, 36)
+RESERVED = (1 << STANDUP) | sum(3 << quarter for quarter in ONE_ON_ONE_SLOTS)
+
+# Appointments, with their participants, written per COPY
+BATCH_SIZE = 50000
+
+TITLES = [
+    "Planning",
+    "Review",
+    "Design review",
+    "Interview",
+    "Workshop",
+    "Retrospective",
+    "Demo",
+    "Customer call",
+    "Sync",
+    "Lunch and learn",
+]
+AREAS = ["Engineering", "Sales", "Support", "Finance", "Marketing", "Operations", "Legal", "Research", "People"]
+FIRST_NAMES = [
+    "Anna", "Bence", "Chloe", "David", "Emma", "Felix", "Greta", "Hugo", "Ida", "Jonas", "Kata", "Liam",
+    "Maria", "Noah", "Olivia", "Peter", "Rita", "Samuel", "Tilda", "Viktor", "Zsofia", "Adam", "Julia", "Marton",
+]  # fmt: skip
+LAST_NAMES = [
+    "Smith", "Kovacs", "Nagy", "Muller", "Garcia", "Rossi", "Novak", "Horvath", "Brown", "Szabo", "Tanaka", "Silva",
+    "Toth", "Meyer", "Martin", "Kiss", "Jensen", "Molnar", "Wilson", "Varga", "Dubois", "Farkas", "Lopez", "Papp",
+]  # fmt: skip
+
+APPOINTMENT_COLUMNS = (
+    "id",
+    "start_datetime",
+    "end_datetime",
+    "title",
+    "description",
+    "created_at",
+    "updated_at",
+    "employee_id",
+    "recurrence",
+    "recurrence_end",
+    "recurrence_exceptions",
+)
+
+
+def generate(appointments, seed=0, batch_size=BATCH_SIZE):
+    """
+    Add `appointments` synthetic appointments, with the employees owning them and their departments, and
+    return how many rows of each kind were created.
+
+    Appointments fall in working hours of the working days around today, with weighted meeting lengths,
+    owners and invited teammates; departments are log-normal in size and managed by their first employee.
+    Some departments hold a daily standup and some employees a weekly one-on-one with their manager. No
+    employee is booked twice at once. The same `seed` gives the same dataset on the same day.
+
+    Rows are written with COPY in batches of `batch_size` appointments, so memory stays bounded. Generating
+    again adds to what is there, with new employees and departments. The tables are analyzed at the end and
+    `employee.importer.imported` is sent, the rows skipped save() and its signals.
+    """
+    rng = random.Random(seed)
+    employees = max(ceil(appointments / (DAYS * _mean(OWNED))), MIN_EMPLOYEES)
+    days = ceil(appointments / (employees * _mean(OWNED)))
+    sizes = _department_sizes(rng, employees)
+    now = timezone.now()
+    tables = {
+        name: connection.ops.quote_name(model._meta.db_table)
+        for name, model in [
+            ("department", Department),
+            ("employee", Employee),
+            ("appointment", Appointment),
+            ("participant", Appointment.participants.through),
+        ]
+    }
+
+    participants = 0
+    with transaction.atomic(), connection.cursor() as cursor:
+        # Ids are handed out here, nothing else may insert until the sequences are moved past them
+        cursor.execute(f"LOCK TABLE {', '.join(tables.values())} IN EXCLUSIVE MODE")
+        # Foreign keys are checked per batch rather than all queued until commit
+        cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+        first = {name: _next_id(cursor, tables[name]) for name in ("department", "employee", "appointment")}
+
+        teams, member = [], first["employee"]
+        for size in sizes:
+            teams.append(range(member, member + size))
+            member += size
+        copy_rows(
+            cursor,
+            tables["department"],
+            ("id", "name", "description", "updated_at"),
+            (
+                (pk, f"{rng.choice(AREAS)} {pk}", "Synthetic", now)
+                for pk in range(first["department"], first["department"] + len(teams))
+            ),
+        )
+        copy_rows(
+            cursor,
+            tables["employee"],
+            ("id", "name", "email", "position", "department_id", "updated_at"),
+            _employees(rng, teams, first["department"], now),
+        )
+        cursor.execute(
+            f"UPDATE {tables['department']} d SET manager_id = e.id FROM {tables['employee']} e "
+            "WHERE e.department_id = d.id AND e.position = %s AND d.id >= %s",
+            [Employee.POSITION_MANAGER, first["department"]],
+        )
+
+        start = timezone.localdate(now) - timedelta(days=ceil(days / 2))
+        rows = islice(
+            chain(_series(rng, teams, start, days), _singles(rng, teams, _working_days(timezone.localdate(now)))),
+            appointments,
+        )
+        # Every appointment has the same creation time, formatted once, and no cancelled occurrences
+        written = now.isoformat()
+        ids = count(first["appointment"])
+        while batch := list(islice(rows, batch_size)):
+            batch = [(next(ids), *row) for row in batch]
+            copy_rows(
+                cursor,
+                tables["appointment"],
+                APPOINTMENT_COLUMNS,
+                (
+                    (pk, begins, ends, title, "", written, written, owner, recurrence, series_end, "{}")
+                    for pk, begins, ends, title, owner, recurrence, series_end, _ in batch
+                ),
+                blank_as_null=False,
+            )
+            links = [(pk, attendee) for pk, *_, attendees in batch for attendee in attendees]
+            copy_rows(cursor, tables["participant"], ("appointment_id", "employee_id"), links)
+            participants += len(links)
+
+        for name, pk in [
+            ("department", first["department"] + len(teams)),
+            ("employee", member),
+            ("appointment", next(ids)),
+        ]:
+            cursor.execute("SELECT setval(pg_get_serial_sequence(%s, 'id'), %s, false)", [tables[name], pk])
+        # Back to Django's deferred foreign keys, for the rest of a transaction the call may be part of
+        cursor.execute("SET CONSTRAINTS ALL DEFERRED")
+
+    with connection.cursor() as cursor:
+        for table in tables.values():
+            cursor.execute(f"ANALYZE {table}")
+    imported.send(sender=Employee)
+    return {
+        "departments": len(teams),
+        "employees": employees,
+        "appointments": appointments,
+        "participants": participants,
+    }
+
+
+def _mean(weights):
+    return sum(value * weight for value, weight in weights.items()) / sum(weights.values())
+
+
+def _chooser(rng, weights):
+    """
+    Return a function drawing `k` values of `weights` at once.
+    """
+    values, cum_weights = list(weights), list(accumulate(weights.values()))
+    return lambda k=1: rng.choices(values, cum_weights=cum_weights, k=k)
+
+
+def _next_id(cursor, table):
+    cursor.execute("SELECT nextval(pg_get_serial_sequence(%s, 'id'))", [table])
+    return cursor.fetchone()[0]
+
+
+def _department_sizes(rng, employees):
+    low, high = DEPARTMENT_SIZE_BOUNDS
+    sizes = []
+    while employees:
+        size = min(max(round(rng.lognormvariate(log(DEPARTMENT_SIZE), DEPARTMENT_SIZE_SIGMA)), low), high)
+        # The last department takes what is left rather than being smaller than the bounds allow
+        if employees - size < low:
+            size = employees
+        sizes.append(size)
+        employees -= size
+    return sizes
+
+
+def _employees(rng, teams, first_department, now):
+    for department, team in enumerate(teams, start=first_department):
+        for pk in team:
+            first_name, last_name = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            position = Employee.POSITION_MANAGER if pk == team.start else Employee.POSITION_EMPLOYEE
+            email = f"{first_name}.{last_name}.{pk}@example.com".lower()
+            yield pk, f"{first_name} {last_name}", email, position, department, now
+
+
+def _working_days(today):
+    """
+    Yield working days from today outwards, today (when it is one), tomorrow, yesterday, the day after...
+    """
+    for offset in chain([0], chain.from_iterable((n, -n) for n in count(1))):
+        day = today + timedelta(days=offset)
+        if day.weekday() < 5:
+            yield day
+
+
+def _quarters(day):
+    begins = timezone.make_aware(datetime.combine(day, WORKDAY_START))
+    return [begins + timedelta(minutes=15 * quarter) for quarter in range(QUARTERS + 1)]
+
+
+def _series(rng, teams, start, days):
+    """
+    Yield the (start, end, title, owner, recurrence, recurrence end, participants) of the standups and
+    one-on-ones of `teams`, repeating from the week of `start` over `days` working days.
+    """
+    monday = start - timedelta(days=start.weekday())
+    weeks = ceil(days / 5) + 1
+    for team in teams:
+        manager, reports = team.start, team[1:]
+        if rng.random() < STANDUPS:
+            quarters = _quarters(monday)
+            recurrence = f"FREQ=DAILY;BYDAY=MO,TU,WE,TH,FR;COUNT={5 * weeks}"
+            begins, ends = quarters[STANDUP], quarters[STANDUP + 1]
+            yield begins, ends, "Standup", manager, recurrence, get_series_end(recurrence, begins, ends), reports
+
+        slots = (divmod(n, len(ONE_ON_ONE_SLOTS)) for n in range(5 * len(ONE_ON_ONE_SLOTS)))
+        for report in reports:
+            if rng.random() >= ONE_ON_ONES:
+                continue
+            weekday, slot = next(slots, (None, None))
+            if weekday is None:
+                break
+            interval = rng.choice([1, 1, 2])
+            quarters = _quarters(monday + timedelta(days=weekday))
+            recurrence = f"FREQ=WEEKLY;INTERVAL={interval};COUNT={ceil(weeks / interval)}"
+            begins, ends = quarters[ONE_ON_ONE_SLOTS[slot]], quarters[ONE_ON_ONE_SLOTS[slot] + 2]
+            yield begins, ends, "One-on-one", manager, recurrence, get_series_end(recurrence, begins, ends), [report]
+
+
+def _singles(rng, teams, days):
+    """
+    Yield the (start, end, title, owner, recurrence, recurrence end, participants) of single appointments,
+    a working day of `days` after the other, endlessly.
+
+    Each employee's quarters are a bitmask of the day; owners retry busy starts up to ATTEMPTS times and
+    busy invitees are left out.
+    """
+    owned, lengths, invited = _chooser(rng, OWNED), _chooser(rng, LENGTHS), _chooser(rng, INVITED)
+    first = teams[0].start
+    for day in days:
+        # Text COPY takes the starts as they are, formatting them once per day rather than per appointment
+        quarters = [quarter.isoformat() for quarter in _quarters(day)]
+        busy = [0] * (teams[-1].stop - first)
+        for team in teams:
+            for owner, appointments in zip(team, owned(len(team)), strict=True):
+                for length in lengths(appointments):
+                    for _ in range(ATTEMPTS):
+                        quarter = rng.randrange(QUARTERS - length + 1)
+                        mask = ((1 << length) - 1) << quarter
+                        if not mask & (busy[owner - first] | RESERVED):
+                            break
+                    else:
+                        continue
+                    busy[owner - first] |= mask
+
+                    wanted = min(invited()[0], len(team) - 1)
+                    attendees = [
+                        pk for pk in rng.sample(team, wanted + 1) if pk != owner and not mask & busy[pk - first]
+                    ][:wanted]
+                    for pk in attendees:
+                        busy[pk - first] |= mask
+                    yield (
+                        quarters[quarter],
+                        quarters[quarter + length],
+                        rng.choice(TITLES),
+                        owner,
+                        "",
+                        None,
+                        attendees,
+                    )
@@ -0,0 +1,253 @@
+import asyncio
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from functools import cache
+
+import orjson
+import psycopg
+from django.conf import settings
+from django.db import connection, connections, transaction
+from django.utils.module_loading import import_string
+from psycopg import sql
+
+logger = logging.getLogger(__name__)
+
+# Milliseconds EventSource clients wait before reconnecting
+RETRY = 3000
+
+# Seconds the Postgres listener waits before reconnecting after losing its connection
+RECONNECT_DELAY = 1
+
+# Seconds the Postgres listener waits for notifications before checking whether it was closed
+POLL_INTERVAL = 1
+
+# Postgres rejects NOTIFY payloads of this many bytes or more
+MAX_PAYLOAD = 8000
+
+
+class Dropped(Exception):
+    """
+    Raised by Subscription.get once messages for the subscription were dropped.
+    """
+
+
+class Subscription:
+    """
+    Messages matching `match(message)`, queued in the event loop that subscribed.
+
+    Brokers put messages from any thread. A subscriber more than `size` messages behind is dropped rather
+    than buffered without bound, it should refetch what it shows and subscribe again.
+    """
+
+    def __init__(self, match, size):
+        self.match = match
+        self.size = size
+        self._loop = asyncio.get_running_loop()
+        self._messages = deque()
+        self._ready = asyncio.Event()
+        self._dropped = False
+
+    def put(self, message):
+        self._loop.call_soon_threadsafe(self._put, message)
+
+    def drop(self):
+        self._loop.call_soon_threadsafe(self._drop)
+
+    def _put(self, message):
+        if len(self._messages) >= self.size:
+            self._drop()
+        elif not self._dropped:
+            self._messages.append(message)
+            self._ready.set()
+
+    def _drop(self):
+        self._dropped = True
+        self._messages.clear()
+        self._ready.set()
+
+    async def get(self, timeout):
+        """
+        Return the next message, or None after `timeout` seconds without one.
+        """
+        if not self._messages and not self._dropped:
+            self._ready.clear()
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except TimeoutError:
+                return None
+        if self._dropped:
+            raise Dropped
+        return self._messages.popleft()
+
+
+class LocalBroker:
+    """
+    Fan messages out to the subscriptions of this process once the publishing transaction commits.
+    """
+
+    def __init__(self):
+        self._subscriptions = set()
+        self._lock = threading.Lock()
+
+    def publish(self, messages):
+        messages = list(messages)
+        if messages:
+            transaction.on_commit(lambda: self.deliver(messages))
+
+    def deliver(self, messages):
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            for message in messages:
+                if subscription.match(message):
+                    try:
+                        subscription.put(message)
+                    except RuntimeError:
+                        # The subscriber's loop is closed, its `subscribe` block is on its way out
+                        break
+
+    def drop_all(self):
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            try:
+                subscription.drop()
+            except RuntimeError:
+                pass
+
+    @contextmanager
+    def subscribe(self, match, size=None):
+        """
+        Yield a Subscription receiving the messages `match` accepts until the block exits.
+        """
+        subscription = Subscription(match, size or settings.EVENTS_QUEUE_SIZE)
+        with self._lock:
+            self._subscriptions.add(subscription)
+        try:
+            yield subscription
+        finally:
+            with self._lock:
+                self._subscriptions.discard(subscription)
+
+
+class PostgresBroker(LocalBroker):
+    """
+    Fan messages out to the subscriptions of every process sharing the database, through LISTEN/NOTIFY.
+
+    Messages are NOTIFYs of the publishing transaction, sent when it commits, and read by one listener
+    thread per process on a connection of its own. Subscriptions are dropped when that connection is lost,
+    as messages may have been missed.
+
+    Messages too large for a NOTIFY are sent with their lists as None, which by convention narrow who a
+    message concerns, so they reach everyone. A message still too large is sent as an empty payload that
+    drops the subscriptions of every process instead of failing the transaction.
+    """
+
+    channel = "events"
+
+    def __init__(self):
+        super().__init__()
+        self._listener = None
+        self._listening = threading.Event()
+        self._stopped = threading.Event()
+
+    def publish(self, messages):
+        payloads = [self._payload(message) for message in messages]
+        if payloads:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT pg_notify(%s, payload) FROM unnest(%s::text[]) payload", [self.channel, payloads]
+                )
+
+    @contextmanager
+    def subscribe(self, match, size=None):
+        with self._lock:
+            if self._listener is None:
+                self._stopped.clear()
+                self._listener = threading.Thread(target=self._listen, name="events-listener", daemon=True)
+                self._listener.start()
+        with super().subscribe(match, size) as subscription:
+            yield subscription
+
+    def close(self):
+        """
+        Stop the listener thread and close its connection.
+        """
+        with self._lock:
+            listener, self._listener = self._listener, None
+        if listener is not None:
+            self._stopped.set()
+            listener.join()
+
+    def _payload(self, message):
+        payload = orjson.dumps(message)
+        if len(payload) >= MAX_PAYLOAD:
+            payload = orjson.dumps({key: None if isinstance(value, list) else value for key, value in message.items()})
+        if len(payload) >= MAX_PAYLOAD:
+            logger.warning("Dropping subscriptions for a %d byte message", len(payload))
+            return ""
+        return payload.decode()
+
+    def _listen(self):
+        while not self._stopped.is_set():
+            try:
+                self._consume()
+            except Exception:
+                logger.exception("Lost the %r notification channel", self.channel)
+                self.drop_all()
+                self._stopped.wait(RECONNECT_DELAY)
+
+    def _consume(self):
+        # A connection of its own, outside the pool: it is held for as long as the process runs
+        params = connections.create_connection("default").get_connection_params()
+        with psycopg.connect(**params, autocommit=True) as listener:
+            listener.execute(sql.SQL("LISTEN {}").format(sql.Identifier(self.channel)))
+            self._listening.set()
+            try:
+                while not self._stopped.is_set():
+                    for notify in listener.notifies(timeout=POLL_INTERVAL):
+                        if notify.payload:
+                            self.deliver([orjson.loads(notify.payload)])
+                        else:
+                            self.drop_all()
+                        if self._stopped.is_set():
+                            break
+            finally:
+                self._listening.clear()
+
+
+@cache
+def _load_broker(path):
+    return import_string(path)()
+
+
+def get_broker():
+    """
+    Return the process-wide instance of settings.EVENTS_BROKER.
+    """
+    return _load_broker(settings.EVENTS_BROKER)
+
+
+async def stream(match, broker=None, heartbeat=None):
+    """
+    Subscribe to the messages `match` accepts and yield them in the text/event-stream format, named after
+    their "type".
+
+    A comment goes out after `heartbeat` seconds without messages, so proxies keep idle streams open and
+    disconnected clients are noticed. A dropped subscription ends the stream with a `reset` event.
+    """
+    heartbeat = heartbeat or settings.EVENTS_HEARTBEAT
+    with (broker or get_broker()).subscribe(match) as subscription:
+        yield f"retry: {RETRY}\n\n"
+        while True:
+            try:
+                message = await subscription.get(heartbeat)
+            except Dropped:
+                yield "event: reset\ndata: {}\n\n"
+                return
+            if message is None:
+                yield ": heartbeat\n\n"
+            else:
+                yield f"event: {message['type']}\ndata: {orjson.dumps(message).decode()}\n\n"
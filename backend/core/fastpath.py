@@ -0,0 +1,270 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.relations import HyperlinkedIdentityField, HyperlinkedRelatedField, ManyRelatedField
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.reverse import reverse
+
+from .prefetch import ordered_queryset
+from .renderers import FastJSONRenderer
+
+# Fields whose to_representation() returns database values unchanged
+PASSTHROUGH_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.ChoiceField,
+    serializers.EmailField,
+    serializers.IntegerField,
+    serializers.ReadOnlyField,
+)
+
+VALUE, URL, LINK, ONE, MANY, MANY_LINKS = range(6)
+
+ROW_BUILDER_CACHE_SIZE = 256
+
+
+class Unsupported(Exception):
+    pass
+
+
+class UrlBuilder:
+    """
+    Build detail URLs by formatting a pk into a template reversed once per view name.
+    """
+
+    marker = "__pk__"
+
+    def __init__(self, request, format=None):
+        self.request = request
+        self.format = format
+        self.templates = {}
+
+    def get(self, view_name, pk):
+        try:
+            prefix, suffix = self.templates[view_name]
+        except KeyError:
+            url = reverse(view_name, kwargs={"pk": self.marker}, request=self.request, format=self.format)
+            prefix, _, suffix = url.partition(self.marker)
+            self.templates[view_name] = prefix, suffix
+        return f"{prefix}{pk}{suffix}"
+
+
+class RowBuilder:
+    """
+    Render `values()` rows exactly like `serializer` renders model instances.
+
+    The serializer's readable fields are compiled once into a list of steps. Nested objects are
+    loaded with one `values()` query per relation and rendered once, however many rows refer to
+    them. Raises Unsupported for fields it cannot reproduce.
+    """
+
+    def __init__(self, serializer):
+        if isinstance(serializer, serializers.ListSerializer):
+            serializer = serializer.child
+        self.model = serializer.Meta.model
+        self.columns = ["pk"]
+        self.steps = [self.compile(field) for field in serializer._readable_fields]
+
+    def compile(self, field):
+        name = field.field_name
+        if isinstance(field, HyperlinkedIdentityField):
+            if field.lookup_field != "pk":
+                raise Unsupported(name)
+            return name, URL, "pk", field.view_name
+
+        if field.source == "*" or len(field.source_attrs) != 1:
+            raise Unsupported(name)
+        attr = field.source_attrs[0]
+        try:
+            model_field = self.model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            raise Unsupported(name) from None
+
+        if not model_field.is_relation:
+            self.columns.append(attr)
+            convert = None if type(field) in PASSTHROUGH_FIELDS else field.to_representation
+            return name, VALUE, attr, convert
+
+        if model_field.many_to_many and model_field.concrete:
+            if isinstance(field, serializers.ListSerializer):
+                return name, MANY, model_field, RowBuilder(field.child)
+            if isinstance(field, ManyRelatedField) and self.is_pk_link(field.child_relation):
+                return name, MANY_LINKS, model_field, field.child_relation.view_name
+        elif model_field.many_to_one or (model_field.one_to_one and model_field.concrete):
+            self.columns.append(attr)
+            if isinstance(field, serializers.BaseSerializer):
+                return name, ONE, attr, RowBuilder(field)
+            if self.is_pk_link(field):
+                return name, LINK, attr, field.view_name
+        raise Unsupported(name)
+
+    @staticmethod
+    def is_pk_link(field):
+        return isinstance(field, HyperlinkedRelatedField) and field.lookup_field == "pk"
+
+    def build(self, rows, urls):
+        related = {}
+        for name, kind, arg, extra in self.steps:
+            if kind == ONE:
+                related[name] = extra.load({row[arg] for row in rows} - {None}, urls)
+            elif kind in (MANY, MANY_LINKS):
+                related[name] = self.load_many(arg, kind, extra, rows, urls)
+        return self.render(rows, related, urls)
+
+    async def abuild(self, rows, urls):
+        """
+        `build` loading the related rows through the async ORM.
+        """
+        related = {}
+        for name, kind, arg, extra in self.steps:
+            if kind == ONE:
+                related[name] = await extra.aload({row[arg] for row in rows} - {None}, urls)
+            elif kind in (MANY, MANY_LINKS):
+                related[name] = await self.aload_many(arg, kind, extra, rows, urls)
+        return self.render(rows, related, urls)
+
+    def render(self, rows, related, urls):
+        data = []
+        for row in rows:
+            item = {}
+            for name, kind, arg, extra in self.steps:
+                if kind == VALUE:
+                    value = row[arg]
+                    item[name] = value if extra is None or value is None else extra(value)
+                elif kind == URL:
+                    item[name] = urls.get(extra, row["pk"])
+                elif kind == LINK:
+                    value = row[arg]
+                    item[name] = None if value is None else urls.get(extra, value)
+                elif kind == ONE:
+                    value = row[arg]
+                    item[name] = None if value is None else related[name][value]
+                else:
+                    item[name] = related[name].get(row["pk"], [])
+            data.append(item)
+        return data
+
+    def load(self, pks, urls, ordered=False):
+        """
+        Return {pk: rendered object} for `pks`, in model ordering when `ordered`.
+        """
+        if not pks:
+            return {}
+        rows = list(self.get_rows(pks, ordered))
+        return dict(zip((row["pk"] for row in rows), self.build(rows, urls)))
+
+    async def aload(self, pks, urls, ordered=False):
+        if not pks:
+            return {}
+        rows = [row async for row in self.get_rows(pks, ordered)]
+        return dict(zip((row["pk"] for row in rows), await self.abuild(rows, urls)))
+
+    def get_rows(self, pks, ordered):
+        queryset = ordered_queryset(self.model) if ordered else self.model._base_manager.all()
+        return queryset.filter(pk__in=pks).values(*self.columns)
+
+    def load_many(self, model_field, kind, extra, rows, urls):
+        """
+        Return {parent pk: [rendered children]}, ordered like the planner's prefetch.
+        """
+        links = list(self.get_links(model_field, rows))
+        children = {target_pk for _, target_pk in links}
+
+        related_model = model_field.related_model
+        if kind == MANY:
+            rendered = extra.load(children, urls, ordered=True)
+        elif related_model._meta.ordering:
+            pks = ordered_queryset(related_model).filter(pk__in=children).values_list("pk", flat=True)
+            rendered = {pk: urls.get(extra, pk) for pk in pks}
+        else:
+            rendered = {pk: urls.get(extra, pk) for pk in sorted(children)}
+        return self.group(links, rendered)
+
+    async def aload_many(self, model_field, kind, extra, rows, urls):
+        links = [link async for link in self.get_links(model_field, rows)]
+        children = {target_pk for _, target_pk in links}
+
+        related_model = model_field.related_model
+        if kind == MANY:
+            rendered = await extra.aload(children, urls, ordered=True)
+        elif related_model._meta.ordering:
+            pks = ordered_queryset(related_model).filter(pk__in=children).values_list("pk", flat=True)
+            rendered = {pk: urls.get(extra, pk) async for pk in pks}
+        else:
+            rendered = {pk: urls.get(extra, pk) for pk in sorted(children)}
+        return self.group(links, rendered)
+
+    @staticmethod
+    def get_links(model_field, rows):
+        source, target = model_field.m2m_field_name(), model_field.m2m_reverse_field_name()
+        through = model_field.remote_field.through
+        return through._base_manager.filter(**{f"{source}__in": [row["pk"] for row in rows]}).values_list(
+            source, target
+        )
+
+    @staticmethod
+    def group(links, rendered):
+        rank = {pk: position for position, pk in enumerate(rendered)}
+        grouped = defaultdict(list)
+        for parent_pk, target_pk in sorted(links, key=lambda link: rank[link[1]]):
+            grouped[parent_pk].append(rendered[target_pk])
+        return grouped
+
+
+_row_builders = {}
+
+
+def get_row_builder(serializer_class, shape_key, build_serializer):
+    """
+    Return the cached RowBuilder for a serializer class and output shape, or None if it is Unsupported.
+    """
+    key = (serializer_class, shape_key)
+    if key not in _row_builders:
+        if len(_row_builders) >= ROW_BUILDER_CACHE_SIZE:
+            _row_builders.clear()
+        try:
+            _row_builders[key] = RowBuilder(build_serializer())
+        except Unsupported:
+            _row_builders[key] = None
+    return _row_builders[key]
+
+
+class FastReadMixin:
+    """
+    Serve `list` through a precompiled RowBuilder and orjson when settings.FAST_READ_ENGINE is on.
+
+    The response is byte-identical to the serializer's. Serializers the builder cannot reproduce
+    keep using the regular path.
+    """
+
+    fast_read_actions = ("list",)
+
+    def use_fast_read(self):
+        return settings.FAST_READ_ENGINE and self.action in self.fast_read_actions
+
+    def get_renderers(self):
+        renderers = super().get_renderers()
+        if self.use_fast_read():
+            renderers = [FastJSONRenderer() if type(renderer) is JSONRenderer else renderer for renderer in renderers]
+        return renderers
+
+    def get_row_builder(self):
+        shape_key = tuple(self.request.query_params.get(param) for param in ("fields", "expand"))
+        return get_row_builder(self.get_serializer_class(), shape_key, self.get_serializer)
+
+    def list(self, request, *args, **kwargs):
+        builder = self.get_row_builder() if self.use_fast_read() else None
+        if builder is None:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset()).prefetch_related(None)
+        columns = dict.fromkeys([*builder.columns, *getattr(self.paginator, "ordering", ())])
+        rows = queryset.values(*columns)
+        page = self.paginate_queryset(rows)
+        urls = UrlBuilder(request, self.format_kwarg)
+        if page is not None:
+            return self.get_paginated_response(builder.build(page, urls))
+        return Response(builder.build(list(rows), urls))
@@ -0,0 +1,38 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmark import compare
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare endpoint benchmark results (see core/tests/test_benchmark.py) with a baseline, failing when "
+        "latency or memory grow by more than --threshold or query counts grow at all."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("baseline", help="Results to compare with.")
+        parser.add_argument("current", help="Results of the change.")
+        parser.add_argument("--threshold", type=float, default=0.2, help="Growth tolerated, 0.2 is 20%%.")
+
+    def handle(self, *args, baseline, current, threshold, **options):
+        try:
+            with open(baseline) as before, open(current) as after:
+                rows = compare(json.load(before), json.load(after), threshold)
+        except (OSError, ValueError, KeyError) as error:
+            raise CommandError(error) from error
+
+        regressions = 0
+        for scale, name, metric, before, after, regressed in rows:
+            change = f"{(after - before) / before:+.0%}" if before else "new"
+            line = f"{scale:>8} {name:<32} {metric:<15} {before:>10} {after:>10} {change:>7}"
+            if regressed:
+                regressions += 1
+                self.stdout.write(self.style.ERROR(f"{line}  regression"))
+            else:
+                self.stdout.write(line)
+
+        if regressions:
+            raise CommandError(f"{regressions} regression{'s' if regressions > 1 else ''} over the baseline.")
+        self.stdout.write(self.style.SUCCESS("No regressions."))
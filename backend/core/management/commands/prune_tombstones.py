@@ -0,0 +1,21 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.models import Tombstone
+
+
+class Command(BaseCommand):
+    help = (
+        "Drop the deletions recorded for `?updated_since=` syncs more than SYNC_TOMBSTONE_DAYS ago, clients "
+        "with older sync tokens fetch whole lists again. Run it daily."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=settings.SYNC_TOMBSTONE_DAYS)
+
+    def handle(self, *args, days, **options):
+        deleted, _ = Tombstone.objects.filter(deleted_at__lt=timezone.now() - timedelta(days=days)).delete()
+        self.stdout.write(f"Pruned {deleted} tombstones older than {days} days.")
@@ -0,0 +1,28 @@
+# Generated by Django 5.2 on 2026-10-18 13:47
+
+from django.db import migrations, models
+
+from core.sync import TOMBSTONE_FUNCTION_SQL
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="Tombstone",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("model", models.CharField(max_length=100)),
+                ("object_id", models.BigIntegerField()),
+                ("deleted_at", models.DateTimeField()),
+            ],
+            options={
+                "indexes": [models.Index(fields=["model", "deleted_at", "id"], name="tombstone_model_deleted_idx")],
+            },
+        ),
+        migrations.RunSQL(TOMBSTONE_FUNCTION_SQL, "DROP FUNCTION core_record_tombstones()"),
+    ]
@@ -0,0 +1,20 @@
+from django.db import models
+
+
+class Tombstone(models.Model):
+    """
+    A deleted row of a model served with `?updated_since=`, see core.sync.
+
+    Written by database triggers on the model's table, so queryset deletes, cascades and raw SQL all leave
+    one.
+    """
+
+    # The model's label, "app_label.model_name"
+    model = models.CharField(max_length=100)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["model", "deleted_at", "id"], name="tombstone_model_deleted_idx"),
+        ]
@@ -0,0 +1,152 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+def seek(names, position, reverse=False):
+    """
+    Return a Q for the rows whose `names` sort after `position` (before it when `reverse`), like the row
+    comparison `(names) > (position)`.
+
+    The first column's bound is repeated on its own, so Postgres starts an index range scan there instead of
+    filtering the index from its start.
+    """
+    after, bound = ("lt", "lte") if reverse else ("gt", "gte")
+    condition = Q(**{f"{names[-1]}__{after}": position[-1]})
+    for name, value in zip(reversed(names[:-1]), reversed(position[:-1])):
+        condition = Q(**{f"{name}__{after}": value}) | Q(**{name: value}) & condition
+    return Q(**{f"{names[0]}__{bound}": position[0]}) & condition
+
+
+def positive_int(value, cutoff=None):
+    """
+    Parse a positive integer query parameter, at most `cutoff`. Raises ValueError for anything else.
+    """
+    value = int(value)
+    if value <= 0:
+        raise ValueError(value)
+    return value if cutoff is None else min(value, cutoff)
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination that seeks on the `ordering` key instead of using OFFSET.
+
+    `ordering` must be unique and indexed (end it with the primary key) so each
+    page is a single index range scan no matter how deep the client pages.
+    """
+
+    ordering = ("id",)
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        position = self.start(queryset, request)
+        return self.finish(self.get_results(queryset, request, position), position)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        `paginate_queryset` reading the page through the async ORM.
+        """
+        position = self.start(queryset, request)
+        return self.finish(await self.aget_results(queryset, request, position), position)
+
+    def start(self, queryset, request):
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        position, self.reverse = self.decode_cursor(request, queryset.model)
+        return position
+
+    def finish(self, results, position):
+        has_more = len(results) > self.page_size
+        self.page = results[: self.page_size]
+        if self.reverse:
+            self.page.reverse()
+
+        self.has_next = position is not None if self.reverse else has_more
+        self.has_previous = has_more if self.reverse else position is not None
+        return self.page
+
+    def get_results(self, queryset, request, position):
+        """
+        Return up to page_size + 1 items after `position` (before it when reversed), in reading order.
+        """
+        return list(self.get_page_queryset(queryset, position))
+
+    async def aget_results(self, queryset, request, position):
+        return [item async for item in self.get_page_queryset(queryset, position)]
+
+    def get_page_queryset(self, queryset, position):
+        if position is not None:
+            queryset = queryset.filter(seek(self.ordering, position, self.reverse))
+
+        order = [f"-{name}" if self.reverse else name for name in self.ordering]
+        return queryset.order_by(*order)[: self.page_size + 1]
+
+    def get_page_size(self, request):
+        page_size = api_settings.PAGE_SIZE
+        if self.page_size_query_param in request.query_params:
+            try:
+                page_size = positive_int(request.query_params[self.page_size_query_param])
+            except ValueError:
+                pass
+        return min(page_size, settings.API_MAX_PAGE_SIZE)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "previous": self.get_previous_link(), "results": data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_position(self, item):
+        if isinstance(item, dict):
+            return [item[name] for name in self.ordering]
+        return [getattr(item, name) for name in self.ordering]
+
+    def encode_cursor(self, item, reverse):
+        position = [value.isoformat() if hasattr(value, "isoformat") else value for value in self.get_position(item)]
+        payload = json.dumps({"r": int(reverse), "p": position}, separators=(",", ":"))
+        cursor = urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+        return replace_query_param(self.base_url, self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request, model):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None, False
+
+        try:
+            payload = json.loads(urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+            values = payload["p"]
+            if len(values) != len(self.ordering):
+                raise ValueError
+            position = tuple(model._meta.get_field(name).to_python(value) for name, value in zip(self.ordering, values))
+            return position, bool(payload["r"])
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message) from None
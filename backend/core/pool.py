@@ -0,0 +1,15 @@
+from django.db import connections
+
+
+def pool_stats():
+    """
+    Return this process' connection pool counters by database alias, None for databases without a pool.
+
+    Counters are psycopg_pool's: the pool's size, its idle connections and the requests waiting for one,
+    and running totals of requests, waits, and connections opened and lost since the pool started.
+    """
+    stats = {}
+    for alias in connections:
+        connection = connections[alias]
+        stats[alias] = connection.pool.get_stats() if connection.settings_dict["OPTIONS"].get("pool") else None
+    return stats
@@ -0,0 +1,112 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.relations import HyperlinkedIdentityField, ManyRelatedField, RelatedField
+
+
+def plan_queryset(queryset, serializer, narrow=False, required=()):
+    """
+    Add the select_related/Prefetch chain `serializer` needs to render `queryset` with a fixed number of queries.
+
+    Single nested serializers become joins, nested lists become prefetches whose querysets are planned
+    recursively from the child serializer. Hyperlinks that only need the foreign key cost nothing.
+    With `narrow`, columns the serializer does not render are not loaded either.
+    """
+    select_related, prefetches = [], []
+    columns = _plan(serializer, queryset.model, "", select_related, prefetches, narrow)
+    if select_related:
+        queryset = queryset.select_related(*select_related)
+    if prefetches:
+        queryset = queryset.prefetch_related(*prefetches)
+    if narrow and columns is not None:
+        queryset = queryset.only(*columns, *required)
+    return queryset
+
+
+def _plan(serializer, model, prefix, select_related, prefetches, narrow):
+    """
+    Collect the joins and prefetches for `serializer` and return the columns it reads, or None if unknown.
+    """
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+
+    columns = []
+    for field in serializer._readable_fields:
+        if field.source == "*":
+            if not isinstance(field, HyperlinkedIdentityField):
+                columns = None
+            continue
+
+        model_field = _resolve_field(model, field.source_attrs)
+        if model_field is None or len(field.source_attrs) > 1:
+            columns = None
+        if model_field is None or not model_field.is_relation:
+            if columns is not None:
+                columns.append(prefix + field.source)
+            continue
+
+        path = prefix + "__".join(field.source_attrs)
+        related_model = model_field.related_model
+
+        if model_field.many_to_many or model_field.one_to_many:
+            required = (model_field.field.name,) if model_field.one_to_many else ()
+            if isinstance(field, serializers.ListSerializer):
+                queryset = plan_queryset(ordered_queryset(related_model), field.child, narrow, required)
+            elif isinstance(field, ManyRelatedField):
+                queryset = ordered_queryset(related_model)
+                if narrow:
+                    queryset = queryset.only("pk", *required)
+            else:
+                columns = None
+                continue
+            prefetches.append(Prefetch(path, queryset=queryset))
+        elif isinstance(field, serializers.BaseSerializer):
+            select_related.append(path)
+            nested = _plan(field, related_model, path + "__", select_related, prefetches, narrow)
+            if columns is not None and nested is not None and model_field.concrete:
+                columns += [path, *nested]
+            else:
+                columns = None
+        elif isinstance(field, RelatedField) and model_field.concrete and field.use_pk_only_optimization():
+            if columns is not None:
+                columns.append(path)
+        else:
+            select_related.append(path)
+            columns = None
+    return columns
+
+
+def _resolve_field(model, source_attrs):
+    """
+    Return the model field `source_attrs` points to, or None if it is not a field.
+    """
+    field = None
+    for attr in source_attrs:
+        if model is None:
+            return None
+        try:
+            field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            return None
+        model = field.related_model
+    return field
+
+
+def ordered_queryset(model):
+    queryset = model._default_manager.all()
+    return queryset if queryset.ordered else queryset.order_by("pk")
+
+
+class PrefetchPlanMixin:
+    """
+    Plan the viewset queryset from the serializer the current action renders with.
+
+    Reads only load the columns the serializer renders (plus the pagination key), writes load
+    whole rows so `save()` updates every field.
+    """
+
+    def get_queryset(self):
+        narrow = self.request.method in SAFE_METHODS
+        required = getattr(self.paginator, "ordering", ())
+        return plan_queryset(super().get_queryset(), self.get_serializer(), narrow, required)
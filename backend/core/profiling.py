@@ -0,0 +1,180 @@
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+# Statements every transaction block makes, they repeat by design
+TRANSACTION_CONTROL = ("SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK TO SAVEPOINT")
+
+_PLACEHOLDER_LISTS = re.compile(r"\((?:\s*%s\s*,)+\s*%s\s*\)")
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_REPEATED_ROWS = re.compile(r"(\([^()]*\))(?:, \1)+")
+
+
+def sql_shape(sql):
+    """
+    Return `sql` without what changes between runs of the same statement: literals, the length of
+    placeholder lists and the number of VALUES rows.
+    """
+    sql = _PLACEHOLDER_LISTS.sub("(%s, ...)", sql)
+    sql = _LITERALS.sub("?", sql)
+    return _REPEATED_ROWS.sub(r"\1, ...", sql)
+
+
+class QueryProfile:
+    """
+    Execute wrapper (see connection.execute_wrapper) counting queries, their time in seconds and how often
+    each SQL shape ran.
+    """
+
+    def __init__(self):
+        self.queries = 0
+        self.duration = 0.0
+        self.shapes = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        began = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - began
+            self.queries += 1
+            if not sql.startswith(TRANSACTION_CONTROL):
+                self.shapes[sql_shape(sql)] += 1
+
+    def repeated(self, threshold=None):
+        """
+        Return the shapes that ran at least `threshold` times (settings.REQUEST_PROFILING_REPEATS) with
+        their counts, probable N+1 patterns.
+        """
+        threshold = threshold or settings.REQUEST_PROFILING_REPEATS
+        return {shape: count for shape, count in self.shapes.most_common() if count >= threshold}
+
+
+class RequestProfile(QueryProfile):
+    """
+    QueryProfile of a request, with the times its view returned and its response was rendered.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.started = time.perf_counter()
+        self.marks = {}
+
+    def mark(self, name):
+        """
+        Record the time and database time at `name`, once.
+        """
+        self.marks.setdefault(name, (time.perf_counter(), self.duration))
+
+    def timings(self):
+        """
+        Return the request's db, serialize, render and total times in milliseconds.
+
+        `serialize` is the view's time outside the database, mostly spent serializing, and `render` the
+        time spent turning the response data into bytes.
+        """
+        now = time.perf_counter()
+        view_started, view_db_started = self.marks.get("view", (self.started, 0.0))
+        view_finished, view_db_finished = self.marks.get("response", (now, self.duration))
+        render_started, _ = self.marks.get("render", (now, 0.0))
+        render_finished, _ = self.marks.get("rendered", (render_started, 0.0))
+        serialize = (view_finished - view_started) - (view_db_finished - view_db_started)
+        return {
+            "db": self.duration * 1000,
+            "serialize": max(serialize, 0.0) * 1000,
+            "render": (render_finished - render_started) * 1000,
+            "total": (now - self.started) * 1000,
+        }
+
+
+class ProfilingMiddleware:
+    """
+    Profile every request when settings.REQUEST_PROFILING is on, and remove itself when it is off.
+
+    Queries are counted and timed through `connection.execute_wrapper`. The db, serialize, render and total
+    times go out as a Server-Timing header and a log line, along with a warning for SQL shapes repeated
+    settings.REQUEST_PROFILING_REPEATS times or more, probable N+1 patterns. Under ASGI the wrapper goes on
+    the connection of the thread the request's queries run in.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_PROFILING:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        request.request_profile = profile = RequestProfile()
+        with connection.execute_wrapper(profile):
+            response = self.get_response(request)
+        self.report(request, response, profile)
+        return response
+
+    async def __acall__(self, request):
+        request.request_profile = profile = RequestProfile()
+        wrappers = ExitStack()
+        await sync_to_async(lambda: wrappers.enter_context(connection.execute_wrapper(profile)))()
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(wrappers.close)()
+        self.report(request, response, profile)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.request_profile.mark("view")
+
+    def process_template_response(self, request, response):
+        request.request_profile.mark("response")
+        request.request_profile.mark("render")
+        response.add_post_render_callback(lambda _: request.request_profile.mark("rendered"))
+        return response
+
+    def report(self, request, response, profile):
+        profile.mark("response")
+        timings = profile.timings()
+        response["Server-Timing"] = ", ".join(
+            [f'db;dur={timings["db"]:.1f};desc="{profile.queries} queries"']
+            + [f"{name};dur={timings[name]:.1f}" for name in ("serialize", "render", "total")]
+        )
+
+        fields = {
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "queries": profile.queries,
+            **{f"{name}_ms": round(duration, 1) for name, duration in timings.items()},
+        }
+        logger.info(
+            "%s %s %s queries=%d db=%.1fms serialize=%.1fms render=%.1fms total=%.1fms",
+            request.method,
+            request.path,
+            response.status_code,
+            profile.queries,
+            *timings.values(),
+            extra={"profile": fields},
+        )
+        for shape, count in profile.repeated().items():
+            logger.warning(
+                "%s %s ran the same query %d times, probable N+1: %s",
+                request.method,
+                request.path,
+                count,
+                shape,
+                extra={"profile": {**fields, "repeated": count, "sql": shape}},
+            )
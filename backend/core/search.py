@@ -0,0 +1,108 @@
+from functools import reduce
+from operator import or_
+
+from django.contrib.postgres.indexes import GistIndex, OpClass
+from django.contrib.postgres.lookups import TrigramWordSimilar
+from django.contrib.postgres.search import TrigramWordDistance, TrigramWordSimilarity
+from django.db import models
+from django.db.models.functions import Cast, Collate, Greatest, Upper
+
+# Trigrams only narrow a search down from three characters on
+TRIGRAM_MIN_LENGTH = 3
+
+
+def search_key(field):
+    """
+    Return the expression `icontains` and `istartswith` compare `field` on, which its trigram index covers.
+    """
+    return Upper(Cast(field, output_field=models.TextField()))
+
+
+def prefix_key(field):
+    """
+    Return `search_key(field)` in the "C" collation, whose byte order lets prefixes be read as index ranges.
+    """
+    return Collate(search_key(field), "C")
+
+
+def trigram_index(field, name):
+    """
+    GiST index serving `icontains` filters (admin search included) and trigram similarity on `field`, and
+    returning the rows most similar to a term in order, see `autocomplete`.
+    """
+    return GistIndex(OpClass(search_key(field), name="gist_trgm_ops"), name=name)
+
+
+def prefix_index(field, name):
+    """
+    B-tree index returning the rows whose `field` starts with a term in order, see `autocomplete`.
+    """
+    return models.Index(prefix_key(field), models.F("id"), name=name)
+
+
+def search(queryset, fields, term):
+    """
+    Filter `queryset` to rows where one of `fields` contains `term` or has a word similar to it (typos
+    included), all through the fields' trigram indexes.
+    """
+    term = term.strip()
+    conditions = [models.Q(**{f"{field}__icontains": term}) for field in fields]
+    if len(term) >= TRIGRAM_MIN_LENGTH:
+        conditions += [models.Q(TrigramWordSimilar(search_key(field), term.upper())) for field in fields]
+    return queryset.filter(reduce(or_, conditions))
+
+
+def autocomplete(queryset, fields, term, limit):
+    """
+    Return up to `limit` rows of `queryset` matching `term` for a typeahead, best matches first.
+
+    Rows where a field starts with `term` come first, field by field in `fields` order and alphabetically
+    within one; each is an ordered range scan of the field's prefix index that stops after `limit` rows.
+    From three characters on the rest are filled with rows containing `term` or a word similar to it,
+    ranked by word similarity. Each field's trigram index returns its most similar rows in order and stops
+    after the rows still wanted, so common terms cost no more than rare ones; rows tied at that cut are
+    picked in no particular order.
+
+    Costs one query per field, and one more when prefixes leave room.
+    """
+    term = term.strip().upper()
+    if not term or limit <= 0:
+        return []
+
+    # The smallest string past every string starting with term
+    upper = term[:-1] + chr(ord(term[-1]) + 1)
+    results, seen = [], set()
+    for field in fields:
+        key = prefix_key(field)
+        matches = (
+            queryset.alias(prefix=key)
+            .filter(prefix__gte=term, prefix__lt=upper)
+            .exclude(pk__in=seen)
+            .order_by(key, "pk")[: limit - len(results)]
+        )
+        for row in matches:
+            results.append(row)
+            seen.add(row.pk)
+        if len(results) == limit:
+            return results
+
+    if len(term) < TRIGRAM_MIN_LENGTH:
+        return results
+
+    # Each result is among the nearest rows of the field it is most similar on, as rows nearer on that
+    # field rank above it
+    wanted = limit - len(results)
+    nearest = [
+        queryset.filter(TrigramWordSimilar(search_key(field), term))
+        .exclude(pk__in=seen)
+        .order_by(TrigramWordDistance(term, search_key(field)))
+        .values("pk")[:wanted]
+        for field in fields
+    ]
+    ranks = [TrigramWordSimilarity(term, search_key(field)) for field in fields]
+    ranked = (
+        queryset.filter(pk__in=nearest[0].union(*nearest[1:]))
+        .annotate(rank=Greatest(*ranks) if len(ranks) > 1 else ranks[0])
+        .order_by("-rank", "pk")[:wanted]
+    )
+    return results + list(ranked)
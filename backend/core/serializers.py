@@ -0,0 +1,73 @@
+from rest_framework import serializers
+from rest_framework.utils.field_mapping import get_detail_view_name
+
+
+def parse_paths(value):
+    """
+    Turn "participants.name,title" into {"participants": {"name": {}}, "title": {}}.
+    """
+    tree = {}
+    for path in value.split(","):
+        node = tree
+        for name in filter(None, path.strip().split(".")):
+            node = node.setdefault(name, {})
+    return tree
+
+
+class ExpandableFieldsMixin:
+    """
+    Let clients shape the output with `?fields=` and `?expand=`.
+
+    Both take comma-separated dotted paths. `fields` picks what to render (`participants.name`
+    also expands `participants`), `expand` picks which nested objects to render in full. As soon as
+    either is given, nested objects that are not expanded collapse to their hyperlinks. Without
+    them the output is unchanged.
+    """
+
+    fields_query_param = "fields"
+    expand_query_param = "expand"
+
+    def get_fields(self):
+        fields = super().get_fields()
+        shape = self.get_shape()
+        if shape is None:
+            return fields
+
+        only, expand = shape
+        if only:
+            fields = {name: field for name, field in fields.items() if name in only}
+
+        for name, field in fields.items():
+            nested = field.child if isinstance(field, serializers.ListSerializer) else field
+            if not isinstance(nested, serializers.BaseSerializer):
+                continue
+            nested_only = only.get(name) if only else None
+            if nested_only or name in expand:
+                nested._shape = (nested_only or None, expand.get(name, {}))
+            else:
+                fields[name] = self.build_collapsed_field(field, nested)
+        return fields
+
+    def get_shape(self):
+        """
+        Return the (fields, expand) trees for this serializer, or None when the output is not shaped.
+        """
+        if hasattr(self, "_shape"):
+            return self._shape
+
+        root = self.parent if isinstance(self.parent, serializers.ListSerializer) else self
+        request = self.context.get("request")
+        if root.parent is not None or request is None:
+            return None
+
+        query_params = getattr(request, "query_params", request.GET)
+        if self.fields_query_param not in query_params and self.expand_query_param not in query_params:
+            return None
+        only = parse_paths(query_params.get(self.fields_query_param, "")) or None
+        return only, parse_paths(query_params.get(self.expand_query_param, ""))
+
+    def build_collapsed_field(self, field, nested):
+        kwargs = {"read_only": True, "many": isinstance(field, serializers.ListSerializer)}
+        if field.source is not None:
+            kwargs["source"] = field.source
+        return serializers.HyperlinkedRelatedField(view_name=get_detail_view_name(nested.Meta.model), **kwargs)
@@ -0,0 +1,180 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, migrations
+from django.db.models import F
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+from .fastpath import UrlBuilder
+from .models import Tombstone
+from .pagination import seek
+
+# Transactions still running started no earlier than this, so everything they write will be newer
+WATERMARK_SQL = """
+SELECT least(clock_timestamp(), min(xact_start))
+FROM pg_stat_activity
+WHERE datname = current_database() AND backend_type = 'client backend' AND pid <> pg_backend_pid()
+"""
+
+TOMBSTONE_FUNCTION_SQL = """
+CREATE FUNCTION core_record_tombstones() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO core_tombstone (model, object_id, deleted_at)
+    SELECT TG_ARGV[0], id, clock_timestamp() FROM deleted;
+    RETURN NULL;
+END
+$$
+"""
+
+TOMBSTONE_TRIGGER_SQL = """
+CREATE TRIGGER {table}_tombstones AFTER DELETE ON {table}
+REFERENCING OLD TABLE AS deleted FOR EACH STATEMENT EXECUTE FUNCTION core_record_tombstones('{label}')
+"""
+
+
+def tombstone_trigger(table, label):
+    """
+    Migration operation recording a Tombstone for every row deleted from `table`, one INSERT per statement.
+    """
+    return migrations.RunSQL(
+        TOMBSTONE_TRIGGER_SQL.format(table=table, label=label), f"DROP TRIGGER {table}_tombstones ON {table}"
+    )
+
+
+def get_watermark():
+    """
+    Return the time before which every change that will ever be committed is already visible.
+
+    Rows get their `updated_at` and tombstones their `deleted_at` after their transaction started, so the
+    oldest transaction running elsewhere bounds what is still to come. `updated_at` is taken by the
+    application before writing, settings.SYNC_CLOCK_SKEW covers how much earlier than that it can be.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(WATERMARK_SQL)
+        [watermark] = cursor.fetchone()
+    return watermark - timedelta(seconds=settings.SYNC_CLOCK_SKEW)
+
+
+class SyncTokenExpired(APIException):
+    status_code = status.HTTP_410_GONE
+    default_detail = "Deletions this old are no longer kept, fetch the whole list again."
+    default_code = "sync_token_expired"
+
+
+class DeltaSyncMixin:
+    """
+    Answer `list` requests with `?updated_since=<sync token>` with the rows changed and deleted since.
+
+    An empty token starts from nothing. Responses hold the changed rows rendered as on `list` (in
+    `updated_at` order), the ids of the `deleted` ones (see Tombstone) and a `sync_token` for the next
+    sync. Clients apply `results` before `deleted`. When there are more changes than a page holds, `next`
+    links to the rest and the last page's token is the one to keep. Rows and tombstones are read from
+    (updated_at, id) and (model, deleted_at, id) indexes, so a sync costs the changes, not the table.
+
+    Filters narrow `results` only, rows leaving the filtered set are not reported. Tokens whose deletions
+    were pruned (settings.SYNC_TOMBSTONE_DAYS) answer 410 Gone. Needs FastReadMixin.
+    """
+
+    sync_query_param = "updated_since"
+    invalid_sync_token_message = "Invalid sync token."
+
+    def list(self, request, *args, **kwargs):
+        if self.sync_query_param in request.query_params:
+            return self.sync(request)
+        return super().list(request, *args, **kwargs)
+
+    def use_async_read(self):
+        return self.sync_query_param not in self.request.query_params and super().use_async_read()
+
+    def sync(self, request):
+        token = request.query_params[self.sync_query_param]
+        watermark, updated, deleted = self.decode_sync_token(token) if token else (None, None, None)
+        if deleted is not None and deleted[0] < timezone.now() - timedelta(days=settings.SYNC_TOMBSTONE_DAYS):
+            raise SyncTokenExpired
+        if watermark is None:
+            watermark = get_watermark()
+            # Clients starting from nothing have nothing to delete
+            deleted = deleted or (watermark, 0)
+        page_size = self.paginator.get_page_size(request) if self.paginator else api_settings.PAGE_SIZE
+
+        queryset = self.filter_queryset(self.get_queryset()).filter(updated_at__lt=watermark)
+        if updated is not None:
+            queryset = queryset.filter(seek(("updated_at", "pk"), updated))
+        rows, keys = self.get_sync_page(queryset.order_by("updated_at", "pk"), page_size)
+
+        tombstones = Tombstone.objects.filter(
+            seek(("deleted_at", "pk"), deleted),
+            model=queryset.model._meta.label_lower,
+            deleted_at__lt=watermark,
+        )
+        tombstones = list(
+            tombstones.order_by("deleted_at", "pk").values_list("deleted_at", "pk", "object_id")[: page_size + 1]
+        )
+
+        more = len(keys) > page_size or len(tombstones) > page_size
+        if more:
+            keys, tombstones = keys[:page_size], tombstones[:page_size]
+            updated = keys[-1] if keys else updated
+            deleted = tombstones[-1][:2] if tombstones else deleted
+            token = self.encode_sync_token(watermark, updated, deleted)
+        else:
+            token = self.encode_sync_token(None, (watermark, 0), (watermark, 0))
+        return Response(
+            {
+                "next": (
+                    replace_query_param(request.build_absolute_uri(), self.sync_query_param, token) if more else None
+                ),
+                "sync_token": token,
+                "results": rows,
+                "deleted": [object_id for _, _, object_id in tombstones],
+            }
+        )
+
+    def get_sync_page(self, queryset, page_size):
+        """
+        Return the first `page_size` items of `queryset` rendered, and the (updated_at, pk) keys of up to one more.
+        """
+        builder = self.get_row_builder() if self.use_fast_read() else None
+        if builder is not None:
+            columns = dict.fromkeys([*builder.columns, "updated_at"])
+            rows = list(queryset.prefetch_related(None).values(*columns)[: page_size + 1])
+            keys = [(row["updated_at"], row["pk"]) for row in rows]
+            return builder.build(rows[:page_size], UrlBuilder(self.request, self.format_kwarg)), keys
+
+        # The planned queryset may not load `updated_at`
+        instances = list(queryset.annotate(sync_updated_at=F("updated_at"))[: page_size + 1])
+        keys = [(instance.sync_updated_at, instance.pk) for instance in instances]
+        return self.get_serializer(instances[:page_size], many=True).data, keys
+
+    def encode_sync_token(self, watermark, updated, deleted):
+        payload = {
+            "w": watermark and watermark.isoformat(),
+            "u": updated and [updated[0].isoformat(), updated[1]],
+            "d": [deleted[0].isoformat(), deleted[1]],
+        }
+        return urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode().rstrip("=")
+
+    def decode_sync_token(self, token):
+        try:
+            payload = json.loads(urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+            watermark = payload["w"] and self._parse_datetime(payload["w"])
+            updated = payload["u"] and (self._parse_datetime(payload["u"][0]), int(payload["u"][1]))
+            deleted = (self._parse_datetime(payload["d"][0]), int(payload["d"][1]))
+        except (TypeError, ValueError, KeyError, IndexError):
+            raise ValidationError({self.sync_query_param: [self.invalid_sync_token_message]}) from None
+        return watermark, updated, deleted
+
+    @staticmethod
+    def _parse_datetime(value):
+        value = parse_datetime(value)
+        if value is None or timezone.is_naive(value):
+            raise ValueError
+        return value
@@ -0,0 +1,269 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from types import ModuleType
+
+import httpx
+import pytest
+from django.core.asgi import get_asgi_application
+from django.core.wsgi import get_wsgi_application
+from django.db.backends.signals import connection_created
+from django.urls import include, path
+from django.utils import timezone
+from rest_framework.routers import DefaultRouter
+
+from appointment.models import Appointment
+from appointment.views import AppointmentViewSet
+from department.models import Department
+from department.views import DepartmentViewSet
+from employee.models import Employee
+from employee.views import EmployeeViewSet
+
+VIEWSETS = [("appointments", AppointmentViewSet), ("departments", DepartmentViewSet), ("employees", EmployeeViewSet)]
+
+URLS = [
+    "/api/v1/appointments/",
+    "/api/v1/appointments/?page_size=2",
+    "/api/v1/appointments/?start=2025-06-07T00:00:00Z&end=2025-06-09T00:00:00Z",
+    "/api/v1/appointments/?fields=id,title,participants.name&expand=employee",
+    "/api/v1/employees/",
+    "/api/v1/employees/?search=employe&fields=id,department",
+    "/api/v1/departments/",
+    "/api/v1/departments/?fields=manager,name",
+]
+
+
+def async_urlconf():
+    # Routers decide between sync and async views when building their patterns
+    router = DefaultRouter()
+    for prefix, viewset in VIEWSETS:
+        router.register(prefix, viewset)
+    urlconf = ModuleType("async_urls")
+    urlconf.urlpatterns = [path("api/v1/", include(router.urls))]
+    return urlconf
+
+
+@pytest.fixture
+def async_reads(settings):
+    """
+    Switch the test client to views built with ASYNC_READS on and return the sync urlconf.
+    """
+    sync_urlconf = settings.ROOT_URLCONF
+    settings.ASYNC_READS = True
+    settings.ROOT_URLCONF = async_urlconf()
+    return sync_urlconf
+
+
+def fetch_sync(api_client, settings, sync_urlconf, url, **headers):
+    async_urlconf = settings.ROOT_URLCONF
+    settings.ROOT_URLCONF = sync_urlconf
+    try:
+        return api_client.get(url, **headers)
+    finally:
+        settings.ROOT_URLCONF = async_urlconf
+
+
+@pytest.fixture
+def mixed_data(staffed_appointment_factory):
+    start = timezone.make_aware(datetime(2025, 6, 7, 9, 30, 15, 123456))
+    for i in range(3):
+        staffed_appointment_factory(start=start + timedelta(hours=i), participants=i)
+    staffed_appointment_factory(start=start, participants=3).participants.clear()
+    Appointment.objects.create(
+        start_datetime=start - timedelta(days=1),
+        end_datetime=start - timedelta(days=1, minutes=-30),
+        title="Daily",
+        recurrence="FREQ=DAILY;COUNT=5",
+        employee=Employee.objects.first(),
+    )
+    Department.objects.create(name="Unmanaged", description="Ünïcödé 😀")
+
+
+@pytest.mark.django_db
+def test_views_are_async_only_with_the_setting(settings):
+    settings.ASYNC_READS = False
+    assert not asyncio.iscoroutinefunction(EmployeeViewSet.as_view({"get": "list"}))
+
+    settings.ASYNC_READS = True
+    assert asyncio.iscoroutinefunction(EmployeeViewSet.as_view({"get": "list", "post": "create"}))
+    assert not asyncio.iscoroutinefunction(AppointmentViewSet.as_view({"get": "closest"}))
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("url", URLS)
+def test_async_reads_match_sync_reads(api_client, settings, async_reads, mixed_data, url):
+    settings.APPOINTMENT_DAY_CACHE_TIMEOUT = 0
+    regular = fetch_sync(api_client, settings, async_reads, url)
+    response = api_client.get(url)
+
+    assert response.status_code == 200
+    assert response.content == regular.content
+    assert response["ETag"] == regular["ETag"]
+
+
+@pytest.mark.django_db
+def test_async_reads_follow_cursors_identically(api_client, settings, async_reads, mixed_data):
+    url = "/api/v1/appointments/?page_size=2"
+    while url:
+        regular = fetch_sync(api_client, settings, async_reads, url)
+        assert api_client.get(url).content == regular.content
+        url = regular.json()["next"]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("prefix", [prefix for prefix, _ in VIEWSETS])
+def test_async_retrieve_matches_sync_retrieve(api_client, settings, async_reads, mixed_data, prefix):
+    model = {"appointments": Appointment, "departments": Department, "employees": Employee}[prefix]
+    for pk in model.objects.values_list("pk", flat=True):
+        url = f"/api/v1/{prefix}/{pk}/"
+        regular = fetch_sync(api_client, settings, async_reads, url)
+        response = api_client.get(url)
+        assert response.content == regular.content
+        assert response["ETag"] == regular["ETag"]
+
+    for url in (f"/api/v1/{prefix}/0/", f"/api/v1/{prefix}/x/"):
+        assert api_client.get(url).status_code == 404
+
+
+@pytest.mark.django_db
+def test_async_reads_revalidate(api_client, async_reads, mixed_data):
+    response = api_client.get("/api/v1/employees/")
+
+    assert api_client.get("/api/v1/employees/", HTTP_IF_NONE_MATCH=response["ETag"]).status_code == 304
+    Employee.objects.create(name="New", email="new@testmail.com")
+    assert api_client.get("/api/v1/employees/", HTTP_IF_NONE_MATCH=response["ETag"]).status_code == 200
+
+
+@pytest.mark.django_db
+def test_async_reads_report_invalid_filters(api_client, async_reads):
+    response = api_client.get("/api/v1/appointments/?date=tomorrow")
+    assert response.status_code == 400
+    assert "date" in response.json()
+
+
+@pytest.mark.django_db
+def test_writes_keep_the_sync_path(api_client, async_reads, department):
+    url = "/api/v1/employees/"
+    response = api_client.post(
+        url,
+        {
+            "name": "Async",
+            "email": "async@testmail.com",
+            "department": f"http://testserver/api/v1/departments/{department.pk}/",
+        },
+        format="json",
+    )
+    assert response.status_code == 201
+    pk = response.json()["id"]
+
+    response = api_client.patch(f"{url}{pk}/", {"name": "Renamed"}, format="json")
+    assert response.status_code == 200
+    assert Employee.objects.get(pk=pk).name == "Renamed"
+
+    assert api_client.delete(f"{url}{pk}/").status_code == 204
+    assert not Employee.objects.filter(pk=pk).exists()
+
+
+@pytest.mark.django_db
+def test_cached_days_keep_the_sync_path(api_client, async_reads, mixed_data, django_assert_num_queries):
+    url = "/api/v1/appointments/?date=2025-06-07"
+    first = api_client.get(url)
+
+    # table states, the page comes from the cache
+    with django_assert_num_queries(1):
+        assert api_client.get(url).content == first.content
+
+
+QUERY_DELAY = 0.02
+CLIENTS = 50
+REQUESTS = 500
+WSGI_WORKERS = 4
+
+
+def delay_queries(execute, sql, params, many, context):
+    time.sleep(QUERY_DELAY)
+    return execute(sql, params, many, context)
+
+
+def slow_connection(sender, connection, **kwargs):
+    # Threads reconnect the same wrapper for every request
+    if delay_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(delay_queries)
+
+
+def percentile(latencies, fraction):
+    latencies = sorted(latencies)
+    return latencies[min(int(len(latencies) * fraction), len(latencies) - 1)]
+
+
+def load_asgi(url):
+    async def run():
+        clients = asyncio.Semaphore(CLIENTS)
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=get_asgi_application())) as client:
+
+            async def timed():
+                async with clients:
+                    began = time.perf_counter()
+                    response = await client.get(url)
+                    assert response.status_code == 200
+                    return time.perf_counter() - began
+
+            return await asyncio.gather(*(timed() for _ in range(REQUESTS)))
+
+    return asyncio.run(run())
+
+
+def load_wsgi(url):
+    application = get_wsgi_application()
+    workers = threading.BoundedSemaphore(WSGI_WORKERS)
+
+    def worker_pool(environ, start_response):
+        # Requests wait for one of WSGI_WORKERS workers, like with `gunicorn --threads`
+        with workers:
+            return list(application(environ, start_response))
+
+    def timed(_):
+        began = time.perf_counter()
+        response = httpx.Client(transport=httpx.WSGITransport(app=worker_pool)).get(url)
+        assert response.status_code == 200
+        return time.perf_counter() - began
+
+    with ThreadPoolExecutor(CLIENTS) as clients:
+        return list(clients.map(timed, range(REQUESTS)))
+
+
+@pytest.mark.benchmark
+@pytest.mark.django_db(transaction=True)
+def test_async_reads_load_test(settings, capsys):
+    """
+    Send REQUESTS employee list reads from CLIENTS concurrent clients while every query takes QUERY_DELAY
+    longer, to ASGI with async reads and to WSGI with WSGI_WORKERS workers.
+    """
+    department = Department.objects.create(name="Load")
+    Employee.objects.bulk_create(
+        Employee(name=f"Employee {n}", email=f"employee{n}@testmail.com", department=department) for n in range(200)
+    )
+    url = "http://testserver/api/v1/employees/?page_size=50"
+
+    settings.ASYNC_READS = True
+    timings = {}
+    connection_created.connect(slow_connection)
+    try:
+        for name, load, urlconf in [("asgi", load_asgi, async_urlconf()), ("wsgi", load_wsgi, settings.ROOT_URLCONF)]:
+            settings.ROOT_URLCONF = urlconf
+            began = time.perf_counter()
+            latencies = load(url)
+            timings[name] = time.perf_counter() - began, latencies
+    finally:
+        connection_created.disconnect(slow_connection)
+
+    with capsys.disabled():
+        for name, (elapsed, latencies) in timings.items():
+            print(
+                f"\n{name}: {REQUESTS / elapsed:.0f} req/s, p50 {percentile(latencies, 0.5) * 1000:.0f} ms, "
+                f"p99 {percentile(latencies, 0.99) * 1000:.0f} ms"
+            )
+    assert timings["asgi"][0] < timings["wsgi"][0]
+    assert percentile(timings["asgi"][1], 0.99) < percentile(timings["wsgi"][1], 0.99)
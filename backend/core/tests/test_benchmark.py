@@ -0,0 +1,89 @@
+import json
+import os
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+from rest_framework.test import APIClient
+
+from core import benchmark
+from core.datasets import MIN_EMPLOYEES, generate
+
+# Comma-separated dataset sizes, in appointments, test_endpoint_benchmarks runs at
+SCALES = sorted(int(scale) for scale in os.getenv("BENCHMARK_SCALES", "1000").split(","))
+
+# Where test_endpoint_benchmarks writes its results, compare them with `manage.py compare_benchmarks`
+OUTPUT = os.getenv("BENCHMARK_OUTPUT", "benchmark.json")
+
+
+@pytest.mark.django_db
+def test_every_scenario_runs(tmp_path):
+    generate(MIN_EMPLOYEES * 2)
+    results = benchmark.run(APIClient(), repeats=2)
+    assert list(results) == [scenario.name for scenario in benchmark.SCENARIOS]
+    assert all(result["p50_ms"] > 0 and result["peak_memory_kb"] > 0 for result in results.values())
+
+    path = tmp_path / "results.json"
+    benchmark.write_results(path, {"40": {"dataset": {}, "scenarios": results}})
+    assert json.loads(path.read_text())["scales"]["40"]["scenarios"] == results
+
+
+def results(**scenarios):
+    return {"scales": {"1000": {"scenarios": scenarios}}}
+
+
+def timings(p50=10.0, p95=20.0, queries=3, memory=100):
+    return {"p50_ms": p50, "p95_ms": p95, "queries": queries, "peak_memory_kb": memory}
+
+
+def test_compare_flags_regressions():
+    baseline = results(steady=timings(), slower=timings(), chattier=timings(), noisy=timings(p50=1.0))
+    current = results(
+        steady=timings(p50=11.0, memory=150),
+        slower=timings(p95=30.0),
+        chattier=timings(queries=4),
+        noisy=timings(p50=1.9),
+        added=timings(),
+    )
+
+    regressions = {
+        (name, metric) for _, name, metric, _, _, regressed in benchmark.compare(baseline, current, 0.2) if regressed
+    }
+    assert regressions == {("slower", "p95_ms"), ("chattier", "queries")}
+
+
+def test_compare_benchmarks_command(tmp_path):
+    baseline, current = tmp_path / "baseline.json", tmp_path / "current.json"
+    baseline.write_text(json.dumps(results(list=timings())))
+    current.write_text(json.dumps(results(list=timings(p95=21.0))))
+
+    out = StringIO()
+    call_command("compare_benchmarks", baseline, current, stdout=out)
+    assert "No regressions" in out.getvalue()
+
+    current.write_text(json.dumps(results(list=timings(queries=5))))
+    with pytest.raises(CommandError, match="1 regression"):
+        call_command("compare_benchmarks", baseline, current, stdout=StringIO())
+
+
+@pytest.mark.benchmark
+@pytest.mark.django_db
+def test_endpoint_benchmarks(capsys):
+    """
+    Benchmark every scenario at each of SCALES, growing one dataset, and write the results to OUTPUT.
+    """
+    scales, dataset = {}, {}
+    for scale in SCALES:
+        counts = generate(scale - dataset.get("appointments", 0))
+        dataset = {kind: dataset.get(kind, 0) + added for kind, added in counts.items()}
+        scales[str(scale)] = {"dataset": dataset, "scenarios": benchmark.run(APIClient())}
+    benchmark.write_results(OUTPUT, scales)
+
+    with capsys.disabled():
+        for scale, result in scales.items():
+            print(f"\n{scale} appointments:")
+            for name, timing in result["scenarios"].items():
+                print(
+                    f"  {name}: p50 {timing['p50_ms']} ms, p95 {timing['p95_ms']} ms, {timing['queries']} queries, "
+                    f"{timing['peak_memory_kb']} KB"
+                )
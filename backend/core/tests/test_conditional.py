@@ -0,0 +1,208 @@
+import threading
+
+import pytest
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.http import http_date
+
+from appointment.models import Appointment
+from appointment.serializers import AppointmentReadSerializer
+from core.conditional import TABLE_STATE_SQL, rendered_models
+from core.models import Tombstone
+from department.models import Department
+from department.serializers import DepartmentSerializer
+from employee.models import Employee
+
+APPOINTMENTS_URL = "/api/v1/appointments/"
+EMPLOYEES_URL = "/api/v1/employees/"
+
+
+def rename(instance):
+    # Saves that change nothing write nothing
+    instance.name = f"{instance.name} (renamed)"
+    instance.save()
+
+
+@pytest.fixture
+def appointments(staffed_appointment_factory):
+    return [staffed_appointment_factory(participants=1) for _ in range(3)]
+
+
+def revalidate(api_client, url, response, **headers):
+    return api_client.get(url, HTTP_IF_NONE_MATCH=response["ETag"], **headers)
+
+
+@pytest.mark.django_db
+def test_rendered_models_follow_the_serializer_tree():
+    assert rendered_models(AppointmentReadSerializer()) == {Appointment, Employee, Department}
+    assert rendered_models(DepartmentSerializer()) == {Employee}
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "url",
+    [APPOINTMENTS_URL, f"{APPOINTMENTS_URL}?date=2025-06-07", "/api/v1/employees/", "/api/v1/departments/"],
+)
+def test_unchanged_list_is_not_modified(api_client, appointments, url):
+    response = api_client.get(url)
+    assert response.status_code == 200
+    assert response["Cache-Control"] == "no-cache"
+    assert "Accept" in response["Vary"]
+
+    response = revalidate(api_client, url, response)
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response["ETag"]
+
+
+@pytest.mark.django_db
+def test_not_modified_skips_serialization(api_client, appointments):
+    response = api_client.get(APPOINTMENTS_URL)
+
+    with CaptureQueriesContext(connection) as queries:
+        assert revalidate(api_client, APPOINTMENTS_URL, response).status_code == 304
+    [query] = queries.captured_queries
+    assert "COUNT(" not in query["sql"].upper()
+
+
+@pytest.mark.django_db
+def test_list_validators_read_indexes(appointments):
+    with connection.cursor() as cursor:
+        cursor.execute("SET LOCAL enable_seqscan = off")
+        models = [Appointment, Department, Employee]
+        sql = ", ".join(
+            TABLE_STATE_SQL.format(tombstone=Tombstone._meta.db_table, table=model._meta.db_table) for model in models
+        )
+        cursor.execute(f"EXPLAIN SELECT {sql}", [model._meta.label_lower for model in models])
+        plan = "\n".join(row for [row] in cursor.fetchall())
+    assert "Seq Scan" not in plan
+    assert plan.count("Index Only Scan Backward") == 6
+
+
+@pytest.mark.django_db
+def test_last_modified(api_client, appointments, settings):
+    # Changes within SYNC_CLOCK_SKEW of now may still be joined by older ones
+    assert "Last-Modified" not in api_client.get(APPOINTMENTS_URL)
+    settings.SYNC_CLOCK_SKEW = 0
+
+    response = api_client.get(APPOINTMENTS_URL)
+    latest = max(Appointment.objects.latest("updated_at").updated_at, Employee.objects.latest("updated_at").updated_at)
+    assert response["Last-Modified"] == http_date(int(latest.timestamp()))
+
+    response = api_client.get(APPOINTMENTS_URL, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+    assert response.status_code == 304
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "change",
+    [
+        lambda appointments: appointments[0].save(),
+        lambda appointments: appointments[1].delete(),
+        lambda appointments: appointments[0].participants.clear(),
+        lambda appointments: rename(appointments[0].employee),
+        lambda appointments: appointments[0].employee.participants.add(appointments[2]),
+        lambda appointments: rename(appointments[0].employee.department),
+        lambda appointments: Department.objects.create(name="Unrelated"),
+        lambda appointments: Employee.objects.filter(participants=appointments[2]).delete(),
+    ],
+    ids=["edit", "delete", "participants", "employee", "reverse participants", "department", "insert", "cascade"],
+)
+def test_changes_invalidate_the_etag(api_client, appointments, change):
+    response = api_client.get(APPOINTMENTS_URL)
+    change(appointments)
+    assert revalidate(api_client, APPOINTMENTS_URL, response).status_code == 200
+
+
+@pytest.mark.django_db(transaction=True)
+def test_commits_of_older_changes_invalidate_the_etag(api_client, settings):
+    settings.SYNC_CLOCK_SKEW = 0
+    written, listed = threading.Event(), threading.Event()
+
+    def write():
+        try:
+            with transaction.atomic():
+                Employee.objects.create(name="Slow", email="slow@testmail.com")
+                written.set()
+                listed.wait(5)
+        finally:
+            connection.close()
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    assert written.wait(5)
+    # Stamped later, committed first
+    Employee.objects.create(name="Fast", email="fast@testmail.com")
+    response = api_client.get(EMPLOYEES_URL)
+    listed.set()
+    writer.join()
+
+    assert [item["name"] for item in response.json()["results"]] == ["Fast"]
+    assert "Last-Modified" not in response
+    response = revalidate(api_client, EMPLOYEES_URL, response)
+    assert response.status_code == 200
+    assert [item["name"] for item in response.json()["results"]] == ["Slow", "Fast"]
+    assert revalidate(api_client, EMPLOYEES_URL, response).status_code == 304
+
+
+@pytest.mark.django_db
+def test_etag_depends_on_the_representation(api_client, appointments):
+    response = api_client.get(APPOINTMENTS_URL)
+    assert revalidate(api_client, APPOINTMENTS_URL, response, HTTP_ACCEPT="text/html").status_code == 200
+
+
+@pytest.mark.django_db
+def test_retrieve(api_client, appointments):
+    url = f"{APPOINTMENTS_URL}{appointments[0].pk}/"
+    response = api_client.get(url)
+    assert revalidate(api_client, url, response).status_code == 304
+
+    appointments[1].save()
+    assert revalidate(api_client, url, response).status_code == 304
+
+    appointments[0].save()
+    assert revalidate(api_client, url, response).status_code == 200
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("pk", ["0", "abc"])
+def test_retrieve_missing(api_client, pk):
+    response = api_client.get(f"{APPOINTMENTS_URL}{pk}/")
+    assert response.status_code == 404
+    assert "ETag" not in response
+
+
+@pytest.mark.django_db
+def test_closest(api_client, appointments):
+    url = f"{APPOINTMENTS_URL}closest/"
+    response = api_client.get(url)
+    assert response.status_code == 200
+    assert revalidate(api_client, url, response).status_code == 304
+
+    appointments[1].save()
+    assert revalidate(api_client, url, response).status_code == 304
+
+    appointments[0].start_datetime = timezone.now() + timezone.timedelta(days=1)
+    appointments[0].end_datetime = appointments[0].start_datetime + timezone.timedelta(hours=1)
+    appointments[0].save()
+    assert revalidate(api_client, url, response).status_code == 200
+
+
+@pytest.mark.django_db
+def test_closest_without_appointments(api_client):
+    response = api_client.get(f"{APPOINTMENTS_URL}closest/")
+    assert response.status_code == 404
+    assert "ETag" not in response
+
+
+@pytest.mark.django_db
+def test_department_employees(api_client, employee_with_department):
+    url = f"/api/v1/departments/{employee_with_department.department.pk}/employees/"
+    response = api_client.get(url)
+    assert revalidate(api_client, url, response).status_code == 304
+
+    Employee.objects.create(
+        name="New Hire", email="newhire@testmail.com", department=employee_with_department.department
+    )
+    assert revalidate(api_client, url, response).status_code == 200
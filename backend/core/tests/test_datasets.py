@@ -0,0 +1,96 @@
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.db.models import F, Min
+
+from appointment.conflicts import find_conflicts
+from appointment.models import Appointment
+from core.datasets import MIN_EMPLOYEES, generate
+from department.models import Department
+from employee.models import Employee
+
+
+def snapshot():
+    """
+    Return the dataset with ids relative to the first employee and appointment, comparable across runs.
+    """
+    first = Employee.objects.aggregate(employee=Min("pk"), appointment=Min("appointments"))
+    return [
+        (
+            appointment.start_datetime,
+            appointment.end_datetime,
+            appointment.title,
+            appointment.recurrence,
+            appointment.employee_id - first["employee"],
+            sorted(pk - first["employee"] for pk in appointment.participants.values_list("pk", flat=True)),
+        )
+        for appointment in Appointment.objects.order_by("pk")
+    ] + [
+        (name, position, department.split()[0])
+        for name, position, department in Employee.objects.order_by("pk").values_list(
+            "name", "position", "department__name"
+        )
+    ]
+
+
+@pytest.mark.django_db
+def test_generate_adds_to_the_dataset():
+    counts = generate(500, seed=1)
+    assert counts["employees"] == Employee.objects.count() == MIN_EMPLOYEES
+    assert counts["departments"] == Department.objects.count()
+    assert Appointment.objects.count() == 500
+    assert Appointment.participants.through.objects.count() == counts["participants"] > 0
+    assert Appointment.objects.exclude(recurrence="").exists()
+    assert not Appointment.objects.exclude(participants__department=F("employee__department")).exclude(
+        participants=None
+    )
+    assert not Department.objects.filter(manager=None)
+    assert not Department.objects.exclude(manager__position=Employee.POSITION_MANAGER)
+
+    generate(100, seed=1)
+    assert Appointment.objects.count() == 600
+    assert Employee.objects.count() == 2 * MIN_EMPLOYEES
+    # The sequences moved past the ids handed out
+    employee = Employee.objects.create(name="Created", email="created@example.com")
+    Appointment.objects.create(
+        start_datetime="2030-01-01T10:00Z", end_datetime="2030-01-01T11:00Z", title="Created", employee=employee
+    )
+
+
+@pytest.mark.django_db
+def test_generate_is_deterministic():
+    generate(300, seed=7, batch_size=50)
+    dataset = snapshot()
+    Employee.objects.all().delete()
+    Department.objects.all().delete()
+
+    generate(300, seed=7)
+    assert snapshot() == dataset
+
+    Employee.objects.all().delete()
+    generate(300, seed=8)
+    assert snapshot() != dataset
+
+
+@pytest.mark.django_db
+def test_generated_appointments_never_conflict():
+    generate(2000, seed=3)
+    singles = Appointment.objects.filter(recurrence="").prefetch_related("participants")
+    checks = [
+        ([appointment.employee_id, *(employee.pk for employee in appointment.participants.all())], *bounds)
+        for appointment in singles
+        for bounds in [(appointment.start_datetime, appointment.end_datetime, appointment.pk)]
+    ]
+    assert find_conflicts(checks) == []
+
+
+@pytest.mark.django_db
+def test_seed_data_command():
+    out = StringIO()
+    call_command("seed_data", appointments=200, seed=2, stdout=out)
+    assert f"{MIN_EMPLOYEES} employees, 200 appointments" in out.getvalue()
+    assert Appointment.objects.count() == 200
+
+    with pytest.raises(CommandError, match="positive"):
+        call_command("seed_data", appointments=0, stdout=StringIO())
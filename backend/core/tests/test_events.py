@@ -0,0 +1,151 @@
+import asyncio
+import threading
+
+import pytest
+from django.db import connection, transaction
+
+from core.events import MAX_PAYLOAD, Dropped, LocalBroker, PostgresBroker, stream
+
+
+def run(coroutine):
+    return asyncio.run(asyncio.wait_for(coroutine, 10))
+
+
+def test_broker_fans_out_matching_messages():
+    broker = LocalBroker()
+
+    async def receive():
+        with broker.subscribe(lambda m: m["n"] % 2 == 0) as even, broker.subscribe(lambda m: True) as every:
+            await asyncio.to_thread(broker.deliver, [{"n": n} for n in range(4)])
+            return [await even.get(1) for _ in range(2)], [await every.get(1) for _ in range(4)]
+
+    even, every = run(receive())
+    assert even == [{"n": 0}, {"n": 2}]
+    assert every == [{"n": n} for n in range(4)]
+    assert not broker._subscriptions
+
+
+def test_get_times_out_without_messages():
+    async def receive():
+        with LocalBroker().subscribe(lambda m: True) as subscription:
+            return await subscription.get(0.01)
+
+    assert run(receive()) is None
+
+
+def test_subscribers_falling_behind_are_dropped():
+    broker = LocalBroker()
+
+    async def receive():
+        with broker.subscribe(lambda m: True, size=2) as subscription:
+            broker.deliver([{"n": n} for n in range(3)])
+            await asyncio.sleep(0)
+            with pytest.raises(Dropped):
+                await subscription.get(1)
+            # Messages after the drop are not queued either
+            broker.deliver([{"n": 3}])
+            await asyncio.sleep(0)
+            with pytest.raises(Dropped):
+                await subscription.get(1)
+
+    run(receive())
+
+
+@pytest.mark.django_db
+def test_local_broker_delivers_on_commit(django_capture_on_commit_callbacks):
+    broker = LocalBroker()
+    delivered = []
+    broker.deliver = delivered.extend
+
+    with django_capture_on_commit_callbacks(execute=True):
+        broker.publish([{"n": 1}])
+        assert delivered == []
+    assert delivered == [{"n": 1}]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        with transaction.atomic():
+            broker.publish([{"n": 2}])
+            transaction.set_rollback(True)
+    assert delivered == [{"n": 1}]
+
+
+def test_stream_formats_events_heartbeats_and_resets():
+    broker = LocalBroker()
+
+    async def receive():
+        events = stream(lambda m: True, broker=broker, heartbeat=0.01)
+        chunks = [await anext(events), await anext(events)]
+        broker.deliver([{"type": "thing.created", "id": 1}])
+        chunks.append(await anext(events))
+        for subscription in broker._subscriptions:
+            subscription.drop()
+        chunks += [chunk async for chunk in events]
+        return chunks
+
+    assert run(receive()) == [
+        "retry: 3000\n\n",
+        ": heartbeat\n\n",
+        'event: thing.created\ndata: {"type":"thing.created","id":1}\n\n',
+        "event: reset\ndata: {}\n\n",
+    ]
+    assert not broker._subscriptions
+
+
+@pytest.mark.django_db(transaction=True)
+def test_postgres_broker_delivers_committed_notifications():
+    broker = PostgresBroker()
+
+    def write():
+        assert broker._listening.wait(5)
+        try:
+            with transaction.atomic():
+                broker.publish([{"n": 1}])
+                transaction.set_rollback(True)
+            with transaction.atomic():
+                broker.publish([{"n": 2}, {"n": 3}])
+        finally:
+            connection.close()
+
+    async def receive():
+        with broker.subscribe(lambda m: m["n"] > 1) as subscription:
+            writer = threading.Thread(target=write)
+            writer.start()
+            messages = [await subscription.get(5), await subscription.get(5)]
+            await asyncio.to_thread(writer.join)
+            return messages
+
+    try:
+        assert run(receive()) == [{"n": 2}, {"n": 3}]
+    finally:
+        broker.close()
+    assert not broker._listening.is_set()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_postgres_broker_degrades_oversize_messages():
+    broker = PostgresBroker()
+
+    def write():
+        assert broker._listening.wait(5)
+        try:
+            with transaction.atomic():
+                broker.publish([{"n": 1, "ids": list(range(MAX_PAYLOAD))}])
+            with transaction.atomic():
+                broker.publish([{"n": 2, "text": "x" * MAX_PAYLOAD}])
+        finally:
+            connection.close()
+
+    async def receive():
+        with broker.subscribe(lambda m: True) as subscription:
+            writer = threading.Thread(target=write)
+            writer.start()
+            message = await subscription.get(5)
+            with pytest.raises(Dropped):
+                await subscription.get(5)
+            await asyncio.to_thread(writer.join)
+            return message
+
+    try:
+        assert run(receive()) == {"n": 1, "ids": None}
+    finally:
+        broker.close()
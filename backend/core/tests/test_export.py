@@ -0,0 +1,151 @@
+import asyncio
+import csv
+import io
+from datetime import datetime, timedelta
+
+import orjson
+import pytest
+from asgiref.sync import sync_to_async
+from django.db import connection
+from django.test import AsyncClient
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from appointment.models import Appointment
+
+URL = "/api/v1/appointments/export/"
+START = timezone.make_aware(datetime(2025, 6, 2, 9))
+
+
+def read(response):
+    assert response.status_code == 200
+    return b"".join(response.streaming_content).decode()
+
+
+def read_csv(response):
+    return list(csv.DictReader(io.StringIO(read(response))))
+
+
+def read_ndjson(response):
+    return [orjson.loads(line) for line in read(response).splitlines()]
+
+
+@pytest.mark.django_db
+def test_csv_export(api_client, staffed_appointment_factory):
+    appointment = staffed_appointment_factory(start=START)
+    participants = sorted(appointment.participants.values_list("pk", flat=True))
+
+    response = api_client.get(f"{URL}?date=2025-06-02")
+    assert response["Content-Type"] == "text/csv; charset=utf-8"
+    assert response["Content-Disposition"] == 'attachment; filename="appointment.csv"'
+    assert read_csv(response) == [
+        {
+            "id": str(appointment.pk),
+            "start_datetime": "2025-06-02T09:00:00Z",
+            "end_datetime": "2025-06-02T10:00:00Z",
+            "title": appointment.title,
+            "description": "",
+            "employee": str(appointment.employee_id),
+            "employee_name": appointment.employee.name,
+            "employee_email": appointment.employee.email,
+            "participants": " ".join(map(str, participants)),
+            "series": "",
+            "recurrence_id": "",
+        }
+    ]
+
+
+@pytest.mark.django_db
+def test_ndjson_export_merges_occurrences(api_client, employee):
+    single = Appointment.objects.create(
+        start_datetime=START + timedelta(days=7, hours=-1),
+        end_datetime=START + timedelta(days=7),
+        title="Single",
+        employee=employee,
+    )
+    series = Appointment.objects.create(
+        start_datetime=START,
+        end_datetime=START + timedelta(minutes=15),
+        title="Stand-up",
+        employee=employee,
+        recurrence="FREQ=WEEKLY",
+    )
+
+    response = api_client.get(f"{URL}?output=ndjson&start=2025-06-01&end=2025-06-30")
+    assert response["Content-Type"] == "application/x-ndjson"
+    rows = read_ndjson(response)
+    assert [(row["id"], row["start_datetime"], row["recurrence_id"]) for row in rows] == [
+        (series.pk, "2025-06-02T09:00:00Z", "2025-06-02T09:00:00Z"),
+        (single.pk, "2025-06-09T08:00:00Z", None),
+        (series.pk, "2025-06-09T09:00:00Z", "2025-06-09T09:00:00Z"),
+        (series.pk, "2025-06-16T09:00:00Z", "2025-06-16T09:00:00Z"),
+        (series.pk, "2025-06-23T09:00:00Z", "2025-06-23T09:00:00Z"),
+    ]
+    assert rows[1]["participants"] == []
+
+
+@pytest.mark.django_db
+def test_export_reads_in_chunks(api_client, staffed_appointment_factory, settings):
+    settings.EXPORT_CHUNK_SIZE = 2
+    for hours in range(5):
+        staffed_appointment_factory(start=START + timedelta(hours=hours))
+
+    with CaptureQueriesContext(connection) as queries:
+        rows = read_ndjson(api_client.get(f"{URL}?output=ndjson&date=2025-06-02"))
+    assert len(rows) == 5
+    assert all(len(row["participants"]) == 2 for row in rows)
+
+    # Participants are prefetched once per chunk of 2 rows
+    prefetches = [
+        query for query in queries.captured_queries if '"appointment_appointment_participants"' in query["sql"]
+    ]
+    assert len(prefetches) == 3
+
+
+@pytest.mark.django_db(transaction=True)
+def test_export_streams_under_asgi(staffed_appointment_factory, settings):
+    settings.EXPORT_CHUNK_SIZE = 2
+    for hours in range(5):
+        staffed_appointment_factory(start=START + timedelta(hours=hours))
+
+    async def fetch():
+        try:
+            response = await AsyncClient().get(f"{URL}?output=ndjson&date=2025-06-02")
+            return response, [part async for part in response.streaming_content]
+        finally:
+            # The rows were read on the connection of the thread sync_to_async runs in
+            await sync_to_async(lambda: connection.close())()
+
+    response, parts = asyncio.run(fetch())
+    assert response.status_code == 200
+    # Sent a chunk of rows at a time rather than read into a list first
+    assert response.is_async
+    assert [part.count(b"\n") for part in parts] == [2, 2, 1]
+    rows = [orjson.loads(line) for line in b"".join(parts).splitlines()]
+    assert [row["start_datetime"] for row in rows] == [f"2025-06-02T{hour:02d}:00:00Z" for hour in range(9, 14)]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "query, error",
+    [
+        ("?date=2025-06-02&output=xml", {"output": ["Choose one of: csv, ndjson."]}),
+        ("?start=2025-06-02", {"date": ["Pass a date, or a start and an end."]}),
+    ],
+)
+def test_invalid_export(api_client, query, error):
+    response = api_client.get(f"{URL}{query}")
+    assert response.status_code == 400
+    assert response.json() == error
+
+
+@pytest.mark.django_db
+def test_employee_export(api_client, employee, employee_with_department):
+    rows = read_csv(api_client.get("/api/v1/employees/export/"))
+    assert [(row["id"], row["department_name"]) for row in rows] == [
+        (str(employee.pk), ""),
+        (str(employee_with_department.pk), "IT Department"),
+    ]
+
+    rows = read_ndjson(api_client.get("/api/v1/employees/export/?output=ndjson&name=steve"))
+    assert [row["email"] for row in rows] == ["stevejobs@apple.com"]
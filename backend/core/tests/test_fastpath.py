@@ -0,0 +1,140 @@
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from django.utils import timezone
+
+from appointment.models import Appointment
+from appointment.serializers import AppointmentReadSerializer
+from core.fastpath import RowBuilder, Unsupported
+from core.renderers import FastJSONRenderer
+from department.models import Department
+from department.serializers import DepartmentSerializer
+from employee.models import Employee
+from employee.serializers import EmployeeSerializer
+
+URLS = [
+    "/api/v1/appointments/",
+    "/api/v1/appointments/?page_size=2",
+    "/api/v1/appointments/?date=2025-06-07",
+    "/api/v1/appointments/?fields=id,title,start_datetime,end_datetime,participants.name",
+    "/api/v1/appointments/?expand=employee",
+    "/api/v1/appointments/?fields=url,participants&expand=participants.department",
+    "/api/v1/employees/",
+    "/api/v1/employees/?name=employee&fields=id,department",
+    "/api/v1/departments/",
+    "/api/v1/departments/?fields=manager,name",
+]
+
+
+def fetch(api_client, settings, url, fast):
+    settings.FAST_READ_ENGINE = fast
+    settings.APPOINTMENT_DAY_CACHE_TIMEOUT = 0
+    response = api_client.get(url)
+    assert response.status_code == 200
+    return response
+
+
+@pytest.fixture
+def mixed_data(staffed_appointment_factory):
+    start = timezone.make_aware(datetime(2025, 6, 7, 9, 30, 15, 123456))
+    for i in range(3):
+        staffed_appointment_factory(start=start + timedelta(hours=i), participants=i)
+    staffed_appointment_factory(start=start, participants=3)
+
+    loner = Employee.objects.create(name='Zoë   "quoted" \\ \t tab', email="zoe@testmail.com")
+    Department.objects.create(name="Unmanaged   \x01", description="Ünïcödé 😀")
+    orphan = Appointment.objects.create(
+        start_datetime=start + timedelta(days=1),
+        end_datetime=start + timedelta(days=1, minutes=30),
+        title="No owner",
+        description="line\nbreak",
+    )
+    orphan.participants.set([loner])
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("url", URLS)
+def test_fast_read_output_is_byte_identical(api_client, settings, mixed_data, url):
+    regular = fetch(api_client, settings, url, fast=False)
+    fast = fetch(api_client, settings, url, fast=True)
+
+    assert fast.content == regular.content
+    assert fast.accepted_renderer.__class__ is FastJSONRenderer
+
+
+@pytest.mark.django_db
+def test_fast_read_follows_cursors_identically(api_client, settings, mixed_data):
+    url = "/api/v1/appointments/?page_size=2"
+    while url:
+        regular = fetch(api_client, settings, url, fast=False)
+        assert fetch(api_client, settings, url, fast=True).content == regular.content
+        url = regular.json()["next"]
+
+
+@pytest.mark.django_db
+def test_fast_read_query_count_is_constant(api_client, settings, mixed_data, django_assert_num_queries):
+    settings.FAST_READ_ENGINE = True
+
+    # table states, appointments, recurring series, owners, their departments, participant links,
+    # participants, their departments
+    with django_assert_num_queries(8):
+        api_client.get("/api/v1/appointments/")
+
+
+@pytest.mark.parametrize("serializer_class", [AppointmentReadSerializer, EmployeeSerializer, DepartmentSerializer])
+def test_read_serializers_compile(serializer_class):
+    assert RowBuilder(serializer_class()).steps
+
+
+def test_unsupported_fields_are_reported():
+    class DescribedDepartmentSerializer(DepartmentSerializer):
+        class Meta(DepartmentSerializer.Meta):
+            fields = ["url", "name", "__str__"]
+
+    with pytest.raises(Unsupported):
+        RowBuilder(DescribedDepartmentSerializer())
+
+
+def test_renderer_matches_json_renderer_on_awkward_values():
+    data = {"text": '  \x00\x1f\x7f"\\/é😀', "number": 10**6, "nested": [None, True, {"1": []}]}
+    assert FastJSONRenderer().render(data) == FastJSONRenderer.__mro__[1]().render(data)
+
+
+@pytest.mark.benchmark
+@pytest.mark.django_db
+def test_benchmark_fast_read_at_10k_rows(api_client, settings, capsys):
+    departments = Department.objects.bulk_create(Department(name=f"Department {i}") for i in range(20))
+    employees = Employee.objects.bulk_create(
+        Employee(name=f"Employee {i}", email=f"employee{i}@testmail.com", department=departments[i % 20])
+        for i in range(500)
+    )
+    start = timezone.make_aware(datetime(2025, 1, 1))
+    appointments = Appointment.objects.bulk_create(
+        Appointment(
+            start_datetime=start + timedelta(minutes=30 * i),
+            end_datetime=start + timedelta(minutes=30 * i + 25),
+            title=f"Appointment {i}",
+            employee=employees[i % 500],
+        )
+        for i in range(10_000)
+    )
+    Through = Appointment.participants.through
+    Through.objects.bulk_create(
+        Through(appointment=appointment, employee=employees[(i + k) % 500])
+        for i, appointment in enumerate(appointments)
+        for k in range(1, 4)
+    )
+    url = "/api/v1/appointments/?page_size=10000"
+    settings.API_MAX_PAGE_SIZE = 10_000
+
+    timings = {}
+    for fast in (False, True):
+        began = time.perf_counter()
+        response = fetch(api_client, settings, url, fast)
+        timings[fast] = time.perf_counter() - began, response.content
+
+    assert timings[True][1] == timings[False][1]
+    with capsys.disabled():
+        print(f"\n10k appointments: serializer {timings[False][0]:.2f}s, fast read {timings[True][0]:.2f}s")
+    assert timings[True][0] < timings[False][0]
@@ -0,0 +1,116 @@
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.utils import timezone
+from rest_framework import status
+
+from appointment.models import Appointment
+from core.pagination import positive_int, seek
+from employee.models import Employee
+
+
+def collect_pages(api_client, url):
+    pages = []
+    while url:
+        response = api_client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        pages.append(data)
+        url = data["next"]
+    return pages
+
+
+@pytest.fixture
+def appointments():
+    start = timezone.now().replace(microsecond=123456)
+    return [
+        Appointment.objects.create(
+            start_datetime=start + timedelta(hours=i // 2),
+            end_datetime=start + timedelta(hours=i // 2 + 1),
+            title=f"Appointment {i}",
+            employee=Employee.objects.create(name=f"Owner {i}", email=f"owner{i}@testmail.com"),
+        )
+        for i in range(5)
+    ]
+
+
+@pytest.mark.django_db
+def test_appointments_paginate_on_start_datetime_and_id(api_client, appointments):
+    pages = collect_pages(api_client, "/api/v1/appointments/?page_size=2")
+
+    assert [len(page["results"]) for page in pages] == [2, 2, 1]
+    assert [item["id"] for page in pages for item in page["results"]] == [a.id for a in appointments]
+    assert pages[0]["previous"] is None
+
+
+@pytest.mark.django_db
+def test_previous_link_returns_preceding_page(api_client, appointments):
+    pages = collect_pages(api_client, "/api/v1/appointments/?page_size=2")
+
+    response = api_client.get(pages[-1]["previous"])
+    data = response.json()
+
+    assert [item["id"] for item in data["results"]] == [item["id"] for item in pages[1]["results"]]
+    assert data["next"] is not None
+
+    response = api_client.get(data["previous"])
+    assert response.json()["results"] == pages[0]["results"]
+    assert response.json()["previous"] is None
+
+
+@pytest.mark.django_db
+def test_employees_paginate_on_id(api_client):
+    employees = [Employee.objects.create(name=f"Employee {i}", email=f"employee{i}@testmail.com") for i in range(3)]
+
+    pages = collect_pages(api_client, "/api/v1/employees/?page_size=2")
+
+    assert [item["id"] for page in pages for item in page["results"]] == [e.id for e in employees]
+
+
+@pytest.mark.django_db
+def test_page_size_is_capped(api_client, appointments, settings):
+    settings.API_MAX_PAGE_SIZE = 3
+
+    response = api_client.get("/api/v1/appointments/?page_size=100")
+
+    assert len(response.json()["results"]) == 3
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("cursor", ["garbage", "eyJyIjowfQ", "eyJyIjowLCJwIjpbMV19"])
+def test_invalid_cursor_returns_not_found(api_client, cursor):
+    response = api_client.get(f"/api/v1/appointments/?cursor={cursor}")
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert response.json()["detail"] == "Invalid cursor"
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("reverse", [False, True])
+def test_seek_matches_the_row_comparison(appointments, reverse):
+    keys = [(appointment.start_datetime, appointment.pk) for appointment in appointments]
+    for position in keys:
+        seen = Appointment.objects.filter(seek(("start_datetime", "id"), position, reverse))
+        expected = {key[1] for key in keys if (key < position if reverse else key > position)}
+        assert set(seen.values_list("pk", flat=True)) == expected
+
+
+@pytest.mark.django_db
+def test_seek_starts_an_index_range_scan(appointments):
+    position = (appointments[2].start_datetime, appointments[2].pk)
+    queryset = Appointment.objects.filter(seek(("start_datetime", "id"), position)).order_by("start_datetime", "id")
+    with connection.cursor() as cursor:
+        cursor.execute("SET LOCAL enable_seqscan = off")
+        plan = queryset[:3].explain()
+    assert "appointment_start_id_idx" in plan
+    assert "Index Cond: (start_datetime >=" in plan
+
+
+@pytest.mark.parametrize("value, cutoff, expected", [("5", None, 5), ("5", 3, 3), ("0", None, None), ("x", 3, None)])
+def test_positive_int(value, cutoff, expected):
+    if expected is None:
+        with pytest.raises(ValueError):
+            positive_int(value, cutoff)
+    else:
+        assert positive_int(value, cutoff) == expected
@@ -0,0 +1,138 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import httpx
+import psycopg
+import pytest
+from django.core.wsgi import get_wsgi_application
+from django.db import connection, connections
+
+from department.models import Department
+from employee.models import Employee
+
+
+@contextmanager
+def database_settings(**changes):
+    """
+    Connect to the default database with `changes` to its settings in every thread.
+    """
+    settings_dict = connection.settings_dict
+    saved = {key: settings_dict[key] for key in changes}
+    connection.close()
+    settings_dict.update(changes)
+    try:
+        yield
+    finally:
+        connection.close()
+        connection.close_pool()
+        settings_dict.update(saved)
+
+
+@contextmanager
+def count_connections():
+    """
+    Count the connections to the test database every millisecond, yield the list of counts.
+    """
+    counts, stopped = [], threading.Event()
+    params = connections.create_connection("default").get_connection_params()
+
+    def sample():
+        with psycopg.connect(**params, autocommit=True) as monitor:
+            while not stopped.is_set():
+                [[count]] = monitor.execute(
+                    "SELECT count(*) FROM pg_stat_activity WHERE datname = current_database() "
+                    "AND pid <> pg_backend_pid()"
+                ).fetchall()
+                counts.append(count)
+                time.sleep(0.001)
+
+    sampler = threading.Thread(target=sample)
+    sampler.start()
+    try:
+        yield counts
+    finally:
+        stopped.set()
+        sampler.join()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_database_pools_reports_pool_counters(client):
+    assert client.get("/api/v1/metrics/database-pools/").json()["databases"] == {"default": None}
+
+    with database_settings(OPTIONS={"pool": {"min_size": 1, "max_size": 2}}):
+        Employee.objects.exists()
+        body = client.get("/api/v1/metrics/database-pools/").json()
+
+    assert body["pid"] > 0
+    stats = body["databases"]["default"]
+    assert stats["pool_max"] == 2
+    assert stats["requests_num"] >= 1
+
+
+@pytest.mark.django_db(transaction=True)
+def test_pooled_connections_are_reused():
+    with database_settings(OPTIONS={"pool": {"min_size": 1, "max_size": 1}}):
+        pids = set()
+        for _ in range(3):
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_backend_pid()")
+                pids.add(cursor.fetchone()[0])
+            connection.close()
+    assert len(pids) == 1
+
+
+CLIENTS = 16
+REQUESTS = 800
+POOL_SIZE = 4
+
+
+def load(url):
+    """
+    Send REQUESTS reads of `url` from CLIENTS threads, like a `gunicorn --threads` worker, return the time taken.
+    """
+    application = get_wsgi_application()
+
+    def client(requests):
+        try:
+            with httpx.Client(transport=httpx.WSGITransport(app=application)) as http:
+                for _ in range(requests):
+                    assert http.get(url).status_code == 200
+        finally:
+            connection.close()
+
+    began = time.perf_counter()
+    with ThreadPoolExecutor(CLIENTS) as clients:
+        list(clients.map(client, [REQUESTS // CLIENTS] * CLIENTS))
+    return time.perf_counter() - began
+
+
+@pytest.mark.benchmark
+@pytest.mark.django_db(transaction=True)
+def test_connection_pool_load_test(capsys):
+    """
+    Send REQUESTS employee reads from CLIENTS threads connecting per request, keeping a connection per
+    thread, and sharing a pool of POOL_SIZE, counting requests per second and connections to the database.
+    """
+    department = Department.objects.create(name="Load")
+    Employee.objects.bulk_create(
+        Employee(name=f"Employee {n}", email=f"employee{n}@testmail.com", department=department) for n in range(50)
+    )
+    url = "http://testserver/api/v1/employees/?page_size=10"
+    profiles = {
+        "per request": {"CONN_MAX_AGE": 0, "OPTIONS": {}},
+        "persistent": {"CONN_MAX_AGE": 60, "OPTIONS": {}},
+        "pooled": {"CONN_MAX_AGE": 0, "OPTIONS": {"pool": {"min_size": POOL_SIZE, "max_size": POOL_SIZE}}},
+    }
+    results = {}
+    for name, changes in profiles.items():
+        with database_settings(**changes), count_connections() as counts:
+            elapsed = load(url)
+        results[name] = REQUESTS / elapsed, max(counts)
+
+    with capsys.disabled():
+        for name, (throughput, peak) in results.items():
+            print(f"\n{name}: {throughput:.0f} req/s, {peak} connections at most")
+    assert results["pooled"][0] > results["per request"][0]
+    assert results["pooled"][1] < results["persistent"][1]
@@ -0,0 +1,40 @@
+from appointment.models import Appointment
+from appointment.serializers import AppointmentReadSerializer, AppointmentWriteSerializer
+from core.prefetch import plan_queryset
+from department.models import Department
+from department.serializers import DepartmentSerializer
+from employee.models import Employee
+from employee.serializers import EmployeeSerializer
+
+
+def prefetches_by_path(queryset):
+    return {lookup.prefetch_through: lookup.queryset for lookup in queryset._prefetch_related_lookups}
+
+
+def test_plan_joins_nested_objects_and_prefetches_nested_lists():
+    queryset = plan_queryset(Appointment.objects.all(), AppointmentReadSerializer())
+
+    assert queryset.query.select_related == {"employee": {"department": {}}}
+    participants = prefetches_by_path(queryset)["participants"]
+    assert participants.query.select_related == {"department": {}}
+    assert participants.query.order_by == ("pk",)
+
+
+def test_plan_skips_hyperlinks_that_only_need_the_foreign_key():
+    queryset = plan_queryset(Department.objects.all(), DepartmentSerializer())
+
+    assert queryset.query.select_related is False
+    assert queryset._prefetch_related_lookups == ()
+
+
+def test_plan_prefetches_many_hyperlinks_without_nesting():
+    queryset = plan_queryset(Appointment.objects.all(), AppointmentWriteSerializer())
+
+    assert queryset.query.select_related is False
+    assert prefetches_by_path(queryset)["participants"].model is Employee
+
+
+def test_plan_for_list_serializer_uses_the_child():
+    queryset = plan_queryset(Employee.objects.all(), EmployeeSerializer(many=True))
+
+    assert queryset.query.select_related == {"department": {}}
@@ -0,0 +1,88 @@
+import asyncio
+import logging
+import re
+
+import pytest
+from asgiref.sync import sync_to_async
+from django.db import connection
+from django.test import AsyncClient
+
+from core.profiling import QueryProfile, sql_shape
+from core.tests.test_asyncread import async_urlconf
+from employee.models import Employee
+
+EMPLOYEES = "/api/v1/employees/"
+
+
+def server_timing(response):
+    return dict(re.findall(r"(\w+);dur=([\d.]+)", response["Server-Timing"]))
+
+
+def test_sql_shape_ignores_values():
+    assert sql_shape("SELECT * FROM t WHERE id IN (%s, %s, %s) AND name = 'x' LIMIT 21") == (
+        "SELECT * FROM t WHERE id IN (%s, ...) AND name = ? LIMIT ?"
+    )
+    assert sql_shape("SELECT * FROM t WHERE id IN (%s)") == "SELECT * FROM t WHERE id IN (%s)"
+    assert sql_shape('INSERT INTO "t1" ("a", "b") VALUES (%s, %s), (%s, %s), (%s, %s)') == (
+        'INSERT INTO "t1" ("a", "b") VALUES (%s, ...), ...'
+    )
+
+
+@pytest.mark.django_db
+def test_query_profile_flags_repeated_shapes(settings):
+    settings.REQUEST_PROFILING_REPEATS = 3
+    employees = [Employee.objects.create(name=f"Employee {n}", email=f"employee{n}@testmail.com") for n in range(3)]
+
+    profile = QueryProfile()
+    with connection.execute_wrapper(profile):
+        Employee.objects.filter(pk__in=[employee.pk for employee in employees]).count()
+        for employee in employees:
+            Employee.objects.get(pk=employee.pk)
+
+    assert profile.queries == 4
+    assert profile.duration > 0
+    [(shape, count)] = profile.repeated().items()
+    assert count == 3
+    assert shape.endswith('WHERE "employee_employee"."id" = %s LIMIT ?')
+
+
+@pytest.mark.django_db
+def test_profiled_requests_report_server_timing(settings, api_client, employee, caplog):
+    settings.REQUEST_PROFILING = True
+    settings.REQUEST_PROFILING_REPEATS = 1
+    with caplog.at_level(logging.INFO, logger="core.profiling"):
+        response = api_client.get(EMPLOYEES)
+
+    assert response.status_code == 200
+    assert set(server_timing(response)) == {"db", "serialize", "render", "total"}
+    queries = int(re.search(r'desc="(\d+) queries"', response["Server-Timing"])[1])
+    assert queries > 0
+
+    [info, *warnings] = caplog.records
+    assert info.profile["path"] == EMPLOYEES
+    assert info.profile["queries"] == queries
+    assert info.profile["total_ms"] >= info.profile["db_ms"]
+    assert warnings and all(record.levelno == logging.WARNING for record in warnings)
+
+
+@pytest.mark.django_db
+def test_unprofiled_requests_report_nothing(api_client, employee):
+    assert "Server-Timing" not in api_client.get(EMPLOYEES)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_profiled_async_reads_count_their_queries(settings, employee):
+    settings.REQUEST_PROFILING = True
+    settings.ASYNC_READS = True
+    settings.ROOT_URLCONF = async_urlconf()
+
+    async def fetch():
+        try:
+            return await AsyncClient().get(EMPLOYEES)
+        finally:
+            # The request's queries ran on the connection of the thread sync_to_async runs in
+            await sync_to_async(lambda: connection.close())()
+
+    response = asyncio.run(fetch())
+    assert response.status_code == 200
+    assert int(re.search(r'desc="(\d+) queries"', response["Server-Timing"])[1]) > 0
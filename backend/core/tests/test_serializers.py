@@ -0,0 +1,62 @@
+import pytest
+from rest_framework.test import APIRequestFactory
+
+from appointment.serializers import AppointmentReadSerializer
+from core.serializers import parse_paths
+
+
+def render(instance, query_string=""):
+    request = APIRequestFactory().get(f"/{query_string}")
+    request.query_params = request.GET
+    return AppointmentReadSerializer(instance, context={"request": request}).data
+
+
+def test_parse_paths_builds_a_tree():
+    assert parse_paths("participants.name, title,participants.department.name,") == {
+        "participants": {"name": {}, "department": {"name": {}}},
+        "title": {},
+    }
+
+
+@pytest.mark.django_db
+def test_output_is_unchanged_without_shaping_params(staffed_appointment_factory):
+    data = render(staffed_appointment_factory())
+
+    assert data["employee"]["department"]["name"].startswith("Department")
+    assert data["participants"][0]["department"]["manager"].startswith("http://testserver/api/v1/employees/")
+
+
+@pytest.mark.django_db
+def test_fields_selects_top_level_and_nested_fields(staffed_appointment_factory):
+    appointment = staffed_appointment_factory()
+
+    data = render(appointment, "?fields=id,title,start_datetime,end_datetime,participants.name")
+
+    assert list(data) == ["id", "start_datetime", "end_datetime", "title", "participants"]
+    assert [p["name"] for p in data["participants"]] == [p.name for p in appointment.participants.order_by("pk")]
+    assert all(list(p) == ["name"] for p in data["participants"])
+
+
+@pytest.mark.django_db
+def test_nested_objects_collapse_to_hyperlinks_unless_expanded(staffed_appointment_factory):
+    appointment = staffed_appointment_factory()
+
+    data = render(appointment, "?expand=employee")
+
+    assert data["employee"]["name"] == appointment.employee.name
+    assert data["employee"]["department"] == (
+        f"http://testserver/api/v1/departments/{appointment.employee.department_id}/"
+    )
+    assert data["participants"] == [
+        f"http://testserver/api/v1/employees/{p.pk}/" for p in appointment.participants.order_by("pk")
+    ]
+
+
+@pytest.mark.django_db
+def test_nested_expand_paths(staffed_appointment_factory):
+    appointment = staffed_appointment_factory()
+
+    data = render(appointment, "?fields=id,participants&expand=participants.department")
+
+    assert list(data) == ["id", "participants"]
+    assert data["participants"][0]["department"]["name"].startswith("Department")
@@ -0,0 +1,219 @@
+import threading
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.utils import timezone
+
+from core.models import Tombstone
+from core.pagination import seek
+from core.sync import get_watermark
+from core.tests.test_asyncread import async_urlconf
+from department.models import Department
+from employee.models import Employee
+
+EMPLOYEES = "/api/v1/employees/"
+
+
+@pytest.fixture(autouse=True)
+def no_clock_skew(settings):
+    settings.SYNC_CLOCK_SKEW = 0
+
+
+def sync(api_client, url, token="", **params):
+    """
+    Follow a sync from `token` through all its pages, return the results, deleted ids and last token.
+    """
+    results, deleted = [], []
+    response = api_client.get(url, {"updated_since": token, **params})
+    while True:
+        assert response.status_code == 200, response.content
+        body = response.json()
+        results += body["results"]
+        deleted += body["deleted"]
+        if body["next"] is None:
+            return results, deleted, body["sync_token"]
+        response = api_client.get(body["next"])
+
+
+def hire(name):
+    return Employee.objects.create(name=name, email=f"{name.lower()}@testmail.com")
+
+
+@pytest.mark.django_db
+def test_sync_returns_changes_and_deletions(api_client):
+    kept, renamed, fired = hire("Kept"), hire("Renamed"), hire("Fired")
+
+    results, deleted, token = sync(api_client, EMPLOYEES)
+    assert [row["id"] for row in results] == [kept.pk, renamed.pk, fired.pk]
+    assert results == api_client.get(EMPLOYEES).json()["results"]
+    assert deleted == []
+
+    renamed.name = "Changed"
+    renamed.save()
+    fired_pk = fired.pk
+    fired.delete()
+    hired = hire("Hired")
+
+    results, deleted, token = sync(api_client, EMPLOYEES, token)
+    assert [(row["id"], row["name"]) for row in results] == [(renamed.pk, "Changed"), (hired.pk, "Hired")]
+    assert deleted == [fired_pk]
+    assert sync(api_client, EMPLOYEES, token)[:2] == ([], [])
+
+
+@pytest.mark.django_db
+def test_sync_pages(api_client):
+    employees = [hire(f"Employee{n}") for n in range(7)]
+    _, _, token = sync(api_client, EMPLOYEES)
+    for employee in employees[:3]:
+        employee.name += " Changed"
+        employee.save()
+    Employee.objects.filter(pk__in=[employee.pk for employee in employees[3:6]]).delete()
+
+    response = api_client.get(EMPLOYEES, {"updated_since": token, "page_size": 2})
+    assert len(response.json()["results"]) == 2
+    assert response.json()["next"]
+
+    results, deleted, _ = sync(api_client, EMPLOYEES, token, page_size=2)
+    assert [row["id"] for row in results] == [employee.pk for employee in employees[:3]]
+    assert deleted == [employee.pk for employee in employees[3:6]]
+
+
+@pytest.mark.django_db
+def test_sync_uses_fast_reads_and_filters(api_client, settings, department):
+    inside, outside = hire("Inside"), hire("Outside")
+    inside.department = department
+    inside.save()
+    expected = sync(api_client, EMPLOYEES)[0]
+
+    settings.FAST_READ_ENGINE = True
+    assert sync(api_client, EMPLOYEES)[0] == expected
+    results, _, _ = sync(api_client, EMPLOYEES, name="inside")
+    assert [row["id"] for row in results] == [inside.pk]
+    assert [row["id"] for row in expected] == [outside.pk, inside.pk]
+
+
+@pytest.mark.django_db
+def test_sync_of_appointments_sees_participant_changes(api_client, staffed_appointment_factory):
+    appointment = staffed_appointment_factory(participants=2)
+    other = staffed_appointment_factory(participants=1)
+    _, _, token = sync(api_client, "/api/v1/appointments/")
+
+    appointment.participants.remove(appointment.participants.first())
+    attendee = other.participants.get()
+    attendee.delete()
+
+    results, _, _ = sync(api_client, "/api/v1/appointments/", token)
+    assert sorted(row["id"] for row in results) == [appointment.pk, other.pk]
+    assert results[-1]["participants"] == []
+
+
+@pytest.mark.django_db
+def test_nulled_references_count_as_changes(api_client, staffed_appointment_factory):
+    appointment = staffed_appointment_factory(participants=0)
+    department = appointment.employee.department
+    _, _, employees = sync(api_client, EMPLOYEES)
+    _, _, departments = sync(api_client, "/api/v1/departments/")
+
+    department.manager.delete()
+    assert [row["id"] for row in sync(api_client, "/api/v1/departments/", departments)[0]] == [department.pk]
+
+    department.delete()
+    results, deleted, _ = sync(api_client, EMPLOYEES, employees)
+    assert [(row["id"], row["department"]) for row in results] == [(appointment.employee_id, None)]
+    assert deleted == [department.manager_id]
+
+
+@pytest.mark.django_db
+def test_every_delete_leaves_a_tombstone(api_client):
+    employees = [hire(f"Employee{n}") for n in range(3)]
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {Employee._meta.db_table} WHERE id = %s", [employees[0].pk])
+    Employee.objects.filter(pk=employees[1].pk).delete()
+
+    assert set(Tombstone.objects.values_list("model", "object_id")) == {
+        ("employee.employee", employees[0].pk),
+        ("employee.employee", employees[1].pk),
+    }
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("token", ["x", "e30", "eyJ3IjpudWxsLCJ1IjpudWxsLCJkIjpbIngiLDBdfQ"])
+def test_sync_rejects_invalid_tokens(api_client, token):
+    response = api_client.get(EMPLOYEES, {"updated_since": token})
+    assert response.status_code == 400
+    assert response.json() == {"updated_since": ["Invalid sync token."]}
+
+
+@pytest.mark.django_db
+def test_sync_tokens_expire_with_their_tombstones(api_client, settings):
+    _, _, token = sync(api_client, EMPLOYEES)
+    settings.SYNC_TOMBSTONE_DAYS = -1
+    assert api_client.get(EMPLOYEES, {"updated_since": token}).status_code == 410
+
+
+@pytest.mark.django_db
+def test_sync_is_served_by_the_sync_path_under_async_reads(api_client, settings):
+    employee = hire("Async")
+    settings.ASYNC_READS = True
+    settings.ROOT_URLCONF = async_urlconf()
+    assert [row["id"] for row in sync(api_client, EMPLOYEES)[0]] == [employee.pk]
+
+
+@pytest.mark.django_db
+def test_sync_reads_the_updated_at_index(api_client):
+    department = Department.objects.create(name="Sync")
+    Employee.objects.bulk_create(
+        Employee(name=f"Employee {n}", email=f"employee{n}@testmail.com", department=department) for n in range(2000)
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(f"ANALYZE {Employee._meta.db_table}")
+    now = timezone.now()
+    queryset = (
+        Employee.objects.filter(seek(("updated_at", "pk"), (now - timedelta(minutes=1), 0)), updated_at__lt=now)
+        .order_by("updated_at", "pk")
+        .values("pk")[:101]
+    )
+    assert "employee_updated_id_idx" in queryset.explain()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_sync_waits_for_transactions_in_flight(api_client):
+    written, synced = threading.Event(), threading.Event()
+
+    def write():
+        try:
+            with transaction.atomic():
+                # Start the transaction before `updated_at` is taken, SYNC_CLOCK_SKEW covers that gap
+                Employee.objects.exists()
+                hire("Slow")
+                written.set()
+                synced.wait(5)
+        finally:
+            connection.close()
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    assert written.wait(5)
+    watermark = get_watermark()
+    results, _, token = sync(api_client, EMPLOYEES)
+    synced.set()
+    writer.join()
+
+    assert results == []
+    assert Employee.objects.get().updated_at < timezone.now()
+    assert watermark <= Employee.objects.get().updated_at
+    assert [row["name"] for row in sync(api_client, EMPLOYEES, token)[0]] == ["Slow"]
+
+
+@pytest.mark.django_db
+def test_prune_tombstones():
+    now = timezone.now()
+    Tombstone.objects.bulk_create(
+        Tombstone(model="employee.employee", object_id=n, deleted_at=now - timedelta(days=days))
+        for n, days in enumerate([0, 29, 31])
+    )
+    call_command("prune_tombstones", days=30, stdout=StringIO())
+    assert sorted(Tombstone.objects.values_list("object_id", flat=True)) == [0, 1]
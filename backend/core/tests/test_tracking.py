@@ -0,0 +1,52 @@
+import pytest
+
+from employee.models import Employee
+
+
+@pytest.mark.django_db
+def test_unchanged_saves_write_nothing(employee_with_department, assert_num_writes):
+    employee = Employee.objects.get(pk=employee_with_department.pk)
+    with assert_num_writes(0):
+        employee.save()
+        employee.name = employee.name
+        employee.save()
+        employee.department.save()
+
+
+@pytest.mark.django_db
+def test_saves_write_the_changed_fields(employee, department, assert_num_writes):
+    employee = Employee.objects.get(pk=employee.pk)
+    updated_at = employee.updated_at
+
+    with assert_num_writes(1) as queries:
+        employee.department = department
+        employee.save()
+    sql = queries.captured_queries[-1]["sql"]
+    assert '"department_id" =' in sql and '"updated_at" =' in sql
+    assert '"name" =' not in sql and '"email" =' not in sql
+
+    employee.refresh_from_db()
+    assert (employee.department, employee.updated_at > updated_at) == (department, True)
+    with assert_num_writes(0):
+        employee.save()
+
+
+@pytest.mark.django_db
+def test_new_and_explicit_saves_are_untouched(employee, assert_num_writes):
+    with assert_num_writes(1):
+        Employee.objects.create(name="Jane", email="jane@testmail.com")
+    with assert_num_writes(1):
+        employee.save(update_fields=["name"])
+    with assert_num_writes(1):
+        Employee(pk=employee.pk, name="Replaced", email=employee.email).save()
+    assert Employee.objects.get(pk=employee.pk).name == "Replaced"
+
+
+@pytest.mark.django_db
+def test_deferred_fields_are_not_written(employee, assert_num_writes):
+    employee = Employee.objects.only("id", "name").get(pk=employee.pk)
+    with assert_num_writes(1) as queries:
+        employee.name = "Renamed"
+        employee.save()
+    assert '"email"' not in queries.captured_queries[-1]["sql"]
+    assert Employee.objects.get(pk=employee.pk).name == "Renamed"
@@ -0,0 +1,60 @@
+class TrackedFieldsMixin:
+    """
+    Remember the field values a model instance was loaded with so `save()` only writes what changed.
+
+    Saves of loaded instances without `update_fields` get them computed: the changed fields plus any
+    `auto_now` ones, and no query at all when nothing changed (no signals are sent either). New instances
+    and explicit `update_fields` save as usual. Values are compared with `!=`, so mutating a mutable
+    value in place is not noticed, assign a new one instead.
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.mark_clean()
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using, fields, from_queryset)
+        # Loading a deferred field must not take pending changes to the others as stored
+        self.mark_clean(fields)
+
+    def mark_clean(self, fields=None):
+        """
+        Take the current values of `fields` (names or attnames, all loaded fields by default) as the stored ones.
+        """
+        loaded = self.__dict__.setdefault("_loaded_values", {})
+        for field in self._meta.concrete_fields:
+            if field.attname in self.__dict__ and (fields is None or {field.name, field.attname} & set(fields)):
+                loaded[field.attname] = self.__dict__[field.attname]
+
+    def get_changed_fields(self):
+        """
+        Return the attnames of the loaded fields whose value differs from the stored one.
+        """
+        loaded = self.__dict__.get("_loaded_values", {})
+        return [
+            field.attname
+            for field in self._meta.concrete_fields
+            if not field.primary_key
+            and field.attname in self.__dict__
+            and (field.attname not in loaded or loaded[field.attname] != self.__dict__[field.attname])
+        ]
+
+    def save(self, *args, **kwargs):
+        tracked = (
+            not self._state.adding
+            and "_loaded_values" in self.__dict__
+            and not args
+            and kwargs.get("update_fields") is None
+            and not kwargs.get("force_insert")
+        )
+        if tracked:
+            changed = self.get_changed_fields()
+            if not changed:
+                return
+            auto_now = [field.attname for field in self._meta.concrete_fields if getattr(field, "auto_now", False)]
+            kwargs["update_fields"] = {*changed, *auto_now}
+
+        super().save(*args, **kwargs)
+        self.mark_clean(kwargs.get("update_fields"))
@@ -0,0 +1,7 @@
+from django.urls import path
+
+from .views import database_pools
+
+urlpatterns = [
+    path("metrics/database-pools/", database_pools, name="database-pools"),
+]
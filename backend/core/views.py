@@ -0,0 +1,14 @@
+import os
+
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+
+from .pool import pool_stats
+
+
+@require_GET
+def database_pools(request):
+    """
+    Report the connection pools of the worker process serving the request, see core.pool.pool_stats.
+    """
+    return JsonResponse({"pid": os.getpid(), "databases": pool_stats()})
@@ -6,4 +6,4 @@ class DepartmentConfig(AppConfig):
     name = "department"
 
     def ready(self):
-        pass
+        from . import signals  # noqa: F401
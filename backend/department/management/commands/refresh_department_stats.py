@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from department import stats
+from department.models import DepartmentDayLoad
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the per-day department appointment load /departments/stats/ reads when "
+        "DEPARTMENT_STATS_MATERIALIZED is on. Run it once after turning the setting on, writes keep it current."
+    )
+
+    def handle(self, *args, **options):
+        if not settings.DEPARTMENT_STATS_MATERIALIZED:
+            raise CommandError("DEPARTMENT_STATS_MATERIALIZED is off.")
+        with transaction.atomic():
+            stats.refresh()
+        self.stdout.write(f"Refreshed {DepartmentDayLoad.objects.count()} department days.")
@@ -0,0 +1,36 @@
+# Generated by Django 5.2 on 2026-10-18 13:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("department", "0003_department_updated_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DepartmentDayLoad",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("day", models.DateField()),
+                ("appointments", models.PositiveIntegerField()),
+                ("duration", models.DurationField()),
+                (
+                    "department",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="day_loads",
+                        to="department.department",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(fields=("day", "department"), name="department_day_load_unique")
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2 on 2026-10-18 13:47
+
+from django.db import migrations, models
+
+from core.sync import tombstone_trigger
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("department", "0004_day_load"),
+        ("employee", "0003_search_indexes"),
+        ("core", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="department",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name="department",
+            index=models.Index(fields=["updated_at", "id"], name="department_updated_id_idx"),
+        ),
+        tombstone_trigger("department_department", "department.department"),
+    ]
@@ -1,13 +1,16 @@
 from django.core.exceptions import ValidationError
 from django.db import models
 
+from core.tracking import TrackedFieldsMixin
 
-class Department(models.Model):
+
+class Department(TrackedFieldsMixin, models.Model):
     name = models.CharField(max_length=100, unique=True)
     manager = models.OneToOneField(
         "employee.Employee", on_delete=models.SET_NULL, related_name="manages_department", null=True, blank=True
     )
     description = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name
@@ -16,3 +19,26 @@ class Department(models.Model):
         super().clean()
         if self.manager and not self.manager.is_manager:
             raise ValidationError({"manager": "The chosen Employee is not Manager."})
+
+    class Meta:
+        indexes = [
+            # Delta sync, see core.sync.DeltaSyncMixin
+            models.Index(fields=["updated_at", "id"], name="department_updated_id_idx"),
+        ]
+
+
+class DepartmentDayLoad(models.Model):
+    """
+    Appointments starting on `day` (in the current timezone) owned by the department's employees, and the
+    time they take up that day. Maintained by `department.stats` when DEPARTMENT_STATS_MATERIALIZED is on.
+    """
+
+    department = models.ForeignKey(Department, on_delete=models.CASCADE, related_name="day_loads")
+    day = models.DateField()
+    appointments = models.PositiveIntegerField()
+    duration = models.DurationField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["day", "department"], name="department_day_load_unique"),
+        ]
@@ -1,9 +1,11 @@
 from rest_framework import serializers
 
+from core.serializers import ExpandableFieldsMixin
+
 from .models import Department
 
 
-class DepartmentSerializer(serializers.HyperlinkedModelSerializer):
+class DepartmentSerializer(ExpandableFieldsMixin, serializers.HyperlinkedModelSerializer):
     url = serializers.HyperlinkedIdentityField(view_name="department-detail", lookup_field="pk")
 
     class Meta:
@@ -1,11 +1,43 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, pre_delete
 from django.dispatch import receiver
+from django.utils import timezone
 
+from department import stats
 from department.models import Department
+from employee.models import Employee
 
 
 @receiver(post_save, sender=Department)
-def ensure_manager_is_in_own_department(sender, instance, **kwargs):
-    if manager := instance.manager:
-        manager.department = instance
-        manager.save()
+def ensure_manager_is_in_own_department(sender, instance, update_fields=None, **kwargs):
+    """
+    Move the department's manager into it, with one UPDATE that writes nothing when they already are.
+
+    The manager's post_save is not sent; the Department's own save already invalidates what shows both.
+    """
+    if instance.manager_id is None or (update_fields is not None and not {"manager", "manager_id"} & update_fields):
+        return
+
+    now = timezone.now()
+    moved = (
+        Employee.objects.filter(pk=instance.manager_id)
+        .exclude(department_id=instance.pk)
+        .update(department_id=instance.pk, updated_at=now)
+    )
+    if moved:
+        stats.refresh(employees=[instance.manager_id])
+    if moved and Department.manager.is_cached(instance):
+        manager = instance.manager
+        manager.department, manager.updated_at = instance, now
+        manager.mark_clean(["department_id", "updated_at"])
+
+
+@receiver(pre_delete, sender=Employee)
+def touch_managed_department(sender, instance, **kwargs):
+    # Deleting the manager sets Department.manager to NULL without saving the department
+    Department.objects.filter(manager=instance).update(updated_at=timezone.now())
+
+
+@receiver(pre_delete, sender=Department)
+def touch_department_employees(sender, instance, **kwargs):
+    # Deleting the department sets Employee.department to NULL without saving the employees
+    Employee.objects.filter(department=instance).update(updated_at=timezone.now())
@@ -0,0 +1,187 @@
+from collections import defaultdict
+from datetime import time, timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.backends.postgresql.psycopg_any import DateTimeTZRange
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from appointment.cache import spanned_days
+from appointment.models import Appointment
+from appointment.occurrences import expand, split_series
+from employee.models import Employee
+
+from .models import Department, DepartmentDayLoad
+
+STATS_SQL = """
+SELECT d.id, d.name, {position_counts}, COALESCE(l.appointments, 0), COALESCE(l.duration, interval '0')
+FROM {department} d
+LEFT JOIN (
+    SELECT department_id, {position_filters}
+    FROM {employee}
+    WHERE department_id IS NOT NULL
+    GROUP BY department_id
+) h ON h.department_id = d.id
+LEFT JOIN ({load}) l ON l.department_id = d.id
+ORDER BY d.id
+"""
+
+# Appointments starting in the window and the time they take up inside it, series are expanded apart
+LIVE_LOAD_SQL = """
+SELECT e.department_id,
+    count(*) FILTER (WHERE lower(a.time_range) >= %(lower)s) AS appointments,
+    sum(upper(a.time_range * w.bounds) - lower(a.time_range * w.bounds)) AS duration
+FROM (SELECT tstzrange(%(lower)s, %(upper)s, '[)') AS bounds) w
+JOIN {appointment} a ON a.time_range && w.bounds AND a.recurrence = ''
+JOIN {employee} e ON e.id = a.employee_id
+WHERE e.department_id IS NOT NULL
+GROUP BY e.department_id
+"""
+
+MATERIALIZED_LOAD_SQL = """
+SELECT department_id, sum(appointments) AS appointments, sum(duration) AS duration
+FROM {day_load}
+WHERE day >= %(first_day)s AND day < %(last_day)s
+GROUP BY department_id
+"""
+
+# Refreshes of the same day take turns, so the later one recomputes it from what the earlier committed
+# instead of both inserting it. Keyed by the table and the day, taken in the order of `days`.
+LOCK_DAYS_SQL = """
+SELECT pg_advisory_xact_lock('{day_load}'::regclass::oid::integer, day - date '2000-01-01')
+FROM unnest(%(days)s::date[]) AS day
+"""
+
+# The same figures as LIVE_LOAD_SQL, per department and day
+REFRESH_SQL = """
+DELETE FROM {day_load} WHERE day = ANY(%(days)s::date[]);
+WITH days AS (
+    SELECT day,
+        tstzrange(day::timestamp AT TIME ZONE %(tz)s, (day + 1)::timestamp AT TIME ZONE %(tz)s, '[)') AS bounds
+    FROM unnest(%(days)s::date[]) AS day
+)
+INSERT INTO {day_load} (department_id, day, appointments, duration)
+SELECT e.department_id, days.day,
+    count(*) FILTER (WHERE lower(a.time_range) >= lower(days.bounds)),
+    sum(upper(a.time_range * days.bounds) - lower(a.time_range * days.bounds))
+FROM days
+JOIN {appointment} a ON a.time_range && days.bounds AND a.recurrence = ''
+JOIN {employee} e ON e.id = a.employee_id
+WHERE e.department_id IS NOT NULL
+GROUP BY e.department_id, days.day
+"""
+
+
+def get_stats(lower, upper):
+    """
+    Return the headcount by position and the appointment load between `lower` and `upper` of every department.
+
+    Each item has the department's `id` and `name`, a `positions` dict of employee counts, the number of `appointments`
+    owned by its employees starting in the window and the `duration` they take up inside it, occurrences of
+    recurring appointments included. Costs one grouped query, one more to find recurring appointments and
+    another when some overlap the window. Windows from midnight to midnight read DepartmentDayLoad when
+    it is maintained.
+    """
+    positions = [value for value, _ in Employee.POSITION_CHOICES]
+    if settings.DEPARTMENT_STATS_MATERIALIZED and _whole_days(lower, upper):
+        load = MATERIALIZED_LOAD_SQL
+    else:
+        load = LIVE_LOAD_SQL
+    sql = STATS_SQL.format(
+        position_counts=", ".join(f"COALESCE(h.{value}, 0)" for value in positions),
+        position_filters=", ".join(f"count(*) FILTER (WHERE position = '{value}') AS {value}" for value in positions),
+        load=load.format(**_tables()),
+        **_tables(),
+    )
+    params = {
+        "lower": lower,
+        "upper": upper,
+        "first_day": timezone.localdate(lower),
+        "last_day": timezone.localdate(upper),
+    }
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+
+    series_load = _series_load(lower, upper)
+    stats = []
+    for pk, name, *counts, appointments, duration in rows:
+        series_appointments, series_duration = series_load.get(pk, (0, timedelta()))
+        stats.append(
+            {
+                "id": pk,
+                "name": name,
+                "positions": dict(zip(positions, counts)),
+                "appointments": appointments + series_appointments,
+                "duration": duration + series_duration,
+            }
+        )
+    return stats
+
+
+def refresh(days=None, employees=None):
+    """
+    Recompute the DepartmentDayLoad rows of `days` and of the days the appointments of `employees` span,
+    or all of them when both are None. Does nothing unless DEPARTMENT_STATS_MATERIALIZED is on.
+
+    Called in the transaction of the write that changed them, so readers never see the two disagree.
+    Concurrent refreshes of a day wait for each other, a full refresh for every other refresh.
+    """
+    if not settings.DEPARTMENT_STATS_MATERIALIZED:
+        return
+
+    tables = _tables()
+    whole = days is None and employees is None
+    appointments = Appointment.objects.filter(recurrence="")
+    with transaction.atomic(), connection.cursor() as cursor:
+        if whole:
+            cursor.execute(f"LOCK TABLE {tables['day_load']} IN EXCLUSIVE MODE")
+            DepartmentDayLoad.objects.all().delete()
+            bounds = appointments.aggregate(first=Min("start_datetime"), last=Max("end_datetime"))
+            days = spanned_days(bounds["first"], bounds["last"]) if bounds["first"] else set()
+        else:
+            days = set(days or ())
+            for start, end in appointments.filter(employee__in=employees or []).values_list(
+                "start_datetime", "end_datetime"
+            ):
+                days |= spanned_days(start, end)
+        if not days:
+            return
+
+        params = {"days": sorted(days), "tz": timezone.get_current_timezone_name()}
+        if not whole:
+            cursor.execute(LOCK_DAYS_SQL.format(**tables), params)
+        cursor.execute(REFRESH_SQL.format(**tables), params)
+
+
+def _series_load(lower, upper):
+    _, series = split_series(Appointment.objects.filter(employee__department__isnull=False))
+    series = series.filter(span__overlap=DateTimeTZRange(lower, upper)).values(
+        "pk", "start_datetime", "end_datetime", "employee__department"
+    )
+    load = defaultdict(lambda: (0, timedelta()))
+    for occurrence in expand(series, (lower, upper)):
+        start, end = occurrence["start_datetime"], occurrence["end_datetime"]
+        appointments, duration = load[occurrence["employee__department"]]
+        load[occurrence["employee__department"]] = (
+            appointments + (start >= lower),
+            duration + min(end, upper) - max(start, lower),
+        )
+    return load
+
+
+def _whole_days(lower, upper):
+    return timezone.localtime(lower).time() == time.min and timezone.localtime(upper).time() == time.min
+
+
+def _tables():
+    return {
+        name: connection.ops.quote_name(model._meta.db_table)
+        for name, model in [
+            ("appointment", Appointment),
+            ("department", Department),
+            ("employee", Employee),
+            ("day_load", DepartmentDayLoad),
+        ]
+    }
@@ -2,6 +2,7 @@ import pytest
 from django.core.exceptions import ValidationError
 
 from department.models import Department
+from employee.models import Employee
 
 
 @pytest.mark.django_db
@@ -18,3 +19,28 @@ def test_department_manager_must_be_manager(manager_employee, employee):
     assert "manager" in exc_info.value.message_dict
     # Verify the exact error message
     assert exc_info.value.message_dict["manager"] == ["The chosen Employee is not Manager."]
+
+
+@pytest.mark.django_db
+def test_manager_joins_their_department_in_one_update(manager_employee, department, assert_num_writes):
+    department = Department.objects.get(pk=department.pk)
+    with assert_num_writes(2) as queries:
+        department.manager = manager_employee
+        department.save()
+    assert queries.captured_queries[-1]["sql"].startswith('UPDATE "employee_employee"')
+    # The in-memory manager follows and has nothing left to save
+    assert manager_employee.department == department
+    with assert_num_writes(0):
+        manager_employee.save()
+    manager_employee.refresh_from_db()
+    assert manager_employee.department == department
+
+    # Edits leaving the manager alone do not touch them
+    with assert_num_writes(1):
+        department.description = "Computers"
+        department.save()
+    # Explicit saves of the manager run the conditional UPDATE, which finds nothing to write
+    updated_at = Employee.objects.get(pk=manager_employee.pk).updated_at
+    with assert_num_writes(2):
+        department.save(update_fields=["manager"])
+    assert Employee.objects.get(pk=manager_employee.pk).updated_at == updated_at
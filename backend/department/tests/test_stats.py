@@ -0,0 +1,197 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.utils import timezone
+
+from appointment.models import Appointment
+from department import stats
+from department.models import Department, DepartmentDayLoad
+from employee.models import Employee
+
+URL = "/api/v1/departments/stats/"
+START = timezone.make_aware(datetime(2025, 6, 2))
+
+
+def at(days, hours=0):
+    return START + timedelta(days=days, hours=hours)
+
+
+def book(employee, start, hours=1, **kwargs):
+    return Appointment.objects.create(
+        start_datetime=start, end_datetime=start + timedelta(hours=hours), title="Booked", employee=employee, **kwargs
+    )
+
+
+@pytest.fixture
+def staff(department, manager_employee):
+    department.manager = manager_employee
+    department.save()
+    other = Department.objects.create(name="Sales")
+    return {
+        "it": department,
+        "sales": other,
+        "manager": manager_employee,
+        "developer": Employee.objects.create(name="Dev", email="dev@testmail.com", department=department),
+        "seller": Employee.objects.create(name="Seller", email="seller@testmail.com", department=other),
+        "loner": Employee.objects.create(name="Loner", email="loner@testmail.com"),
+    }
+
+
+def make_bookings(staff):
+    book(staff["developer"], at(0, 9), hours=2)
+    book(staff["manager"], at(1, 22), hours=4)  # 2 of its hours fall on the next day
+    book(staff["seller"], at(-1, 23), hours=2)  # Starts before the window, only its last hour counts
+    book(staff["loner"], at(0, 9))
+    # A daily series, 30 minutes
+    book(staff["seller"], at(0, 12), hours=0.5, recurrence="FREQ=DAILY;COUNT=5")
+
+
+@pytest.fixture
+def bookings(staff):
+    make_bookings(staff)
+
+
+def summary(items):
+    return {item["name"]: (item["headcount"], item["appointments"], item["appointment_hours"]) for item in items}
+
+
+@pytest.mark.django_db
+def test_stats(api_client, bookings):
+    response = api_client.get(f"{URL}?date=2025-06-02")
+    assert response.status_code == 200
+    assert response.json()[0] == {
+        "url": f"http://testserver{URL.replace('stats/', '')}{response.json()[0]['id']}/",
+        "id": response.json()[0]["id"],
+        "name": "IT Department",
+        "positions": {"employee": 1, "manager": 1},
+        "headcount": 2,
+        "appointments": 1,
+        "appointment_hours": 2.0,
+    }
+    assert summary(response.json()) == {"IT Department": (2, 1, 2.0), "Sales": (1, 1, 1.5)}
+
+    response = api_client.get(f"{URL}?start={at(0).isoformat()}&end={at(7).isoformat()}".replace("+", "%2B"))
+    assert summary(response.json()) == {"IT Department": (2, 2, 6.0), "Sales": (1, 5, 3.5)}
+
+
+@pytest.mark.django_db
+def test_stats_query_count(bookings, django_assert_num_queries):
+    with django_assert_num_queries(2):
+        stats.get_stats(at(10), at(11))
+    with django_assert_num_queries(3):
+        stats.get_stats(at(0), at(1))
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("query", ["", "?start=2025-06-02T00:00:00Z", "?date=nope"])
+def test_stats_need_a_window(api_client, query):
+    response = api_client.get(f"{URL}{query}")
+    assert response.status_code == 400
+    assert list(response.json()) == ["date"]
+
+
+def materialized_matches_live(lower, upper, settings):
+    materialized = stats.get_stats(lower, upper)
+    settings.DEPARTMENT_STATS_MATERIALIZED = False
+    live = stats.get_stats(lower, upper)
+    settings.DEPARTMENT_STATS_MATERIALIZED = True
+    return materialized == live
+
+
+@pytest.mark.django_db
+def test_materialized_load_follows_writes(api_client, settings, staff):
+    settings.DEPARTMENT_STATS_MATERIALIZED = True
+    make_bookings(staff)
+    assert set(DepartmentDayLoad.objects.values_list("department__name", "day")) == {
+        ("IT Department", at(0).date()),
+        ("IT Department", at(1).date()),
+        ("IT Department", at(2).date()),
+        ("Sales", at(-1).date()),
+        ("Sales", at(0).date()),
+    }
+    assert materialized_matches_live(at(-1), at(7), settings)
+
+    moved = Appointment.objects.get(employee=staff["developer"])
+    moved.start_datetime, moved.end_datetime = at(3, 9), at(3, 10)
+    moved.save()
+    staff["developer"].department = staff["sales"]
+    staff["developer"].save()
+    Appointment.objects.get(employee=staff["manager"]).delete()
+    response = api_client.post(
+        "/api/v1/appointments/bulk/",
+        [
+            {
+                "start_datetime": at(4, 9).isoformat(),
+                "end_datetime": at(4, 10).isoformat(),
+                "title": "Bulk",
+                "employee": f"http://testserver/api/v1/employees/{staff['seller'].pk}/",
+                "participants": [],
+            }
+        ],
+        format="json",
+    )
+    assert response.status_code == 201
+
+    assert materialized_matches_live(at(-1), at(7), settings)
+    assert set(DepartmentDayLoad.objects.values_list("department__name", "day")) == {
+        ("Sales", at(-1).date()),
+        ("Sales", at(0).date()),
+        ("Sales", at(3).date()),
+        ("Sales", at(4).date()),
+    }
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_refreshes_of_a_day_take_turns(settings, staff):
+    settings.DEPARTMENT_STATS_MATERIALIZED = True
+    booked, release, errors = threading.Event(), threading.Event(), []
+
+    def write(employee, hold):
+        try:
+            with transaction.atomic():
+                book(employee, at(0, 9))
+                if hold:
+                    booked.set()
+                    release.wait(5)
+        except Exception as error:
+            errors.append(error)
+        finally:
+            connection.close()
+
+    writers = [
+        threading.Thread(target=write, args=args) for args in [(staff["developer"], True), (staff["manager"], False)]
+    ]
+    writers[0].start()
+    assert booked.wait(5)
+    writers[1].start()
+    # Let the second writer reach the day the first still holds
+    with connection.cursor() as cursor:
+        for _ in range(500):
+            cursor.execute("SELECT count(*) FROM pg_locks WHERE NOT granted")
+            if cursor.fetchone()[0]:
+                break
+            time.sleep(0.01)
+    release.set()
+    for writer in writers:
+        writer.join()
+
+    assert errors == []
+    assert list(DepartmentDayLoad.objects.values_list("department__name", "day", "appointments")) == [
+        ("IT Department", at(0).date(), 2)
+    ]
+
+
+@pytest.mark.django_db
+def test_refresh_command(settings, bookings):
+    stdout = StringIO()
+    settings.DEPARTMENT_STATS_MATERIALIZED = True
+    call_command("refresh_department_stats", stdout=stdout)
+    assert stdout.getvalue() == "Refreshed 5 department days.\n"
+    assert materialized_matches_live(at(-1), at(7), settings)
+    # Windows not made of whole days are always computed live
+    assert materialized_matches_live(at(0, 10), at(1, 23), settings)
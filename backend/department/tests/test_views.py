@@ -1,6 +1,8 @@
 import pytest
 from rest_framework import status
 
+from employee.models import Employee
+
 
 @pytest.mark.django_db
 def test_department_viewset_employees_endpoint(api_client, department, employee, manager_employee):
@@ -13,8 +15,24 @@ def test_department_viewset_employees_endpoint(api_client, department, employee,
 
     assert response.status_code == status.HTTP_200_OK
 
-    response_data = response.json()
+    response_data = response.json()["results"]
     # Check the employee is in the response
     assert any(e["id"] == employee.id for e in response_data)
     # Check the manager is not included if not assigned to this department
     assert all(e["id"] != manager_employee.id for e in response_data)
+
+
+@pytest.mark.django_db
+def test_department_list_query_count_is_constant(assert_constant_queries, staffed_appointment_factory):
+    assert_constant_queries("/api/v1/departments/", staffed_appointment_factory.create_employee)
+
+
+@pytest.mark.django_db
+def test_department_employees_query_count_is_constant(assert_constant_queries, department):
+    counter = iter(range(100))
+
+    def add_employee():
+        n = next(counter)
+        Employee.objects.create(name=f"Employee {n}", email=f"employee{n}@testmail.com", department=department)
+
+    assert_constant_queries(f"/api/v1/departments/{department.pk}/employees/", add_employee)
@@ -2,20 +2,62 @@ from rest_framework import viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
+from appointment.filters import get_bounded_window
+from core.asyncread import AsyncReadMixin
+from core.conditional import ConditionalGetMixin
+from core.fastpath import FastReadMixin, UrlBuilder
+from core.prefetch import PrefetchPlanMixin, plan_queryset
+from core.sync import DeltaSyncMixin
 from employee.models import Employee
 from employee.serializers import EmployeeSerializer
 
 from .models import Department
 from .serializers import DepartmentSerializer
+from .stats import get_stats
 
 
-class DepartmentViewSet(viewsets.ModelViewSet):
-    queryset = Department.objects.select_related("manager").all()
+class DepartmentViewSet(
+    DeltaSyncMixin, AsyncReadMixin, ConditionalGetMixin, FastReadMixin, PrefetchPlanMixin, viewsets.ModelViewSet
+):
+    queryset = Department.objects.all()
     serializer_class = DepartmentSerializer
 
     @action(detail=True, methods=["get"])
     def employees(self, request, pk=None):
         department = self.get_object()
-        employees = Employee.objects.filter(department=department).select_related("department")
-        serializer = EmployeeSerializer(employees, many=True, context={"request": request})
-        return Response(serializer.data)
+        context = self.get_serializer_context()
+        employees = Employee.objects.filter(department=department)
+        state = self.get_validator_state(employees, EmployeeSerializer(context=context))
+        return self.conditional_response(state, self._render_employees, employees, context)
+
+    def _render_employees(self, employees, context):
+        employees = plan_queryset(employees, EmployeeSerializer(context=context), narrow=True)
+        page = self.paginate_queryset(employees)
+        serializer = EmployeeSerializer(page, many=True, context=context)
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=["get"], url_path="stats")
+    def stats(self, request):
+        """
+        Return the headcount and appointment load of every Department over a `date`, or a `start` to `end` range.
+
+        Each item counts the department's employees by position (`positions`, `headcount`), the appointments
+        they own starting in the range and the hours those take up inside it, occurrences of recurring
+        appointments included.
+        """
+
+        lower, upper = get_bounded_window(request.query_params)
+        urls = UrlBuilder(request, self.format_kwarg)
+        data = [
+            {
+                "url": urls.get("department-detail", item["id"]),
+                "id": item["id"],
+                "name": item["name"],
+                "positions": item["positions"],
+                "headcount": sum(item["positions"].values()),
+                "appointments": item["appointments"],
+                "appointment_hours": round(item["duration"].total_seconds() / 3600, 2),
+            }
+            for item in get_stats(lower, upper)
+        ]
+        return Response(data)
@@ -1,12 +1,20 @@
 import django_filters
 
+from core.search import search
+
 from .models import Employee
 
+SEARCH_FIELDS = ("name", "email")
+
 
 class EmployeeFilter(django_filters.FilterSet):
     email = django_filters.CharFilter(field_name="email", lookup_expr="icontains")
     name = django_filters.CharFilter(field_name="name", lookup_expr="icontains")
+    search = django_filters.CharFilter(method="filter_search")
 
     class Meta:
         model = Employee
         fields = ["email", "name"]
+
+    def filter_search(self, queryset, name, value):
+        return search(queryset, SEARCH_FIELDS, value)
@@ -0,0 +1,272 @@
+import csv
+import io
+from pathlib import Path
+
+import orjson
+from django.db import connection, transaction
+from django.dispatch import Signal
+
+from core.copy import copy_rows
+from department.models import Department
+
+from .models import Employee
+
+# Sent after an import, the rows it wrote skipped save() and its signals
+imported = Signal()
+
+EMPLOYEE_COLUMNS = ("name", "email", "position", "department")
+DEPARTMENT_COLUMNS = ("name", "description", "manager")
+
+STAGING_SQL = """
+DROP TABLE IF EXISTS import_employee, import_department;
+CREATE TEMP TABLE import_employee (
+    line integer, name text, email text, position text, department text, error text
+) ON COMMIT DROP;
+CREATE TEMP TABLE import_department (
+    line integer, name text, description text, manager text, error text
+) ON COMMIT DROP;
+"""
+
+# Each check rejects the rows still accepted that match it, with its message
+EMPLOYEE_CHECKS = [
+    ("i.name IS NULL", "Name is mandatory."),
+    ("length(i.name) > {name_length}", "Ensure name has at most {name_length} characters."),
+    ("i.email IS NULL", "Email is mandatory."),
+    (r"i.email !~ '^[^@\s]+@[^@\s]+\.[^@\s]+$' OR length(i.email) > {email_length}", "Enter a valid email address."),
+    ("i.position NOT IN ({positions})", "Position must be one of: {position_names}."),
+    (
+        "EXISTS (SELECT 1 FROM import_employee o WHERE o.email = i.email AND o.line < i.line AND o.error IS NULL)",
+        "Email appears on an earlier line.",
+    ),
+]
+
+DEPARTMENT_CHECKS = [
+    ("i.name IS NULL", "Name is mandatory."),
+    ("length(i.name) > {department_length}", "Ensure name has at most {department_length} characters."),
+    (
+        "EXISTS (SELECT 1 FROM import_department o WHERE o.name = i.name AND o.line < i.line AND o.error IS NULL)",
+        "Name appears on an earlier line.",
+    ),
+    (
+        """EXISTS (
+            SELECT 1 FROM import_department o WHERE o.manager = i.manager AND o.line < i.line AND o.error IS NULL
+        )""",
+        "Manager appears on an earlier line.",
+    ),
+]
+
+# Checks between the two files, rerun until no row is rejected as rejections can cascade
+REFERENCE_CHECKS = [
+    (
+        "import_department",
+        """i.manager IS NOT NULL
+        AND NOT EXISTS (SELECT 1 FROM import_employee o WHERE o.email = i.manager AND o.error IS NULL)
+        AND NOT EXISTS (SELECT 1 FROM {employee} e WHERE e.email = i.manager)""",
+        "Manager is not an employee.",
+    ),
+    (
+        "import_department",
+        """COALESCE(
+            (SELECT COALESCE(o.position, '{employee_position}') FROM import_employee o
+            WHERE o.email = i.manager AND o.error IS NULL),
+            (SELECT e.position FROM {employee} e WHERE e.email = i.manager)
+        ) <> '{manager}'""",
+        "The chosen Employee is not Manager.",
+    ),
+    (
+        "import_department",
+        """EXISTS (
+            SELECT 1 FROM {department} d JOIN {employee} e ON e.id = d.manager_id
+            WHERE e.email = i.manager AND d.name <> i.name
+                AND NOT EXISTS (SELECT 1 FROM import_department o WHERE o.name = d.name AND o.error IS NULL)
+        )""",
+        "Manager already manages another department.",
+    ),
+    (
+        "import_employee",
+        """i.department IS NOT NULL
+        AND NOT EXISTS (SELECT 1 FROM import_department o WHERE o.name = i.department AND o.error IS NULL)
+        AND NOT EXISTS (SELECT 1 FROM {department} d WHERE d.name = i.department)""",
+        "Department does not exist.",
+    ),
+]
+
+REJECT_SQL = "UPDATE {table} i SET error = %s WHERE i.error IS NULL AND ({condition})"
+
+# Managers are set once every employee is in, imported departments drop theirs first so the one-to-one
+# constraint holds while they move
+UPSERT_DEPARTMENTS_SQL = """
+INSERT INTO {department} (name, description, manager_id, updated_at)
+SELECT name, COALESCE(description, ''), NULL, now() FROM import_department WHERE error IS NULL
+ON CONFLICT (name) DO UPDATE
+SET description = EXCLUDED.description, manager_id = NULL, updated_at = EXCLUDED.updated_at
+RETURNING xmax = 0 AS created
+"""
+
+UPSERT_EMPLOYEES_SQL = """
+INSERT INTO {employee} (name, email, position, department_id, updated_at)
+SELECT i.name, i.email, COALESCE(i.position, '{employee_position}'), d.id, now()
+FROM import_employee i LEFT JOIN {department} d ON d.name = i.department
+WHERE i.error IS NULL
+ON CONFLICT (email) DO UPDATE
+SET name = EXCLUDED.name, position = EXCLUDED.position, department_id = EXCLUDED.department_id,
+    updated_at = EXCLUDED.updated_at
+RETURNING xmax = 0 AS created
+"""
+
+# The same in two statements for when the table is locked, no other transaction can then insert an email
+# so the conflict checks of the upsert are left out
+UPDATE_EMPLOYEES_SQL = """
+UPDATE {employee} e
+SET name = i.name, position = COALESCE(i.position, '{employee_position}'), department_id = d.id, updated_at = now()
+FROM import_employee i LEFT JOIN {department} d ON d.name = i.department
+WHERE i.error IS NULL AND e.email = i.email
+"""
+
+INSERT_EMPLOYEES_SQL = """
+INSERT INTO {employee} (name, email, position, department_id, updated_at)
+SELECT i.name, i.email, COALESCE(i.position, '{employee_position}'), d.id, now()
+FROM import_employee i LEFT JOIN {department} d ON d.name = i.department
+WHERE i.error IS NULL AND NOT EXISTS (SELECT 1 FROM {employee} e WHERE e.email = i.email)
+"""
+
+SET_MANAGERS_SQL = """
+UPDATE {department} d SET manager_id = e.id
+FROM import_department i JOIN {employee} e ON e.email = i.manager
+WHERE i.error IS NULL AND d.name = i.name
+"""
+
+# What ensure_manager_is_in_own_department does on save
+MOVE_MANAGERS_SQL = """
+UPDATE {employee} e SET department_id = d.id, updated_at = now()
+FROM {department} d JOIN import_department i ON i.name = d.name AND i.error IS NULL
+WHERE d.manager_id = e.id AND e.department_id IS DISTINCT FROM d.id
+"""
+
+# Whether the accepted employees outnumber those stored, going by the planner's estimate of the table
+OUTNUMBERS_SQL = """
+SELECT (SELECT count(*) FROM import_employee WHERE error IS NULL) > GREATEST(reltuples, 0)
+FROM pg_class WHERE oid = %s::regclass
+"""
+
+
+def read_rows(file, name):
+    """
+    Return the records of a CSV (with a header) or JSON (a list of objects) file, told apart by `name`'s suffix.
+    """
+    suffix = Path(name).suffix.lower()
+    if suffix == ".csv":
+        return csv.DictReader(io.TextIOWrapper(file, encoding="utf-8-sig", newline=""))
+    if suffix == ".json":
+        rows = orjson.loads(file.read())
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            raise ValueError(f"{name} must hold a list of objects.")
+        return rows
+    raise ValueError(f"{name} must be a .csv or .json file.")
+
+
+def import_staff(employees=(), departments=()):
+    """
+    Upsert `employees` and `departments`, iterables of dicts, into their tables in one transaction.
+
+    Employees are matched on email and name their department by name, departments are matched on name and
+    name their manager by email; either may refer to rows of the other file or to rows already stored. Rows
+    are loaded with COPY into temporary tables and validated with one UPDATE per check, so the cost does not
+    grow with a query per row. Rows failing a check are left out and reported, the rest are written. When
+    they outnumber the employees stored, as when onboarding, the employee indexes are dropped and built
+    again after the load, which costs less than maintaining them row by row but keeps the table locked
+    against reads until the import commits.
+
+    Returns {"employees": {...}, "departments": {...}}, each with the `created` and `updated` counts and
+    the `rejected` rows as {"line": record number from 1, "error": message}.
+    """
+    formats = {
+        "employee": connection.ops.quote_name(Employee._meta.db_table),
+        "department": connection.ops.quote_name(Department._meta.db_table),
+        "manager": Employee.POSITION_MANAGER,
+        "employee_position": Employee.POSITION_EMPLOYEE,
+        "positions": ", ".join(f"'{value}'" for value, _ in Employee.POSITION_CHOICES),
+        "position_names": ", ".join(value for value, _ in Employee.POSITION_CHOICES),
+        "name_length": Employee._meta.get_field("name").max_length,
+        "email_length": Employee._meta.get_field("email").max_length,
+        "department_length": Department._meta.get_field("name").max_length,
+    }
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(STAGING_SQL)
+        copy_rows(
+            cursor,
+            "import_employee",
+            ("line", *EMPLOYEE_COLUMNS),
+            _staged(employees, EMPLOYEE_COLUMNS),
+            blank_as_null=False,
+        )
+        copy_rows(
+            cursor,
+            "import_department",
+            ("line", *DEPARTMENT_COLUMNS),
+            _staged(departments, DEPARTMENT_COLUMNS),
+            blank_as_null=False,
+        )
+        # Temporary tables are never analyzed on their own
+        cursor.execute("ANALYZE import_employee, import_department")
+
+        checks = [("import_employee", *check) for check in EMPLOYEE_CHECKS]
+        checks += [("import_department", *check) for check in DEPARTMENT_CHECKS]
+        for table, condition, message in checks:
+            _reject(cursor, table, condition, message, formats)
+        while sum(_reject(cursor, *check, formats) for check in REFERENCE_CHECKS):
+            pass
+
+        cursor.execute(OUTNUMBERS_SQL, [Employee._meta.db_table])
+        deferred = Employee._meta.indexes if cursor.fetchone()[0] else []
+        with connection.schema_editor() as editor:
+            for index in deferred:
+                editor.remove_index(Employee, index)
+
+        report = {"departments": _write(cursor, UPSERT_DEPARTMENTS_SQL.format(**formats))}
+        if deferred:
+            cursor.execute(UPDATE_EMPLOYEES_SQL.format(**formats))
+            updated = cursor.rowcount
+            cursor.execute(INSERT_EMPLOYEES_SQL.format(**formats))
+            report["employees"] = {"created": cursor.rowcount, "updated": updated}
+        else:
+            report["employees"] = _write(cursor, UPSERT_EMPLOYEES_SQL.format(**formats))
+        cursor.execute(SET_MANAGERS_SQL.format(**formats))
+        cursor.execute(MOVE_MANAGERS_SQL.format(**formats))
+
+        if deferred:
+            # Indexes cannot be built while foreign key checks are queued on the table, run them now
+            connection.check_constraints()
+            with connection.schema_editor() as editor:
+                for index in deferred:
+                    editor.add_index(Employee, index)
+
+        for key, table in [("departments", "import_department"), ("employees", "import_employee")]:
+            cursor.execute(f"SELECT line, error FROM {table} WHERE error IS NOT NULL ORDER BY line")
+            report[key]["rejected"] = [{"line": line, "error": error} for line, error in cursor.fetchall()]
+
+    imported.send(sender=Employee)
+    return report
+
+
+def _staged(rows, columns):
+    for line, row in enumerate(rows, start=1):
+        yield (line, *(_clean(row.get(column)) for column in columns))
+
+
+def _clean(value):
+    if value is None:
+        return None
+    return str(value).strip() or None
+
+
+def _reject(cursor, table, condition, message, formats):
+    cursor.execute(REJECT_SQL.format(table=table, condition=condition.format(**formats)), [message.format(**formats)])
+    return cursor.rowcount
+
+
+def _write(cursor, sql):
+    cursor.execute(f"WITH written AS ({sql}) SELECT count(*) FILTER (WHERE created), count(*) FROM written")
+    created, written = cursor.fetchone()
+    return {"created": created, "updated": written - created}
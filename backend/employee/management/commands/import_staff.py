@@ -0,0 +1,37 @@
+from contextlib import ExitStack
+
+from django.core.management.base import BaseCommand, CommandError
+
+from employee.importer import import_staff, read_rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Upsert employees and departments from CSV or JSON files in one transaction, reporting the rows left out. "
+        "Employees have name, email, position and department (a name) columns, departments have name, "
+        "description and manager (an email) columns."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--employees", help="Employees .csv or .json file.")
+        parser.add_argument("--departments", help="Departments .csv or .json file.")
+
+    def handle(self, *args, employees=None, departments=None, **options):
+        paths = {key: path for key, path in [("employees", employees), ("departments", departments)] if path}
+        if not paths:
+            raise CommandError("Pass --employees, --departments or both.")
+
+        with ExitStack() as stack:
+            try:
+                rows = {key: read_rows(stack.enter_context(open(path, "rb")), path) for key, path in paths.items()}
+            except (OSError, ValueError) as error:
+                raise CommandError(error) from error
+            report = import_staff(**rows)
+
+        for key, result in report.items():
+            self.stdout.write(
+                f"{key.capitalize()}: {result['created']} created, {result['updated']} updated, "
+                f"{len(result['rejected'])} rejected."
+            )
+            for rejected in result["rejected"]:
+                self.stderr.write(f"{key} line {rejected['line']}: {rejected['error']}")
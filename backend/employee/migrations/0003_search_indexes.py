@@ -0,0 +1,69 @@
+# Generated by Django 5.2 on 2026-10-18 13:09
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+import django.db.models.functions.comparison
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("department", "0003_department_updated_at"),
+        ("employee", "0002_employee_updated_at"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name="employee",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper(
+                        django.db.models.functions.comparison.Cast("name", output_field=models.TextField())
+                    ),
+                    name="gin_trgm_ops",
+                ),
+                name="employee_name_trgm",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="employee",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper(
+                        django.db.models.functions.comparison.Cast("email", output_field=models.TextField())
+                    ),
+                    name="gin_trgm_ops",
+                ),
+                name="employee_email_trgm",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="employee",
+            index=models.Index(
+                django.db.models.functions.comparison.Collate(
+                    django.db.models.functions.text.Upper(
+                        django.db.models.functions.comparison.Cast("name", output_field=models.TextField())
+                    ),
+                    "C",
+                ),
+                models.F("id"),
+                name="employee_name_prefix",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="employee",
+            index=models.Index(
+                django.db.models.functions.comparison.Collate(
+                    django.db.models.functions.text.Upper(
+                        django.db.models.functions.comparison.Cast("email", output_field=models.TextField())
+                    ),
+                    "C",
+                ),
+                models.F("id"),
+                name="employee_email_prefix",
+            ),
+        ),
+    ]
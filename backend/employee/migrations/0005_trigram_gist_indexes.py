@@ -0,0 +1,49 @@
+# Generated by Django 5.2 on 2026-10-18 14:49
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.comparison
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("department", "0005_sync"),
+        ("employee", "0004_sync"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="employee",
+            name="employee_name_trgm",
+        ),
+        migrations.RemoveIndex(
+            model_name="employee",
+            name="employee_email_trgm",
+        ),
+        migrations.AddIndex(
+            model_name="employee",
+            index=django.contrib.postgres.indexes.GistIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper(
+                        django.db.models.functions.comparison.Cast("name", output_field=models.TextField())
+                    ),
+                    name="gist_trgm_ops",
+                ),
+                name="employee_name_trgm",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="employee",
+            index=django.contrib.postgres.indexes.GistIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper(
+                        django.db.models.functions.comparison.Cast("email", output_field=models.TextField())
+                    ),
+                    name="gist_trgm_ops",
+                ),
+                name="employee_email_trgm",
+            ),
+        ),
+    ]
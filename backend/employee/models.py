@@ -2,8 +2,11 @@ from django.core.exceptions import ValidationError
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 
+from core.search import prefix_index, trigram_index
+from core.tracking import TrackedFieldsMixin
 
-class Employee(models.Model):
+
+class Employee(TrackedFieldsMixin, models.Model):
     POSITION_EMPLOYEE = "employee"
     POSITION_MANAGER = "manager"
 
@@ -16,6 +19,7 @@ class Employee(models.Model):
     email = models.EmailField(unique=True)
     position = models.CharField(max_length=20, choices=POSITION_CHOICES, default=POSITION_EMPLOYEE)
     department = models.ForeignKey("department.Department", on_delete=models.SET_NULL, null=True, blank=False)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.name} ({self.position})"
@@ -32,3 +36,13 @@ class Employee(models.Model):
     @property
     def is_manager(self):
         return self.position == self.POSITION_MANAGER
+
+    class Meta:
+        indexes = [
+            trigram_index("name", "employee_name_trgm"),
+            trigram_index("email", "employee_email_trgm"),
+            prefix_index("name", "employee_name_prefix"),
+            prefix_index("email", "employee_email_prefix"),
+            # Delta sync, see core.sync.DeltaSyncMixin
+            models.Index(fields=["updated_at", "id"], name="employee_updated_id_idx"),
+        ]
@@ -1,11 +1,14 @@
+from django.core.files.uploadedfile import UploadedFile
 from rest_framework import serializers
 
+from core.serializers import ExpandableFieldsMixin
 from department.serializers import DepartmentSerializer
 
+from .importer import read_rows
 from .models import Employee
 
 
-class EmployeeSerializer(serializers.HyperlinkedModelSerializer):
+class EmployeeSerializer(ExpandableFieldsMixin, serializers.HyperlinkedModelSerializer):
     url = serializers.HyperlinkedIdentityField(view_name="employee-detail", lookup_field="pk")
     department = DepartmentSerializer(many=False, read_only=True)
 
@@ -20,3 +23,44 @@ class EmployeeSerializer(serializers.HyperlinkedModelSerializer):
             "department",
         )
         read_only_fields = ("id",)
+
+
+class EmployeeExportSerializer(serializers.ModelSerializer):
+    """
+    Flat employee rows for CSV and NDJSON exports.
+    """
+
+    department_name = serializers.CharField(source="department.name", default=None, read_only=True)
+
+    class Meta:
+        model = Employee
+        fields = ("id", "name", "email", "position", "department", "department_name")
+        read_only_fields = fields
+
+
+class ImportRowsField(serializers.Field):
+    """
+    A CSV or JSON file upload, or a list of objects, read into import records.
+    """
+
+    default_error_messages = {"invalid": "Upload a .csv or .json file, or pass a list of objects."}
+
+    def to_internal_value(self, data):
+        if isinstance(data, UploadedFile):
+            try:
+                return read_rows(data, data.name)
+            except ValueError as error:
+                raise serializers.ValidationError(str(error)) from error
+        if not isinstance(data, list) or not all(isinstance(row, dict) for row in data):
+            self.fail("invalid")
+        return data
+
+
+class StaffImportSerializer(serializers.Serializer):
+    employees = ImportRowsField(required=False)
+    departments = ImportRowsField(required=False)
+
+    def validate(self, attrs):
+        if not attrs:
+            raise serializers.ValidationError("Pass employees, departments or both.")
+        return attrs
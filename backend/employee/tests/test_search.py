@@ -0,0 +1,121 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from core.search import autocomplete
+from employee.filters import SEARCH_FIELDS, EmployeeFilter
+from employee.models import Employee
+
+URL = "/api/v1/employees/autocomplete/"
+
+
+@pytest.fixture
+def people():
+    return {
+        name: Employee.objects.create(name=name, email=email)
+        for name, email in [
+            ("Jo Smith", "jo@testmail.com"),
+            ("John Smith", "smith.john@testmail.com"),
+            ("Alice Johnson", "alice@testmail.com"),
+            ("Bob Johns", "johns.bob@testmail.com"),
+            ("Peter Smithson", "peter@testmail.com"),
+        ]
+    }
+
+
+def explain_with_index_scans_forced(queryset):
+    with connection.cursor() as cursor:
+        cursor.execute("SET LOCAL enable_seqscan = off")
+    return queryset.explain()
+
+
+@pytest.mark.django_db
+def test_autocomplete_ranks_prefixes_first(api_client, people):
+    response = api_client.get(f"{URL}?q=john")
+    assert response.status_code == 200
+    assert [item["name"] for item in response.json()] == ["John Smith", "Bob Johns", "Alice Johnson"]
+    assert response.json()[0] == {
+        "id": people["John Smith"].pk,
+        "name": "John Smith",
+        "email": "smith.john@testmail.com",
+    }
+
+    names = [item["name"] for item in api_client.get(f"{URL}?q=smith").json()]
+    assert names[:1] == ["John Smith"]
+    assert set(names[1:]) == {"Jo Smith", "Peter Smithson"}
+
+
+@pytest.mark.django_db
+def test_autocomplete_limits(api_client, people, settings):
+    # Short terms only match prefixes
+    assert [item["name"] for item in api_client.get(f"{URL}?q=jo").json()] == ["Jo Smith", "John Smith", "Bob Johns"]
+    assert [item["name"] for item in api_client.get(f"{URL}?q=jo&limit=1").json()] == ["Jo Smith"]
+
+    settings.EMPLOYEE_AUTOCOMPLETE_LIMIT = 2
+    assert len(api_client.get(f"{URL}?q=jo&limit=50").json()) == 2
+    assert api_client.get(f"{URL}?q=%20").json() == []
+
+
+@pytest.mark.django_db
+def test_autocomplete_keeps_the_most_similar_rows():
+    Employee.objects.bulk_create(
+        Employee(name=f"Anna Smythe-Carrington {n}", email=f"anna{n}@testmail.com") for n in range(30)
+    )
+    nearest = Employee.objects.create(name="Ann Smyth", email="ann@testmail.com")
+
+    assert autocomplete(Employee.objects.all(), SEARCH_FIELDS, "smyth", 1) == [nearest]
+    assert autocomplete(Employee.objects.all(), SEARCH_FIELDS, "smyth", 3)[0] == nearest
+
+
+@pytest.mark.django_db
+def test_autocomplete_query_count(people, django_assert_num_queries):
+    with django_assert_num_queries(1):
+        assert len(autocomplete(Employee.objects.all(), SEARCH_FIELDS, "jo", 1)) == 1
+    with django_assert_num_queries(3):
+        autocomplete(Employee.objects.all(), SEARCH_FIELDS, "smith", 10)
+
+
+@pytest.mark.django_db
+def test_search_filter(people):
+    qs = EmployeeFilter({"search": "smiths"}, queryset=Employee.objects.all()).qs
+    assert {employee.name for employee in qs} == {"Jo Smith", "John Smith", "Peter Smithson"}
+
+    qs = EmployeeFilter({"search": "e@test"}, queryset=Employee.objects.all()).qs
+    assert {employee.name for employee in qs} == {"Alice Johnson"}
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "queryset, indexes",
+    [
+        (lambda: EmployeeFilter({"name": "smith"}, queryset=Employee.objects.all()).qs, ["employee_name_trgm"]),
+        (lambda: EmployeeFilter({"email": "smith"}, queryset=Employee.objects.all()).qs, ["employee_email_trgm"]),
+        (lambda: EmployeeFilter({"search": "smith"}, queryset=Employee.objects.all()).qs, ["employee_email_trgm"]),
+        # Both indexes serve prefixes, the statistics pick one
+        (lambda: Employee.objects.filter(name__istartswith="jo"), ["employee_name_prefix", "employee_name_trgm"]),
+    ],
+)
+def test_searches_use_trigram_indexes(people, queryset, indexes):
+    plan = explain_with_index_scans_forced(queryset())
+    assert any(index in plan for index in indexes)
+
+
+@pytest.mark.django_db
+def test_autocomplete_uses_prefix_and_trigram_indexes(people):
+    with CaptureQueriesContext(connection) as queries:
+        autocomplete(Employee.objects.all(), SEARCH_FIELDS, "smith", 10)
+
+    with connection.cursor() as cursor:
+        cursor.execute("SET LOCAL enable_seqscan = off")
+        cursor.execute("SET LOCAL enable_bitmapscan = off")
+        plans = []
+        for query in queries.captured_queries:
+            cursor.execute(f"EXPLAIN {query['sql']}")
+            plans.append("\n".join(row[0] for row in cursor.fetchall()))
+
+    assert "employee_name_prefix" in plans[0]
+    assert "employee_email_prefix" in plans[1]
+    assert "employee_name_trgm" in plans[2] and "employee_email_trgm" in plans[2]
+    # Both trigram indexes return the nearest rows in order
+    assert "Order By: (upper((name)::text) <->> 'SMITH'::text)" in plans[2]
+    assert "Order By: (upper((email)::text) <->> 'SMITH'::text)" in plans[2]
@@ -0,0 +1,6 @@
+import pytest
+
+
+@pytest.mark.django_db
+def test_employee_list_query_count_is_constant(assert_constant_queries, staffed_appointment_factory):
+    assert_constant_queries("/api/v1/employees/", staffed_appointment_factory.create_employee)
@@ -1,13 +1,69 @@
+from django.conf import settings
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
 
-from .filters import EmployeeFilter
+from core.asyncread import AsyncReadMixin
+from core.conditional import ConditionalGetMixin
+from core.export import ExportMixin
+from core.fastpath import FastReadMixin
+from core.pagination import positive_int
+from core.prefetch import PrefetchPlanMixin
+from core.search import autocomplete
+from core.sync import DeltaSyncMixin
+
+from .filters import SEARCH_FIELDS, EmployeeFilter
+from .importer import import_staff
 from .models import Employee
-from .serializers import EmployeeSerializer
+from .serializers import EmployeeExportSerializer, EmployeeSerializer, StaffImportSerializer
 
 
-class EmployeeViewSet(viewsets.ModelViewSet):
-    queryset = Employee.objects.select_related("department").all()
+class EmployeeViewSet(
+    DeltaSyncMixin,
+    AsyncReadMixin,
+    ConditionalGetMixin,
+    ExportMixin,
+    FastReadMixin,
+    PrefetchPlanMixin,
+    viewsets.ModelViewSet,
+):
+    queryset = Employee.objects.all()
     serializer_class = EmployeeSerializer
+    export_serializer_class = EmployeeExportSerializer
     filter_backends = [DjangoFilterBackend]
     filterset_class = EmployeeFilter
+
+    @action(detail=False, methods=["get"], url_path="autocomplete")
+    def autocomplete(self, request):
+        """
+        Return the id, name and email of the Employees best matching `q`, for a typeahead.
+
+        Names starting with `q` come first, then emails starting with it, then from three characters on
+        names and emails containing it or a word similar to it. At most `limit` (and at most
+        settings.EMPLOYEE_AUTOCOMPLETE_LIMIT) rows are returned, without pagination.
+        """
+
+        limit = settings.EMPLOYEE_AUTOCOMPLETE_LIMIT
+        try:
+            limit = positive_int(request.query_params.get("limit", limit), cutoff=limit)
+        except ValueError:
+            pass
+
+        employees = Employee.objects.only("id", "name", "email")
+        matches = autocomplete(employees, SEARCH_FIELDS, request.query_params.get("q", ""), limit)
+        return Response([{"id": employee.pk, "name": employee.name, "email": employee.email} for employee in matches])
+
+    @action(detail=False, methods=["post"], url_path="import")
+    def bulk_import(self, request):
+        """
+        Upsert Employees and Departments in one transaction and report the rows left out.
+
+        Takes `employees` and `departments` as CSV or JSON file uploads, or as lists of objects in a JSON
+        body. Employees have name, email, position and department (a name) columns, departments have name,
+        description and manager (an email) columns.
+        """
+
+        serializer = StaffImportSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(import_staff(**serializer.validated_data))
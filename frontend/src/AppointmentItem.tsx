@@ -1,7 +1,7 @@
 import React, { useState, useEffect, useRef } from 'react';
 import type { Appointment, Department, Employee } from './types';
 import config from './constants';
-import { parseAppointment } from './utils';
+import { fetchAllPages, parseAppointment } from './utils';
 
 interface Props {
   appointment: Appointment;
@@ -162,8 +162,9 @@ export default function AppointmentItem({
     if (!departmentId) return;
     setLoadingEmployees(true);
     try {
-      const res = await fetch(`${config.DEPARTMENT_ENDPOINT}/${departmentId}/employees/`);
-      const data: Employee[] = await res.json();
+      const data = await fetchAllPages<Employee>(
+        `${config.DEPARTMENT_ENDPOINT}/${departmentId}/employees/`
+      );
       setEmployees(data);
       setShowEmployeeList(true);
     } catch {
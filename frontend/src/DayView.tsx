@@ -1,7 +1,7 @@
 import { useState, useEffect } from 'react';
 import type { Appointment, Department } from './types';
 import AppointmentItem from './AppointmentItem';
-import { calculatePosition, groupOverlappingAppointments } from './utils';
+import { calculatePosition, fetchAllPages, groupOverlappingAppointments } from './utils';
 import config from './constants';
 
 interface Props {
@@ -17,8 +17,7 @@ export default function DayView({ date, appointments }: Props) {
   const [editingAppointment, setEditingAppointment] = useState<Appointment | null>(null);
 
   useEffect(() => {
-    fetch(`${config.DEPARTMENT_ENDPOINT}/`)
-      .then((res) => res.json())
+    fetchAllPages<Department>(`${config.DEPARTMENT_ENDPOINT}/`)
       .then(setDepartments)
       .catch(() => {});
   }, []);
@@ -2,9 +2,9 @@ import React, { useState, useEffect } from 'react';
 import DatePicker from 'react-datepicker';
 import 'react-datepicker/dist/react-datepicker.css';
 import DayView from './DayView';
-import type { Appointment } from './types';
+import type { Appointment, RawAppointment } from './types';
 import config from './constants';
-import { parseAppointments } from './utils';
+import { fetchAllPages, parseAppointments } from './utils';
 
 export default function SidebarCalendar() {
   const [appointments, setAppointments] = useState<Appointment[]>([]);
@@ -32,9 +32,9 @@ export default function SidebarCalendar() {
     const fetchAppointments = async () => {
       const dateStr = selectedDate.toISOString().slice(0, 10);
       try {
-        const response = await fetch(`${config.APPOINTMENT_ENDPOINT}/?date=${dateStr}`);
-        if (!response.ok) throw new Error('Failed to fetch appointments');
-        const data = await response.json();
+        const data = await fetchAllPages<RawAppointment>(
+          `${config.APPOINTMENT_ENDPOINT}/?date=${dateStr}`
+        );
         const parsedAppointments = parseAppointments(data);
         setAppointments(parsedAppointments);
       } catch (err) {
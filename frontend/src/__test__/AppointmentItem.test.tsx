@@ -234,7 +234,7 @@ test('shows alert on failed delete', async () => {
 test('adds participants after selecting a department and clicking add participant', async () => {
   (global.fetch as jest.Mock).mockResolvedValueOnce({
     ok: true,
-    json: async () => mockEmployees,
+    json: async () => ({ next: null, previous: null, results: mockEmployees }),
   });
 
   render(
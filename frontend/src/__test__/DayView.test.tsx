@@ -31,7 +31,7 @@ beforeEach(() => {
   global.fetch = jest.fn(() =>
     Promise.resolve({
       ok: true,
-      json: () => Promise.resolve(mockDepartments),
+      json: () => Promise.resolve({ next: null, previous: null, results: mockDepartments }),
     } as Response)
   ) as jest.Mock;
 });
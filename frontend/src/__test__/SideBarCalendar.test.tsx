@@ -63,7 +63,7 @@ function mockFetch(url: string) {
   if (url.includes('?date=')) {
     return Promise.resolve({
       ok: true,
-      json: async () => mockAppointments,
+      json: async () => ({ next: null, previous: null, results: mockAppointments }),
     } as Response);
   }
   return Promise.resolve({ ok: false } as Response);
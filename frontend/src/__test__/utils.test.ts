@@ -4,6 +4,7 @@ import {
   parseAppointments,
   groupOverlappingAppointments,
   calculatePosition,
+  fetchAllPages,
 } from '../utils';
 
 const mockEmployee: Employee = {
@@ -78,6 +79,36 @@ describe('parseAppointments', () => {
   });
 });
 
+describe('fetchAllPages', () => {
+  afterEach(() => {
+    jest.resetAllMocks();
+  });
+
+  it('follows next links and concatenates the results', async () => {
+    global.fetch = jest
+      .fn()
+      .mockResolvedValueOnce({
+        ok: true,
+        json: async () => ({ next: '/items/?cursor=abc', previous: null, results: [1, 2] }),
+      })
+      .mockResolvedValueOnce({
+        ok: true,
+        json: async () => ({ next: null, previous: '/items/?cursor=def', results: [3] }),
+      }) as jest.Mock;
+
+    const items = await fetchAllPages<number>('/items/');
+
+    expect(items).toEqual([1, 2, 3]);
+    expect(global.fetch).toHaveBeenNthCalledWith(2, '/items/?cursor=abc');
+  });
+
+  it('throws when a page fails to load', async () => {
+    global.fetch = jest.fn().mockResolvedValueOnce({ ok: false }) as jest.Mock;
+
+    await expect(fetchAllPages('/items/')).rejects.toThrow('Failed to fetch /items/');
+  });
+});
+
 describe('groupOverlappingAppointments', () => {
   it('groups overlapping appointments correctly', () => {
     const appointments: Appointment[] = [
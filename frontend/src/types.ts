@@ -30,3 +30,9 @@ export interface Employee {
   email: string;
   department: Department;
 }
+
+export interface Page<T> {
+  next: string | null;
+  previous: string | null;
+  results: T[];
+}
@@ -1,4 +1,4 @@
-import type { Appointment, RawAppointment } from './types';
+import type { Appointment, Page, RawAppointment } from './types';
 
 export function parseAppointment(item: RawAppointment): Appointment {
   return {
@@ -16,6 +16,19 @@ export function parseAppointments(data: RawAppointment | RawAppointment[]): Appo
   return [parseAppointment(data)];
 }
 
+export async function fetchAllPages<T>(url: string): Promise<T[]> {
+  const items: T[] = [];
+  let next: string | null = url;
+  while (next) {
+    const response = await fetch(next);
+    if (!response.ok) throw new Error(`Failed to fetch ${next}`);
+    const page: Page<T> = await response.json();
+    items.push(...page.results);
+    next = page.next;
+  }
+  return items;
+}
+
 function isOverlapping(a: Appointment, b: Appointment): boolean {
   return a.start_datetime < b.end_datetime && b.start_datetime < a.end_datetime;
 }